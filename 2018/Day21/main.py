@@ -1,168 +1,48 @@
 import argparse
-from datetime import datetime
-import re
-from collections import deque
+from pathlib import Path
+import sys
 
 
-class Machine(object):
-    def __init__(self, ip_reg, program):
-        self.regs = [0] * 6
-        self.operations = [
-            self.addr, self.addi,
-            self.mulr, self.muli,
-            self.banr, self.bani,
-            self.borr, self.bori,
-            self.setr, self.seti,
-            self.gtir, self.gtri, self.gtrr,
-            self.eqir, self.eqri, self.eqrr
-        ]
-        self.ip = 0
-        self.ip_reg = ip_reg
-        self.program = program
-
-    def load_registers(self, regs):
-        self.regs = list(regs)
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
 
-    def reg_str(self):
-        return ', '.join("{}: {:8X}".format(idx, val) for idx, val in enumerate(self.regs))
 
-    def insn_str(self, ip=None):
-        if ip is None:
-            ip = self.ip
-        return "{} {}".format(self.program[ip][0], " ".join(map(str, self.program[ip][1])))
-
-    def state_str(self, ip=None):
-        if ip is None:
-            ip = self.ip
-        return "{:2} {:20} {}".format(ip, self.insn_str(ip), self.reg_str())
-
-    def run_program(self, steps=-1, quiet=True, bp=set()):
-        count = 0
-        if not quiet:
-            print("{:5}: {:2} {:20} {}".format(count, "", "", self.reg_str()))
-        while self.ip < len(self.program) and (steps == -1 or count < steps):
-            count += 1
-            self.regs[self.ip_reg] = self.ip
-            ip = self.ip
-            getattr(self, self.program[self.ip][0])(*self.program[self.ip][1])
-            self.ip = self.regs[self.ip_reg] + 1
-            if not quiet:
-                print("{:5}: {}".format(count, self.state_str(ip)))
-            if ip in bp:
-                break
-
-    def addr(self, a, b, c):
-        self.regs[c] = self.regs[a] + self.regs[b]
-
-    def addi(self, a, b, c):
-        self.regs[c] = self.regs[a] + b
-
-    def mulr(self, a, b, c):
-        self.regs[c] = self.regs[a] * self.regs[b]
-
-    def muli(self, a, b, c):
-        self.regs[c] = self.regs[a] * b
-
-    def banr(self, a, b, c):
-        self.regs[c] = self.regs[a] & self.regs[b]
-
-    def bani(self, a, b, c):
-        self.regs[c] = self.regs[a] & b
-
-    def borr(self, a, b, c):
-        self.regs[c] = self.regs[a] | self.regs[b]
-
-    def bori(self, a, b, c):
-        self.regs[c] = self.regs[a] | b
-
-    def setr(self, a, b, c):
-        self.regs[c] = self.regs[a]
-
-    def seti(self, a, b, c):
-        self.regs[c] = a
-
-    def gtir(self, a, b, c):
-        self.regs[c] = int(a > self.regs[b])
-
-    def gtri(self, a, b, c):
-        self.regs[c] = int(self.regs[a] > b)
-
-    def gtrr(self, a, b, c):
-        self.regs[c] = int(self.regs[a] > self.regs[b])
-
-    def eqir(self, a, b, c):
-        self.regs[c] = int(a == self.regs[b])
-
-    def eqri(self, a, b, c):
-        self.regs[c] = int(self.regs[a] == b)
-
-    def eqrr(self, a, b, c):
-        self.regs[c] = int(self.regs[a] == self.regs[b])
-
-
-def parse_array(data):
-    return eval(data, {}, {})
-
-
-def parse_instruction(data):
-    data = data.split()
-    insn = data[0]
-    args = tuple(map(int, data[1:]))
-    return insn, args
-
-
-def load_program(input):
-    instructions = []
-    ip_reg = 0
-    with open(input, 'r') as f:
-        for line in f:
-            if line.startswith("#ip"):
-                ip_reg = int(line.split()[1])
-            else:
-                instructions.append(parse_instruction(line))
-    return ip_reg, instructions
+from common.elfcode import Machine, load_program
 
 
-def re_implement(r1=0):
-    r2 = r1 | 0x10000
-    r1 = 0xA1D291
-    while True:
-        r1 += r2 & 0xFF
-        r1 &= 0xFFFFFF
-        r1 *= 0x1016B
-        r1 &= 0xFFFFFF
-        if r2 < 0x100:
-            break
-        r2 >>= 8
-    return r1
+def halt_check(program):
+    """The ip of the instruction comparing a register against r0, and that register"""
+    for ip, (name, (a, b, c)) in enumerate(program):
+        if name == 'eqrr' and 0 in (a, b):
+            return ip, b if a == 0 else a
+    raise Exception("No instruction compares against r0")
 
 
-def find_all_solutions():
-    solutions = set()
-    r1 = 0
-    while True:
-        prev = r1
-        r1 = re_implement(r1)
-        if r1 in solutions:
-            break
-        solutions.add(r1)
-    print(len(solutions))
-    print(prev)
+def halting_values(m):
+    """Values of r0 that would halt the program, in the order the program checks them"""
+    ip, reg = halt_check(m.program)
+    while m.run_program(bp={ip}):
+        yield m.regs[reg]
 
 
 def part1(args):
     ip_reg, instructions = load_program(args.input)
     m = Machine(ip_reg, instructions)
-    m.run_program(quiet=False, bp={17, 28})
-    m.regs[5] = (m.regs[2] >> 8) - 1
-    m.run_program(quiet=False, bp={17, 28})
-    m.regs[5] = (m.regs[2] >> 8) - 1
-    m.run_program(quiet=False, bp={17, 28})
-    print(re_implement(), m.regs[1])
+    print(next(halting_values(m)))
 
 
 def part2(args):
-    find_all_solutions()
+    ip_reg, instructions = load_program(args.input)
+    solutions = set()
+    prev = None
+    for value in halting_values(Machine(ip_reg, instructions)):
+        if value in solutions:
+            break
+        solutions.add(value)
+        prev = value
+    print(len(solutions))
+    print(prev)
 
 
 if __name__ == '__main__':
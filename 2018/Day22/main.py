@@ -1,8 +1,17 @@
 import argparse
 from datetime import datetime
+from pathlib import Path
 import re
 from collections import deque
-import heapq
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common import search
 
 
 def yc(point):
@@ -86,6 +95,9 @@ VALID_TOOLS = {
     2: {'T', 'N'}
 }
 
+# Tools in the order their states are numbered
+TOOLS = 'CNT'
+
 
 class Room:
     IMAGES = ['.', '=', '|']
@@ -100,40 +112,15 @@ class Room:
         return Room.IMAGES[self.type]
 
 
-def calc_move_cost(equipment, from_room, to_room):
+def calc_move_cost(equipment, from_type, to_type):
     """:raises KeyError on failure"""
     # assume we have equipment for the current room
-    if equipment in VALID_TOOLS[to_room.type]:
+    if equipment in VALID_TOOLS[to_type]:
         return equipment, 1
-    shared = VALID_TOOLS[from_room.type].intersection(VALID_TOOLS[to_room.type]).pop()
+    shared = VALID_TOOLS[from_type].intersection(VALID_TOOLS[to_type]).pop()
     return shared, 7 + 1
 
 
-class MinHeapDict:
-    def __init__(self):
-        self.heap = []
-        self.dict = {}
-
-    def push(self, priority, key, value):
-        old = self.dict.get(key)
-        if old is not None:
-            if old[0] <= priority:
-                return
-            else:
-                old[2] = None
-        # print("edge {} {} -> {}".format(priority, key, value))
-        qvalue = [priority, key, value]
-        self.dict[key] = qvalue
-        heapq.heappush(self.heap, qvalue)
-
-    def pop(self):
-        while True:
-            result = heapq.heappop(self.heap)
-            if result[2] is not None:
-                self.dict.pop(result[1])
-                return result
-
-
 class Cave:
     def __init__(self, depth=4845, target=(6, 770), size=(106, 870)):
         self.depth = depth
@@ -169,47 +156,45 @@ class Cave:
             print(''.join(self.map[(x, y)].image for x in self.bounds.xrange()))
 
     def shortest_paths(self):
-        edges = MinHeapDict()
-        edges.push(0, ((0, 0), 'T'), (None, 'T'))
-        moves = {((0, 0), 'T'): (0, ((0, 0), 'T'))}
-        while True:
-            cost, (edge, edge_equipment), (parent, parent_equipment) = edges.pop()
-            moves[(edge, edge_equipment)] = (cost, (parent, parent_equipment))
-            # print(edge, cost, parent, edge_equipment)
-            if edge == self.target:
-                if edge_equipment is not 'T':
-                    moves[(edge, 'T')] = (cost + 7, (edge, edge_equipment))
-                print("Found path to {} in {} minutes".format(edge, moves[(edge, 'T')][0]))
-                break
-            for offset in ADJACENTS:
-                move = add_points(edge, offset)
-                if move not in self.map:
-                    # if xc(move) > 0 and yc(move) > 0:
-                    #     print("reached edge: {}".format(move))
-                    continue
-                try:
-                    move_equipment, move_cost = calc_move_cost(edge_equipment, self.map[edge], self.map[move])
-                except KeyError:
-                    # illegal move
-                    continue
-                if (move, move_equipment) in moves:
-                    # already have shortest path to this node
-                    # if cost + move_cost < moves[move][0]:
-                    #     print("Failed...")
-                    continue
-                # print("add {} {} -> {}".format(depth+1, edge, move))
-                edges.push(cost + move_cost, (move, move_equipment), (edge, edge_equipment))
-        return moves
-
-
-def target_path(moves, target):
-    cur = target
-    path = []
-    while cur[0] is not None:
-        cost, parent = moves[cur]
-        path.append((cost, cur))
-        cur = parent
-    return reversed(path)
+        width = self.bounds.width
+        height = self.bounds.height
+        types = [self.map[(x, y)].type for y in range(height) for x in range(width)]
+        size = len(types)
+        # moves[from type][to type][tool] is the (tool, cost) of the step
+        moves = [[[None] * len(TOOLS) for _ in VALID_TOOLS] for _ in VALID_TOOLS]
+        for from_type, tools in VALID_TOOLS.items():
+            for to_type in VALID_TOOLS:
+                for equipment in tools:
+                    move_equipment, move_cost = calc_move_cost(equipment, from_type, to_type)
+                    moves[from_type][to_type][TOOLS.index(equipment)] = TOOLS.index(move_equipment), move_cost
+
+        # The state is cell * 3 + tool, with the cells numbered row by row
+        def neighbors(state):
+            cell, tool = divmod(state, 3)
+            x = cell % width
+            for move, ok in ((cell - 1, x > 0), (cell - width, cell >= width),
+                             (cell + width, cell + width < size), (cell + 1, x + 1 < width)):
+                if ok:
+                    move_tool, move_cost = moves[types[cell]][types[move]][tool]
+                    yield move * 3 + move_tool, move_cost
+
+        target = yc(self.target) * width + xc(self.target)
+        # Start at (0, 0) holding the torch
+        result = search.dijkstra([TOOLS.index('T')], neighbors, size * 3,
+                                 goal=lambda state: state // 3 == target, predecessors=True)
+        minutes = result.cost
+        if result.goal % 3 != TOOLS.index('T'):
+            minutes += 7
+        print("Found path to {} in {} minutes".format(self.target, minutes))
+        return result
+
+
+def target_path(cave, result):
+    """(cost, ((x, y), tool)) along the path the search found to the target"""
+    for state in result.path():
+        cell, tool = divmod(state, 3)
+        y, x = divmod(cell, cave.bounds.width)
+        yield result.dist[state], ((x, y), TOOLS[tool])
 
 
 def part1(args):
@@ -225,8 +210,8 @@ def part2(args):
     cave = Cave()
     cave.generate()
     # cave.print()
-    moves = cave.shortest_paths()
-    # for move in target_path(moves, (cave.target, 'T')):
+    result = cave.shortest_paths()
+    # for move in target_path(cave, result):
     #     print(move)
 
 
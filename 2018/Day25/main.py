@@ -1,8 +1,16 @@
 import argparse
 from datetime import datetime
+from pathlib import Path
 import re
-from collections import deque
-import heapq
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common.unionfind import UnionFind
 
 
 def add_points(left, right):
@@ -32,36 +40,17 @@ def read_input(input):
     return data
 
 
-class Glob:
-    def __init__(self, points):
-        self.items = set(points)
-
-    def can_join(self, point):
-        for item in self.items:
-            if dist_points(item, point) <= 3:
-                return True
-        return False
-
-
 def part1(args):
-    data = read_input(args.input)
-    globs = set()
-    for point in data:
-        matches = []
-        for glob in globs:
-            if glob.can_join(point):
-                matches.append(glob)
-        new_glob = Glob([point])
-        for glob in matches:
-            globs.remove(glob)
-            if len(glob.items) > len(new_glob.items):
-                glob.items.update(new_glob.items)
-                new_glob.items = glob.items
-            else:
-                new_glob.items.update(glob.items)
-        globs.add(new_glob)
-    print(len(globs))
-
+    data = sorted(read_input(args.input))
+    constellations = UnionFind(len(data))
+    for i, point in enumerate(data):
+        # Sorted on the first coordinate, so stop once that alone is too far
+        for j in range(i + 1, len(data)):
+            if data[j][0] - point[0] > 3:
+                break
+            if dist_points(point, data[j]) <= 3:
+                constellations.union(i, j)
+    print(constellations.components)
 
 
 def num_in_range(data, point):
@@ -1,3 +1,16 @@
+import argparse
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common.intcode import search
+
+
 OP_ADD = 1
 OP_MULT = 2
 OP_HALT = 99
@@ -52,29 +65,33 @@ def part1():
     print("{}".format(m.run()))
 
 
-def part2():
-    result = 0
+def run_noun_verb(program, candidate):
+    m = Machine(program)
+    m.program[1], m.program[2] = candidate
+    try:
+        return m.run()
+    except:
+        return None
+
+
+def part2(workers=None):
     data = read_file("input.txt")
-    for noun in range(0, 100):
-        for verb in range(0, 100):
-            m = Machine(data)
-            m.program[1] = noun
-            m.program[2] = verb
-            try:
-                result = m.run()
-            except:
-                print("error", noun, verb)
-                continue
-            if result == 19690720:
-                print("success", noun, verb)
-                result = 100 * noun + verb
-                print("{}".format(result))
-                return
+    candidates = [(noun, verb) for noun in range(0, 100) for verb in range(0, 100)]
+    found = search(data, run_noun_verb, candidates, workers, key=lambda result: result == 19690720)
+    (noun, verb), result = found
+    if result != 19690720:
+        print("no noun/verb produces 19690720")
+        return
+    print("success", noun, verb)
+    print("{}".format(100 * noun + verb))
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, 1 runs serially')
+    args = parser.parse_args()
     part1()
-    part2()
+    part2(args.workers)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""
+Instructions per second of the shared Intcode engine, interpreted and
+compiled, against the old per-day interpreter this directory used to carry.
+
+    python bench.py [input.txt] [--mode 2] [--repeat 3]
+"""
+import argparse
+from pathlib import Path
+import sys
+import time
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common.intcode import CompilingMachine, Machine, read_file
+
+
+OP_ADD = 1
+OP_MULT = 2
+OP_INPUT = 3
+OP_OUTPUT = 4
+OP_JUMP_IF_TRUE = 5
+OP_JUMP_IF_FALSE = 6
+OP_LESS_THAN = 7
+OP_EQUALS = 8
+OP_REL_BASE_OFFSET = 9
+OP_HALT = 99
+
+
+class HaltException(Exception):
+    pass
+
+
+class Instruction(object):
+    def __init__(self, inputs, outputs, method):
+        self.inputs = inputs
+        self.outputs = outputs
+        self.method = method
+
+
+class LegacyMachine(object):
+    """The Day09 Machine as it was before common.intcode, kept as the baseline"""
+    def __init__(self, memory, inputs):
+        self.ip = 0
+        self.next_ip = 0
+        self.rbo = 0
+        self._memory = list(memory)
+        self.cur_op_modes = []
+        self.opmap = {
+            OP_ADD: Instruction(2, 1, self.add),
+            OP_MULT: Instruction(2, 1, self.mult),
+            OP_INPUT: Instruction(0, 1, self.input),
+            OP_OUTPUT: Instruction(1, 0, self.output),
+            OP_JUMP_IF_TRUE: Instruction(2, 0, self.jump_if_true),
+            OP_JUMP_IF_FALSE: Instruction(2, 0, self.jump_if_false),
+            OP_LESS_THAN: Instruction(2, 1, self.less_than),
+            OP_EQUALS: Instruction(2, 1, self.equals),
+            OP_REL_BASE_OFFSET: Instruction(1, 0, self.adj_rel_base_offset),
+            OP_HALT: Instruction(0, 0, self.halt)
+        }
+        self.inputs = list(inputs)
+        self.outputs = []
+        self.count = 0
+
+    def expand_mem(self, new_size):
+        self._memory.extend((0 for _ in range(new_size - len(self._memory) + 1)))
+
+    def load(self, address):
+        try:
+            return self._memory[address]
+        except IndexError:
+            self.expand_mem(address)
+        return self._memory[address]
+
+    def store(self, address, value):
+        try:
+            self._memory[address] = value
+        except IndexError:
+            self.expand_mem(address)
+        self._memory[address] = value
+
+    def op_load(self, opidx):
+        v = self.load(self.ip + 1 + opidx)
+        if len(self.cur_op_modes) <= opidx or self.cur_op_modes[opidx] == 0:
+            return self.load(v)
+        elif self.cur_op_modes[opidx] == 1:
+            return v
+        elif self.cur_op_modes[opidx] == 2:
+            return self.load(self.rbo + v)
+        else:
+            raise Exception("Invalid operand mode!")
+
+    def op_store(self, opidx, value):
+        a = self.load(self.ip + 1 + opidx)
+        if len(self.cur_op_modes) <= opidx or self.cur_op_modes[opidx] == 1:
+            self.store(a, value)
+        elif self.cur_op_modes[opidx] == 2:
+            self.store(self.rbo + a, value)
+        else:
+            raise Exception("Invalid operand mode!")
+
+    def execute(self):
+        self.count += 1
+        op = self.load(self.ip)
+        instruction = self.opmap[op % 100]
+        mode = op // 100
+        modes = []
+        while mode != 0:
+            modes.append(mode % 10)
+            mode //= 10
+        self.cur_op_modes = modes
+        self.next_ip = self.ip + 1 + instruction.inputs + instruction.outputs
+        instruction.method()
+
+    def add(self):
+        self.op_store(2, self.op_load(0) + self.op_load(1))
+
+    def mult(self):
+        self.op_store(2, self.op_load(0) * self.op_load(1))
+
+    def input(self):
+        self.op_store(0, self.inputs.pop(0))
+
+    def output(self):
+        self.outputs.append(self.op_load(0))
+
+    def jump_if_true(self):
+        if self.op_load(0) != 0:
+            self.next_ip = self.op_load(1)
+
+    def jump_if_false(self):
+        if self.op_load(0) == 0:
+            self.next_ip = self.op_load(1)
+
+    def less_than(self):
+        self.op_store(2, int(self.op_load(0) < self.op_load(1)))
+
+    def equals(self):
+        self.op_store(2, int(self.op_load(0) == self.op_load(1)))
+
+    def adj_rel_base_offset(self):
+        self.rbo += self.op_load(0)
+
+    def halt(self):
+        raise HaltException()
+
+    def run(self):
+        try:
+            while True:
+                self.ip = self.next_ip
+                self.execute()
+        except HaltException:
+            return None
+
+
+def run_legacy(program, mode):
+    m = LegacyMachine(program, [mode])
+    m.run()
+    return m.outputs
+
+
+def run_shared(program, mode):
+    outputs = []
+    m = Machine(program, f_output=outputs.append)
+    m.inputs.append(mode)
+    m.run()
+    return outputs
+
+
+def run_compiled(program, mode):
+    outputs = []
+    m = CompilingMachine(program, f_output=outputs.append)
+    m.inputs.append(mode)
+    m.run()
+    return outputs
+
+
+def timed(f, program, mode, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f(program, mode)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', default=str(SCRIPT_DIR / 'input.txt'))
+    parser.add_argument('--mode', type=int, default=2, help='input value, 2 is the long-running sensor boost')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    program = read_file(args.path)
+    counter = LegacyMachine(program, [args.mode])
+    counter.run()
+    count = counter.count
+
+    expected, legacy_time = timed(run_legacy, program, args.mode, args.repeat)
+    runners = [('shared', run_shared), ('compiled', run_compiled)]
+    print("{} instructions".format(count))
+    print("{:>8}: {:8.3f}s {:>12,.0f} ips".format('legacy', legacy_time, count / legacy_time))
+    for name, f in runners:
+        result, elapsed = timed(f, program, args.mode, args.repeat)
+        if result != expected:
+            raise Exception("{} produced {}, expected {}".format(name, result, expected))
+        print("{:>8}: {:8.3f}s {:>12,.0f} ips {:6.1f}x".format(name, elapsed, count / elapsed, legacy_time / elapsed))
+
+
+if __name__ == "__main__":
+    main()
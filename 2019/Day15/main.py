@@ -2,6 +2,15 @@ import sys
 import time
 import msvcrt
 from collections import deque
+from pathlib import Path
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common.intcode import CompilingMachine, read_file
 
 
 def getc():
@@ -11,18 +20,6 @@ def getc():
     return c.decode()
 
 
-OP_ADD = 1
-OP_MULT = 2
-OP_INPUT = 3
-OP_OUTPUT = 4
-OP_JUMP_IF_TRUE = 5
-OP_JUMP_IF_FALSE = 6
-OP_LESS_THAN = 7
-OP_EQUALS = 8
-OP_REL_BASE_OFFSET = 9
-OP_HALT = 99
-
-
 def minmax(it, key=lambda x: x):
     min_ = max_ = None
     for item in it:
@@ -34,153 +31,6 @@ def minmax(it, key=lambda x: x):
     return min_, max_
 
 
-def read_file(path):
-    with open(path, "r") as f:
-        data = list(map(int, f.read().split(',')))
-    return data
-
-
-class HaltException(Exception):
-    pass
-
-
-class OutputException(Exception):
-    def __init__(self, value):
-        self.value = value
-
-
-class Instruction(object):
-    def __init__(self, inputs, outputs, method):
-        self.inputs = inputs
-        self.outputs = outputs
-        self.method = method
-
-
-class Machine(object):
-    def __init__(self, memory, f_input, f_output):
-        self.ip = 0
-        self.next_ip = 0
-        self.rbo = 0
-        self._memory = list(memory)
-        self.cur_op_modes = []
-        self.opmap = {
-            OP_ADD: Instruction(2, 1, self.add),
-            OP_MULT: Instruction(2, 1, self.mult),
-            OP_INPUT: Instruction(0, 1, self.input),
-            OP_OUTPUT: Instruction(1, 0, self.output),
-            OP_JUMP_IF_TRUE: Instruction(2, 0, self.jump_if_true),
-            OP_JUMP_IF_FALSE: Instruction(2, 0, self.jump_if_false),
-            OP_LESS_THAN: Instruction(2, 1, self.less_than),
-            OP_EQUALS: Instruction(2, 1, self.equals),
-            OP_REL_BASE_OFFSET: Instruction(1, 0, self.adj_rel_base_offset),
-            OP_HALT: Instruction(0, 0, self.halt)
-        }
-        self.f_input = f_input
-        self.f_output = f_output
-
-    def state(self):
-        return list(self._memory)
-
-    def load_state(self, state):
-        self._memory = list(state)
-
-    def expand_mem(self, new_size):
-        self._memory.extend((0 for _ in range(new_size - len(self._memory) + 1)))
-
-    def load(self, address):
-        try:
-            return self._memory[address]
-        except IndexError:
-            self.expand_mem(address)
-        return self._memory[address]
-
-    def store(self, address, value):
-        try:
-            self._memory[address] = value
-        except IndexError:
-            self.expand_mem(address)
-            self._memory[address] = value
-        # print("*({}) = {}".format(address, value))
-
-    def op_load(self, opidx):
-        v = self.load(self.ip + 1 + opidx)
-        if len(self.cur_op_modes) <= opidx or self.cur_op_modes[opidx] == 0:
-            # memory load mode
-            return self.load(v)
-        elif self.cur_op_modes[opidx] == 1:
-            # immediate mode
-            return v
-        elif self.cur_op_modes[opidx] == 2:
-            return self.load(self.rbo + v)
-        else:
-            raise Exception("Invalid operand mode!")
-
-    def op_store(self, opidx, value):
-        a = self.load(self.ip + 1 + opidx)
-        if len(self.cur_op_modes) <= opidx or self.cur_op_modes[opidx] == 1:
-            self.store(a, value)
-        elif self.cur_op_modes[opidx] == 2:
-            self.store(self.rbo + a, value)
-        else:
-            raise Exception("Invalid operand mode!")
-
-    def execute(self):
-        op = self.load(self.ip)
-        instruction = self.opmap[op % 100]
-        mode = op // 100
-        modes = []
-        while mode != 0:
-            modes.append(mode % 10)
-            mode //= 10
-        self.cur_op_modes = modes
-        self.next_ip = self.ip + 1 + instruction.inputs + instruction.outputs
-        instruction.method()
-
-    def add(self):
-        self.op_store(2, self.op_load(0) + self.op_load(1))
-
-    def mult(self):
-        self.op_store(2, self.op_load(0) * self.op_load(1))
-
-    def input(self):
-        value = self.f_input()
-        self.op_store(0, value)
-
-    def output(self):
-        value = self.op_load(0)
-        self.f_output(value)
-
-    def jump_if_true(self):
-        if self.op_load(0) != 0:
-            self.next_ip = self.op_load(1)
-
-    def jump_if_false(self):
-        if self.op_load(0) == 0:
-            self.next_ip = self.op_load(1)
-
-    def less_than(self):
-        self.op_store(2, int(self.op_load(0) < self.op_load(1)))
-
-    def equals(self):
-        self.op_store(2, int(self.op_load(0) == self.op_load(1)))
-
-    def adj_rel_base_offset(self):
-        self.rbo += self.op_load(0)
-
-    def halt(self):
-        raise HaltException()
-
-    def run(self):
-        try:
-            while True:
-                self.ip = self.next_ip
-                self.execute()
-        except OutputException as oe:
-            return oe.value
-        except HaltException:
-            return None
-
-
 class Point(object):
     def __init__(self, *dims):
         self.dims = list(dims)
@@ -372,22 +222,17 @@ DIR_KEYS = {'w': 1, 's': 2, 'a': 3, 'd': 4}
 
 
 class Map(object):
-    def __init__(self, program, auto=True):
+    def __init__(self, program, manual=False):
         self.grid = Grid()
         self.distances = Grid()
         self.location = Point(0, 0)
         self.target_loc = None
         self.grid[self.location] = 'D'
         self.distances[self.location] = 0
-        if auto:
-            self.cpu = Machine(program, self.manual_input, self.handle_response)
+        if manual:
+            self.cpu = CompilingMachine(program, self.manual_input, self.handle_response)
         else:
-            self.cpu = Machine(program, self.auto_explore_input, self.auto_explore_handle_response)
-        # auto-explore specific
-        self.visited = set(self.location)
-        self.to_explore = deque()
-        for i in range(1, 5):
-            self.to_explore.append((self.location, i, self.cpu.state()))
+            self.cpu = CompilingMachine(program)
         self.goal = None
 
     def manual_input(self):
@@ -404,30 +249,30 @@ class Map(object):
         self.target_loc = self.location + DIRS[answer]
         return answer
 
-    def auto_explore_input(self):
-        if not self.to_explore:
-            raise Exception("Done!")
-        cur_loc, direction, state = self.to_explore.popleft()
-        self.location = cur_loc
-        self.target_loc = cur_loc + DIRS[direction]
-        self.cpu.load_state(state)
-        return direction
-
-    def auto_explore_handle_response(self, response):
-        distance = self.distances[self.location]
-        if not self.handle_response(response):
-            # hit a wall, nothing new to explore
-            return
-        # override the D
-        self.grid[self.location] = '.'
-        self.distances[self.location] = distance + 1
-        for direction, n in dir_neighbors(self.location):
-            if n in self.visited:
-                continue
-            self.visited.add(n)
-            nval = self.grid.get(n, ' ')
-            if nval == ' ':
-                self.to_explore.append((self.location, direction, self.cpu.state()))
+    def explore(self):
+        """
+        Breadth-first search of the whole maze.  Every open cell keeps a
+        snapshot of the droid standing on it, and each move is tried by
+        restoring that snapshot rather than walking the droid back.
+        """
+        frontier = deque([(self.location, self.cpu.snapshot())])
+        while frontier:
+            location, state = frontier.popleft()
+            for direction, n in dir_neighbors(location):
+                if n in self.grid:
+                    continue
+                self.cpu.restore(state)
+                self.cpu.inputs.append(direction)
+                self.location = location
+                self.target_loc = n
+                if not self.handle_response(self.cpu.run()):
+                    # hit a wall, nothing new to explore
+                    continue
+                if self.grid[self.location] == 'D':
+                    # override the D
+                    self.grid[self.location] = '.'
+                self.distances[self.location] = self.distances[location] + 1
+                frontier.append((self.location, self.cpu.snapshot()))
 
     def handle_response(self, response):
         if response == 0:
@@ -450,11 +295,8 @@ class Map(object):
 
 def part1():
     data = read_file("input.txt")
-    m = Map(data, False)
-    try:
-        m.cpu.run()
-    except Exception:
-        pass
+    m = Map(data)
+    m.explore()
     print(m.distances[m.goal], "shortest moves to goal")
     return m
 
@@ -1,6 +1,13 @@
-import sys
+import argparse
 from collections import Counter
 
+import numpy as np
+
+
+# Exact counts have about as many bits as there are steps, past this many
+# they take too long to multiply out and only a modulus will do
+MAX_EXACT_STEPS = 10000
+
 
 def read_file(path):
     with open(path, "r") as f:
@@ -24,45 +31,144 @@ def minmax(it, key=lambda x: x):
     return min_, max_
 
 
-def model(poly, conv, rounds):
-    for rnd in range(rounds):
-        newpoly = []
-        for i in range(len(poly)):
-            pair = poly[i:i+2]
-            newpoly.append(pair[0])
-            newpoly.append(conv.get(pair, ''))
-        poly = ''.join(newpoly)
-    return poly
+class PairModel(object):
+    """
+    The polymer as counts of each pair of neighbouring elements.  A pair
+    with a rule turns into the pairs either side of the inserted element
+    whatever else is in the polymer, so a step is a linear map of the pair
+    counts, kept sparse as the pairs each one produces, and n steps are the
+    nth power of its matrix.
+    """
+    def __init__(self, poly, conv):
+        self.poly = poly
+        elements = sorted(set(poly) | set(''.join(conv)) | set(conv.values()))
+        self.pairs = [a + b for a in elements for b in elements]
+        self.index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.produces = []
+        for pair in self.pairs:
+            insert = conv.get(pair)
+            if insert is None:
+                self.produces.append((self.index[pair],))
+            else:
+                self.produces.append((self.index[pair[0] + insert], self.index[insert + pair[1]]))
+
+    def initial(self):
+        counts = [0] * len(self.pairs)
+        for i in range(len(self.poly) - 1):
+            counts[self.index[self.poly[i:i+2]]] += 1
+        return counts
+
+    def step(self, counts):
+        new = [0] * len(counts)
+        for i, count in enumerate(counts):
+            if count:
+                for j in self.produces[i]:
+                    new[j] += count
+        return new
+
+    def dtype(self, steps, modulus):
+        """
+        int64 while no count can overflow it, a pair at most doubling every
+        step, Python ints in an object array otherwise.
+        """
+        if modulus is None:
+            fits = steps + len(self.poly).bit_length() < 62
+        else:
+            fits = modulus * modulus * len(self.pairs) < 1 << 62
+        return np.int64 if fits else object
+
+    def matrix(self, dtype):
+        """Column i holds what pair i turns into in one step"""
+        m = np.zeros((len(self.pairs), len(self.pairs)), dtype=dtype)
+        for i, produced in enumerate(self.produces):
+            for j in produced:
+                m[j, i] += 1
+        return m
+
+    def counts_after(self, steps, modulus=None):
+        """
+        Pair counts after steps steps, by repeated squaring of the step
+        matrix, so O(P^3 log steps) for P pairs.  With a modulus the counts
+        are only known modulo it, which is all there is room for once the
+        polymer is longer than memory could hold.
+        """
+        dtype = self.dtype(steps, modulus)
+        counts = np.array(self.initial(), dtype=dtype)
+        m = self.matrix(dtype)
+        while steps:
+            if steps & 1:
+                counts = m.dot(counts)
+                if modulus is not None:
+                    counts %= modulus
+            steps >>= 1
+            if steps:
+                m = m.dot(m)
+                if modulus is not None:
+                    m %= modulus
+        return counts.tolist()
+
+    def element_counts(self, counts, modulus=None):
+        """
+        Each element is the first of a pair, but for the last one of the
+        polymer which stays the last one whatever is inserted.
+        """
+        elements = Counter()
+        for pair, count in zip(self.pairs, counts):
+            if count:
+                elements[pair[0]] += count
+        elements[self.poly[-1]] += 1
+        if modulus is not None:
+            for element in elements:
+                elements[element] %= modulus
+        return elements
+
+    def stream(self, steps):
+        """Element counts after each step in turn, the polymer never built"""
+        counts = self.initial()
+        for step in range(1, steps + 1):
+            counts = self.step(counts)
+            yield step, self.element_counts(counts)
 
 
 def part1(fname):
-    poly, conv = read_file(fname)
-    counts = Counter(model(poly, conv, 10))
+    model = PairModel(*read_file(fname))
+    counts = model.element_counts(model.counts_after(10))
     least, most = minmax(counts.values())
     print(most, least, most - least)
 
 
 def part2(fname):
-    poly, conv = read_file(fname)
-    pair_counts = {}
-    for pair in conv:
-        # could probably save off the polys for each of these to make the next part a lot quicker
-        pair_counts[pair] = Counter(model(pair, conv, 20))
-        print(pair, pair_counts[pair])
-    
-    poly20 = model(poly, conv, 20)
-    #print(Counter(poly20))
-    counts = Counter()
-    for i in range(len(poly20) - 1):
-        pair = poly20[i:i+2]
-        counts.update(pair_counts[pair])
-        counts[pair[1]] -= 1
-    counts[poly[-1]] += 1
+    model = PairModel(*read_file(fname))
+    counts = model.element_counts(model.counts_after(40))
     print(counts)
     least, most = minmax(counts.values())
     print(most, least, most - least)
 
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    parser.add_argument('--steps', type=int, help='also count the elements after this many steps')
+    parser.add_argument('--modulus', type=int, help='count modulo this, for more steps than exact counts can take')
+    parser.add_argument('--stream', action='store_true', help='print the element counts after every one of the steps')
+    args = parser.parse_args()
+    if args.steps is not None and args.steps > MAX_EXACT_STEPS and (args.modulus is None or args.stream):
+        parser.error(f'--steps above {MAX_EXACT_STEPS} needs --modulus, and cannot be streamed')
+    part1(args.path)
+    part2(args.path)
+    if args.steps is None:
+        return
+    model = PairModel(*read_file(args.path))
+    if args.stream:
+        for step, counts in model.stream(args.steps):
+            print(step, ' '.join(f'{element}={count}' for element, count in sorted(counts.items())))
+        return
+    counts = model.element_counts(model.counts_after(args.steps, args.modulus), args.modulus)
+    print(' '.join(f'{element}={count}' for element, count in sorted(counts.items())))
+    if args.modulus is None:
+        least, most = minmax(counts.values())
+        print(most, least, most - least)
+
+
 if __name__ == "__main__":
-    part1(sys.argv[1])
-    part2(sys.argv[1])
+    main()
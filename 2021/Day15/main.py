@@ -1,5 +1,13 @@
+from pathlib import Path
 import sys
-import heapq
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common import search
 
 
 def read_file(path):
@@ -115,23 +123,26 @@ class Point(object):
 
 
 def dijkstra(g, start, end):
-    visited = {
-        start: (None, 0)
-    }
-    to_visit = [(g[p], start, p) for p in g.adjacent(start)]
-    heapq.heapify(to_visit)
-    for c, s, p in to_visit:
-        visited[p] = None
-    while True:
-        path_cost, source, dest = heapq.heappop(to_visit)
-        visited[dest] = (source, path_cost)
-        for n in g.adjacent(dest):
-            if n not in visited:
-                visited[n] = None
-                heapq.heappush(to_visit, (path_cost + g[n], dest, n))
-        if dest == end:
-            break
-    print(visited[dest][1])
+    # Cells are numbered row by row, entering a cell costs its risk
+    width = g.width
+    risk = [v for row in g.values for v in row]
+    size = len(risk)
+
+    def neighbors(i):
+        x = i % width
+        if x + 1 < width:
+            yield i + 1, risk[i + 1]
+        if i + width < size:
+            yield i + width, risk[i + width]
+        if x > 0:
+            yield i - 1, risk[i - 1]
+        if i >= width:
+            yield i - width, risk[i - width]
+
+    target = end.y * width + end.x
+    # Risks are 1 to 9, small enough for a bucket per distance
+    result = search.dial([start.y * width + start.x], neighbors, 9, size, goal=lambda i: i == target)
+    print(result.cost)
 
 
 def part1(fname):
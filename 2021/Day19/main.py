@@ -1,7 +1,18 @@
 import sys
-import functools
-from collections import Counter
-from itertools import combinations
+from collections import defaultdict
+from itertools import permutations, product
+
+import numpy as np
+
+
+# Beacons two scanners need in common to be aligned, and so the beacon pairs
+# they have in common at least
+MATCHING_BEACONS = 12
+MATCHING_PAIRS = MATCHING_BEACONS * (MATCHING_BEACONS - 1) // 2
+
+# Bits for each delta of a fingerprint, enough for the 2000 at most between
+# beacons a scanner can see
+KEY_BITS = 12
 
 
 def read_file(path):
@@ -15,260 +26,169 @@ def read_file(path):
                 cur = []
                 data.append(cur)
                 continue
-            cur.append(Point(*[int(x) for x in line.split(',')]))
-    return data
-
-
-@functools.total_ordering
-class Point(object):
-    def __init__(self, *dims):
-        self.dims = list(dims)
-
-    def copy(self):
-        return Point(*self.dims)
-
-    @property
-    def x(self):
-        return self.dims[0]
-
-    @x.setter
-    def x(self, value):
-        self.dims[0] = value
-
-    @property
-    def y(self):
-        return self.dims[1]
-
-    @y.setter
-    def y(self, value):
-        self.dims[1] = value
-
-    @property
-    def z(self):
-        return self.dims[2]
-
-    @z.setter
-    def z(self, value):
-        self.dims[2] = value
-
-    @property
-    def tuple(self):
-        # returning it like this makes it sort naturally as a tuple
-        return tuple(reversed(self.dims))
-
-    def dist(self, other):
-        return sum(abs(s - o) for s, o in zip(self.dims, other.dims))
-
-    def rotate(self, x, y, z):
-        p = Point(*self.dims)
-        for _ in range(x % 4):
-            tz = p.y
-            p.y = -p.z
-            p.z = tz
-        for _ in range(y % 4):
-            tx = p.z
-            p.z = -p.x
-            p.x = tx
-        for _ in range(z % 4):
-            ty = p.x
-            p.x = -p.y
-            p.y = ty
-        return p
+            cur.append([int(x) for x in line.split(',')])
+    return [np.array(points, dtype=np.int64) for points in data]
 
-    def __getitem__(self, item):
-        return self.dims[item]
 
-    def __setitem__(self, key, value):
-        self.dims[key] = value
+def make_rotations():
+    """The 24 rotations, the signed permutation matrices with determinant 1"""
+    rotations = []
+    for perm in permutations(range(3)):
+        for signs in product((1, -1), repeat=3):
+            m = np.zeros((3, 3), dtype=np.int64)
+            m[range(3), perm] = signs
+            if round(np.linalg.det(m)) == 1:
+                rotations.append(m)
+    return np.array(rotations)
 
-    def __hash__(self):
-        return hash(self.tuple)
 
-    def __add__(self, other):
-        return Point(*(s + o for s, o in zip(self.dims, other.dims)))
+ROTATIONS = make_rotations()
 
-    def __sub__(self, other):
-        return Point(*(s - o for s, o in zip(self.dims, other.dims)))
 
-    def __neg__(self):
-        return Point(*(-d for d in self.dims))
-    
-    def __mul__(self, other):
-        return Point(*(s * o for s, o in zip(self.dims, other.dims)))
+def orientations(points):
+    """Every rotation of points at once, indexed [rotation, point, axis]"""
+    return np.einsum('rij,nj->rni', ROTATIONS, points)
 
-    def __eq__(self, other):
-        return self.tuple == other.tuple
 
-    def __lt__(self, other):
-        return self.tuple < other.tuple
+def fingerprints(points):
+    """
+    The beacon pairs of a scanner keyed by their sorted absolute deltas,
+    which are the same however the scanner is turned.  Each key is packed
+    into an int, KEY_BITS bits per delta, as are the beacons of its pair.
+    """
+    i, j = np.triu_indices(len(points), 1)
+    deltas = np.sort(np.abs(points[j] - points[i]), axis=1)
+    keys = (deltas[:, 0] << (2 * KEY_BITS)) | (deltas[:, 1] << KEY_BITS) | deltas[:, 2]
+    return keys, i, j
 
-    def __str__(self):
-        return "({})".format(",".join(str(d) for d in self.dims))
 
-    def __repr__(self):
-        return "Point({})".format(",".join(str(d) for d in self.dims))
+class FingerprintIndex(object):
+    """
+    Beacon pair fingerprints of every scanner, sorted together so that the
+    scanners sharing a fingerprint sit next to each other.  Scanners sharing
+    enough of them are candidates for overlapping, found by that one join
+    rather than by comparing every pair of scanners.
+    """
+    def __init__(self, scanners):
+        self.pairs = []
+        keys = []
+        owners = []
+        for s, points in enumerate(scanners):
+            key, i, j = fingerprints(points)
+            self.pairs.append(self.unique_pairs(key, i, j))
+            key = np.unique(key)
+            keys.append(key)
+            owners.append(np.full(len(key), s))
+        keys = np.concatenate(keys)
+        owners = np.concatenate(owners)
+        order = np.argsort(keys, kind='stable')
+        keys, owners = keys[order], owners[order]
+        # Where the run of each key ends, to pair every owner with the ones
+        # after it in the same run
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        ends = np.repeat(np.append(bounds, len(keys)), np.diff(np.concatenate(([0], bounds, [len(keys)]))))
+        positions = np.arange(len(keys))
+        count = len(scanners)
+        shared = []
+        step = 1
+        while True:
+            positions = positions[positions + step < ends[positions]]
+            if not len(positions):
+                break
+            shared.append(owners[positions] * count + owners[positions + step])
+            step += 1
+        self.candidates = defaultdict(set)
+        if shared:
+            pairs, counts = np.unique(np.concatenate(shared), return_counts=True)
+            for pair in pairs[counts >= MATCHING_PAIRS].tolist():
+                s, t = divmod(pair, count)
+                self.candidates[s].add(t)
+                self.candidates[t].add(s)
 
     @staticmethod
-    def range3(start, end):
-        for x in range(start.x, end.x + 1):
-            for y in range(start.y, end.y + 1):
-                for z in range(start.z, end.z + 1):
-                    yield Point(x, y, z)
-
-
-class RelativePoint(object):
-    def __init__(self, source, dest):
-        self.source = source
-        self.rel = dest - source
-        self.abs_rel = tuple(sorted(abs(v) for v in self.rel.tuple))
-
-    @property
-    def dest(self):
-        return self.rel + self.source
-
-    def __str__(self):
-        return 'RP{}->{}={}'.format(self.source, self.dest, self.rel)
-
-    def __repr__(self):
-        return str(self)
-
-
-class RelativeMap(object):
-    def __init__(self, source, points):
-        self.source = source
-        self.pmap = {}
-        self.rmap = {}
-        self.set = set()
-        for p in points:
-            if p == source:
-                continue
-            rel_point = RelativePoint(source, p)
-            self.pmap[p] = rel_point
-            self.rmap.setdefault(rel_point.abs_rel, []).append(rel_point)
-            self.set.add(rel_point.abs_rel)
-
-    def __str__(self):
-        return 'RM{}'.format(self.source)
-
-    def __repr__(self):
-        return str(self)
-
+    def unique_pairs(keys, i, j):
+        """The beacon pair of every key found once in a scanner, by key"""
+        _, index, counts = np.unique(keys, return_index=True, return_counts=True)
+        once = index[counts == 1]
+        return dict(zip(keys[once].tolist(), zip(i[once].tolist(), j[once].tolist())))
 
-def make_rel_map(data_set):
-    maps = {}
-    for p in data_set:
-        maps[p] = RelativeMap(p, data_set)
-    return maps
+    def matches(self, s, t):
+        """Arrays of the beacons a, b of s and c, d of t paired by a shared fingerprint"""
+        pairs_s, pairs_t = self.pairs[s], self.pairs[t]
+        found = [pairs_s[key] + pairs_t[key] for key in pairs_s.keys() & pairs_t.keys()]
+        return np.array(found, dtype=np.int64).reshape(-1, 4).T
 
 
-class ScannerMap(object):
-    def __init__(self, points):
-        self.points = points
-        self._relmap = None
-    
-    @property
-    def relmap(self):
-        if not self._relmap:
-            self._relmap = make_rel_map(self.points)
-        return self._relmap
-
-    def reorient(self, info):
-        for i, p in enumerate(self.points):
-            self.points[i] = reorient(p, info)
-        self._relmap = None
-
-
-def reorient(p, info):
-    new_p = Point(0, 0, 0)
-    for i, (sign, other_i) in enumerate(info):
-        new_p.dims[other_i] = p.dims[i] * sign
-    return new_p
-
-
-def find_point_reorientation(rp0, rp1):
-    """
-    Create info to reorient rp1 (RelativePoint1) to rp0
-    """
-    if len(rp0) > 1:
-        raise Exception('rp0 not unique!')
-    if len(rp1) > 1:
-        raise Exception('rp1 not unique!')
-    if len(Counter(rp0[0].abs_rel)) != 3:
-        raise Exception('orientation not unique!')
-    r0 = rp0[0].rel
-    r1 = rp1[0].rel
-    abs_r0 = [abs(v) for v in r0.dims]
-    abs_r1 = [abs(v) for v in r1.dims]
-    info = []
-    for i, v in enumerate(abs_r1):
-        other_i = abs_r0.index(v)
-        sign = 1 if r1[i] == r0[other_i] else -1
-        info.append((sign, other_i))
-    offset = rp0[0].source - reorient(rp1[0].source, info)
-    return info, offset
-
-
-def find_scanner_reorientation(s0, s1, similar):
+def align(index, known, points, s, t):
     """
-    Create info to reorient s1 (Scanner1) to s0
+    The rotation and position of scanner t given the beacons of scanner s
+    already placed as known, None if they do not overlap.  Every matching
+    beacon pair votes for the rotations that turn its delta in t into its
+    delta in s, and the winner has to line up enough beacons.
     """
-    for p0, p1, similarity in similar:
-        for rel in similarity:
-            try:
-                return find_point_reorientation(s0.relmap[p0].rmap[rel], s1.relmap[p1].rmap[rel])
-            except Exception as e:
-                print(e)
-                pass
-    raise Exception('No valid similarity found!')
-
-
-def find_similarity(m0, m1):
-    similar = []
-    for p0 in m0:
-        for p1 in m1:
-            similarity = m0[p0].set.intersection(m1[p1].set)
-            if len(similarity) > 10:
-                similar.append((p0, p1, similarity))
-                #print(p0, p1, len(similarity))
-    if len(similar) < 12:
-        return None
-    return similar
+    oriented = orientations(points)
+    a, b, c, d = index.matches(s, t)
+    delta = known[b] - known[a]
+    turned = oriented[:, d] - oriented[:, c]
+    votes = []
+    # The pair may come the other way round in t
+    for sign, first in ((1, c), (-1, d)):
+        r, m = np.nonzero((turned == sign * delta).all(axis=2))
+        votes.append(np.column_stack((r, known[a[m]] - oriented[r, first[m]])))
+    votes, counts = np.unique(np.concatenate(votes), axis=0, return_counts=True)
+    beacons = set(map(tuple, known.tolist()))
+    for vote in votes[np.argsort(-counts, kind='stable')]:
+        r, offset = vote[0], vote[1:]
+        placed = oriented[r] + offset
+        if sum(p in beacons for p in map(tuple, placed.tolist())) >= MATCHING_BEACONS:
+            return r, offset
+    return None
+
+
+def rotation_info(m):
+    """(sign, axis) for each axis, where the rotation sends it"""
+    return [(int(m[:, i].sum()), int(np.flatnonzero(m[:, i])[0])) for i in range(3)]
+
+
+def format_point(p):
+    return "({})".format(",".join(str(d) for d in p.tolist()))
 
 
 def part1(fname):
     data = read_file(fname)
-    scanners = [ScannerMap(points) for points in data]
-    location = [None] * len(scanners)
-    location[0] = Point(0, 0, 0)
-    unknown = {i for i in range(len(scanners))}
+    index = FingerprintIndex(data)
+    location = [None] * len(data)
+    location[0] = np.zeros(3, dtype=np.int64)
+    # Beacons of every placed scanner, turned and moved to scanner 0's frame
+    placed = [None] * len(data)
+    placed[0] = data[0]
+    unknown = {i for i in range(len(data))}
     # Keying everything of scanner0
     unknown.remove(0)
     to_process = [0]
     while to_process:
         cur = to_process.pop()
         found = []
-        for i in unknown:
-            similar = find_similarity(scanners[cur].relmap, scanners[i].relmap)
-            if not similar:
+        for i in sorted(unknown & index.candidates[cur]):
+            aligned = align(index, placed[cur], data[i], cur, i)
+            if aligned is None:
                 continue
-            info, offset = find_scanner_reorientation(scanners[cur], scanners[i], similar)
-            loc = offset + location[cur]
-            print(cur, i, info, offset, loc)
+            r, loc = aligned
+            offset = loc - location[cur]
+            print(cur, i, rotation_info(ROTATIONS[r]), format_point(offset), format_point(loc))
             location[i] = loc
-            scanners[i].reorient(info)
+            placed[i] = data[i] @ ROTATIONS[r].T + loc
             found.append(i)
         to_process.extend(found)
         unknown.difference_update(found)
-    beacons = set()
-    for scanner, loc in zip(scanners, location):
-        for point in scanner.points:
-            beacons.add(point + loc)
+    beacons = np.unique(np.vstack([p for p in placed if p is not None]), axis=0)
     print(len(beacons))
-    return location
+    return [loc for loc in location if loc is not None]
 
 
 def part2(scanner_locs):
-    print(max(p0.dist(p1) for p0, p1 in combinations(scanner_locs, 2)))
+    locs = np.array(scanner_locs)
+    print(np.abs(locs[:, None] - locs[None, :]).sum(axis=2).max())
 
 
 def main():
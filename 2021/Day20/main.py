@@ -1,82 +1,109 @@
-import sys
-import heapq
+import argparse
+
+import numpy as np
 
 
 def read_file(path):
     with open(path, "r") as f:
         algo = f.readline().strip()
         f.readline()
-        return algo, Image([s.strip() for s in f])
+        return algo, Image([s.strip() for s in f if s.strip()])
+
+
+def lookup(algo):
+    """The algorithm as a table from 9 bit neighbourhood to pixel"""
+    return np.array([c == '#' for c in algo], dtype=np.uint8)
 
 
 class Image(object):
+    """
+    The pixels as a uint8 plane, 1 for lit, with every pixel beyond it the
+    default, lit or not.
+    """
     def __init__(self, rows, default='.'):
-        self.default = default
-        self.rows = []
-        for row in rows:
-            self.rows.append(list(row))
+        self.default = int(default == '#')
+        self.pixels = np.array([[c == '#' for c in row] for row in rows], dtype=np.uint8)
+
+    @staticmethod
+    def from_pixels(pixels, default):
+        image = Image([])
+        image.pixels = pixels
+        image.default = int(default)
+        return image
 
     @property
     def width(self):
-        return len(self.rows[0])
+        return self.pixels.shape[1]
 
     @property
     def height(self):
-        return len(self.rows)
-
-    def valueof(self, px, py):
-        v = 0
-        #print(px, py, end=' ')
-        for y in range(py-1, py+2):
-            for x in range(px-1, px+2):
-                c = self.getxy(x, y, self.default)
-                #print(c, end='')
-                v <<= 1
-                if c == '#':
-                    v += 1
-        #print('\n', v)
-        return v
-
-    def getxy(self, x, y, default):
-        if x < 0 or y < 0 or x >= self.width or y >= self.height:
-            return default
-        return self.rows[y][x]
+        return self.pixels.shape[0]
+
+    def trimmed(self):
+        """
+        The image without the rows and columns round the edge that are all
+        background, so the canvas only grows as far as the picture does.
+        """
+        differs = self.pixels != self.default
+        rows = np.flatnonzero(differs.any(axis=1))
+        cols = np.flatnonzero(differs.any(axis=0))
+        if not len(rows):
+            return Image.from_pixels(self.pixels[:0, :0], self.default)
+        pixels = self.pixels[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        return Image.from_pixels(pixels, self.default)
+
+    def lit(self):
+        """How many pixels are lit, infinitely many when the background is"""
+        if self.default:
+            return float('inf')
+        return int(self.pixels.sum())
 
     def __str__(self):
-        return '\n'.join(''.join(str(v) for v in row) for row in self.rows)
+        return '\n'.join(''.join('#' if v else '.' for v in row) for row in self.pixels.tolist())
+
 
-    def values(self):
-        for x in range(0, self.width):
-            for y in range(0, self.height):
-                yield self.rows[y][x]
+def enhance(image, lut):
+    """
+    One round over the whole image at once.  With two pixels of background
+    round it, shifts along each row give the 3 bits of every row of the
+    windows and shifts down the columns put three of those together into
+    the 9 bit index, for the image and a pixel round it.  Out beyond that
+    the background turns into lut[0] or lut[511] everywhere at once.
+    """
+    p = np.pad(image.pixels, 2, constant_values=image.default).astype(np.uint16)
+    rows = (p[:, :-2] << 2) | (p[:, 1:-1] << 1) | p[:, 2:]
+    index = (rows[:-2] << 6) | (rows[1:-1] << 3) | rows[2:]
+    default = lut[511 if image.default else 0]
+    return Image.from_pixels(lut[index], default).trimmed()
 
 
-def enhance(image, algo):
-    rows = []
-    for y in range(-1, image.height + 1):
-        row = []
-        for x in range(-1, image.width + 1):
-            row.append(algo[image.valueof(x, y)])
-        rows.append(row)
-    default = algo[image.valueof(-3, -3)]
-    return Image(rows, default)
+def run(fname, rounds):
+    algo, image = read_file(fname)
+    lut = lookup(algo)
+    for _ in range(rounds):
+        image = enhance(image, lut)
+    return image
 
 
 def part1(fname):
-    algo, image = read_file(fname)
-    for _ in range(2):
-        #print(image)
-        image = enhance(image, algo)
-    print(sum(1 if v == '#' else 0 for v in image.values()))
+    print(run(fname, 2).lit())
 
 
 def part2(fname):
-    algo, image = read_file(fname)
-    for _ in range(50):
-        image = enhance(image, algo)
-    print(sum(1 if v == '#' else 0 for v in image.values()))
+    print(run(fname, 50).lit())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    parser.add_argument('--rounds', type=int, help='also count the lit pixels after this many rounds')
+    args = parser.parse_args()
+    part1(args.path)
+    part2(args.path)
+    if args.rounds is not None:
+        image = run(args.path, args.rounds)
+        print(image.width, image.height, image.lit())
 
 
 if __name__ == "__main__":
-    part1(sys.argv[1])
-    part2(sys.argv[1])
+    main()
@@ -0,0 +1,193 @@
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common import search
+
+
+KINDS = 'ABCD'
+HOMES = {kind: i for i, kind in enumerate(KINDS)}
+COSTS = {'A': 1, 'B': 10, 'C': 100, 'D': 1000}
+EMPTY = '.'
+
+# The rows part 2 unfolds between the first and last rows of the rooms
+UNFOLDED = [
+    '  #D#C#B#A#',
+    '  #D#B#A#C#',
+]
+
+
+def read_file(fname):
+    with open(fname, 'r') as f:
+        return f.read().splitlines()
+
+
+def unfold(lines):
+    return lines[:3] + UNFOLDED + lines[3:]
+
+
+class Burrow(object):
+    """
+    The shape of a burrow, its hallway width and room depth, and the moves
+    between its states.  A state is a string of the hallway from left to
+    right and then each room from top to bottom, '.' for an empty space, so
+    states can be hashed and compared as they are.
+    """
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.doors = [2 * (i + 1) for i in range(len(KINDS))]
+        self.stops = [x for x in range(width) if x not in self.doors]
+        self.goal = EMPTY * width + ''.join(kind * depth for kind in KINDS)
+
+    @staticmethod
+    def from_lines(lines):
+        """The burrow and its state, with however many rows the rooms have"""
+        hallway = lines[1][1:-1]
+        rows = [line for line in lines[2:] if line.strip('# ')]
+        burrow = Burrow(len(hallway), len(rows))
+        rooms = ''.join(row[(i * 2) + 3] for i in range(len(KINDS)) for row in rows)
+        return burrow, hallway + rooms
+
+    def room(self, home):
+        """Where the room of the home'th kind starts in a state"""
+        return self.width + home * self.depth
+
+    def open_slot(self, state, home):
+        """
+        The slot an amphipod goes to in its room, -1 if the room is full and
+        None while something else is still in it.
+        """
+        start = self.room(home)
+        room = state[start:start + self.depth]
+        filled = room.lstrip(EMPTY)
+        if filled.count(KINDS[home]) != len(filled):
+            return None
+        return len(room) - len(filled) - 1
+
+    def clear(self, state, a, b):
+        """Whether the hallway is empty from a to b, both included"""
+        if a > b:
+            a, b = b, a
+        return state.count(EMPTY, a, b + 1) == b - a + 1
+
+    @staticmethod
+    def moved(state, src, dst):
+        cells = list(state)
+        cells[dst] = cells[src]
+        cells[src] = EMPTY
+        return ''.join(cells)
+
+    def neighbors(self, state):
+        """
+        The states one move away and the energy each takes.  Going straight
+        home is never worse than anything else, so when an amphipod can
+        that is the only move given.
+        """
+        moves = []
+        for x in range(self.width):
+            kind = state[x]
+            if kind == EMPTY:
+                continue
+            home = HOMES[kind]
+            slot = self.open_slot(state, home)
+            door = self.doors[home]
+            step = 1 if door > x else -1
+            if slot is not None and slot >= 0 and self.clear(state, x + step, door):
+                steps = abs(door - x) + slot + 1
+                return [(self.moved(state, x, self.room(home) + slot), steps * COSTS[kind])]
+
+        for i, door in enumerate(self.doors):
+            start = self.room(i)
+            room = state[start:start + self.depth]
+            top = len(room) - len(room.lstrip(EMPTY))
+            if top == self.depth or room[top:].count(KINDS[i]) == self.depth - top:
+                # Empty, or only ones that are home
+                continue
+            kind = room[top]
+            cost = COSTS[kind]
+            home = HOMES[kind]
+            if home != i:
+                slot = self.open_slot(state, home)
+                if slot is not None and slot >= 0 and self.clear(state, door, self.doors[home]):
+                    steps = top + 1 + abs(self.doors[home] - door) + slot + 1
+                    return [(self.moved(state, start + top, self.room(home) + slot), steps * cost)]
+            for x in self.stops:
+                if self.clear(state, door, x):
+                    steps = top + 1 + abs(x - door)
+                    moves.append((self.moved(state, start + top, x), steps * cost))
+        return moves
+
+    def heuristic(self, state):
+        """
+        The energy to get every amphipod home if they could go through each
+        other, which is never more than it really takes.
+        """
+        total = 0
+        entering = [0] * len(KINDS)
+        for x in range(self.width):
+            kind = state[x]
+            if kind != EMPTY:
+                home = HOMES[kind]
+                total += (abs(x - self.doors[home]) + 1) * COSTS[kind]
+                entering[home] += 1
+        for i, door in enumerate(self.doors):
+            start = self.room(i)
+            room = state[start:start + self.depth]
+            settled = len(room) - len(room.rstrip(KINDS[i]))
+            for slot, kind in enumerate(room[:self.depth - settled]):
+                if kind == EMPTY:
+                    continue
+                home = HOMES[kind]
+                # Out of the room, along the hallway, at least out of the way
+                # and back when it is in its own room, and into the top slot
+                along = max(abs(self.doors[home] - door), 2)
+                total += (slot + 1 + along + 1) * COSTS[kind]
+                entering[home] += 1
+        # Those coming in go on down to the slots below the top
+        for home, count in enumerate(entering):
+            total += count * (count - 1) // 2 * COSTS[KINDS[home]]
+        return total
+
+    def format(self, state):
+        lines = []
+        lines.append('#' * (self.width + 2))
+        lines.append('#{}#'.format(state[:self.width]))
+        for slot in range(self.depth):
+            cells = '#'.join(state[self.room(i) + slot] for i in range(len(KINDS)))
+            if slot == 0:
+                lines.append('###{}###'.format(cells))
+            else:
+                lines.append('  #{}#'.format(cells))
+        lines.append('  #########')
+        return '\n'.join(lines)
+
+
+def solve(lines):
+    burrow, state = Burrow.from_lines(lines)
+    result = search.astar([state], burrow.neighbors, burrow.heuristic, goal=lambda s: s == burrow.goal, predecessors=True)
+    if result.cost is None:
+        print(burrow.format(state))
+        print('No way to sort the amphipods')
+        return
+    for s in result.path():
+        print(burrow.format(s))
+    print(result.cost)
+
+
+def part1(fname):
+    solve(read_file(fname))
+
+
+def part2(fname):
+    solve(unfold(read_file(fname)))
+
+
+if __name__ == "__main__":
+    part1(sys.argv[1])
+    part2(sys.argv[1])
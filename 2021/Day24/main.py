@@ -1,153 +1,319 @@
 import re
+import sys
 from collections import deque
 
 
+REGS = 'wxyz'
+# Bounds standing in for an unknown register value in the interval analysis
+UNBOUNDED = (-(1 << 64), 1 << 64)
+
+
 def read_file(fname):
-    progs = []
     with open(fname, 'r') as f:
-        for lineno, line in enumerate(f):
-            if lineno % 18 == 0:
-                prog = []
-                progs.append(prog)
-            prog.append(line)
-    return progs
+        return [line for line in f if line.strip()]
 
 
-class Processor(object):
-    REGEXP = re.compile(r'(\w{3}) +([w-z]) ?([w-z]|-?\d+)?')
-    REGS = {'w', 'x', 'y', 'z'}
+REGEXP = re.compile(r'(\w{3}) +([w-z]) ?([w-z]|-?\d+)?')
 
-    def __init__(self, input_='', state=None):
-        if state:
-            self.state = dict(state)
+
+def decode(lines):
+    """
+    Instructions as (op, a, b, b_is_reg) tuples, a the index of a register
+    and b the index of one or a number.
+    """
+    prog = []
+    for line in lines:
+        op, a, b = REGEXP.match(line).groups()
+        if b is None:
+            prog.append((op, REGS.index(a), None, False))
+        elif b in REGS:
+            prog.append((op, REGS.index(a), REGS.index(b), True))
         else:
-            self.state = {reg: 0 for reg in self.REGS}
-        self.input = deque(input_)
-        self.debug = False
-    
-    def __getitem__(self, key):
-        return self.state[key]
+            prog.append((op, REGS.index(a), int(b), False))
+    return prog
 
-    def getstate(self):
-        return dict(self.state)
 
-    def reset(self):
-        self.state = {reg: 0 for reg in self.REGS}
+def split_blocks(prog):
+    """The program cut before every inp, one block per digit"""
+    if not prog or prog[0][0] != 'inp':
+        raise Exception('Program does not start with inp')
+    blocks = []
+    for insn in prog:
+        if insn[0] == 'inp':
+            blocks.append([])
+        blocks[-1].append(insn)
+    return blocks
 
-    def getval(self, name_or_val):
-        if name_or_val in self.state:
-            return self.state[name_or_val]
-        elif name_or_val is None:
-            return None
-        return int(name_or_val)
-    
-    def inp(self, a, b=None):
-        self.state[a] = int(self.input.popleft())
 
-    def add(self, a, b):
-        self.state[a] += self.getval(b)
+class InvalidState(Exception):
+    """A div by 0 or mod the ALU cannot do, the model number is not valid"""
+    pass
 
-    def mul(self, a, b):
-        self.state[a] *= self.getval(b)
 
-    def div(self, a, b):
-        self.state[a] //= self.getval(b)
+def alu_div(a, b):
+    if b == 0:
+        raise InvalidState()
+    # Rounds towards zero
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b > 0) else -q
 
-    def mod(self, a, b):
-        self.state[a] %= self.getval(b)
 
-    def eql(self, a, b):
-        self.state[a] = int(self.state[a] == self.getval(b))
+def alu_mod(a, b):
+    if a < 0 or b <= 0:
+        raise InvalidState()
+    return a % b
 
-    def decode(self, line):
-        m = self.REGEXP.match(line)
-        if self.debug:
-            print(m.groups())
-        return m.group(1), m.group(2), m.group(3)
 
-    def run(self, prog, input_=None, state=None):
-        if state:
-            self.state = dict(state)
+class Processor(object):
+    """Runs decoded instructions one at a time"""
+    def __init__(self, input_=''):
+        self.state = [0] * len(REGS)
+        self.input = deque(input_)
+
+    def __getitem__(self, key):
+        return self.state[REGS.index(key)]
+
+    def reset(self):
+        self.state = [0] * len(REGS)
+
+    def run(self, prog, input_=None):
         if input_:
             self.input = deque(input_)
-        for line in prog:
-            if not line.strip():
+        state = self.state
+        for op, a, b, b_is_reg in prog:
+            if op == 'inp':
+                state[a] = int(self.input.popleft())
                 continue
-            op, a, b = self.decode(line)
-            getattr(self, op)(a, b)
-            if self.debug:
-                print(self.state)
-
-
-def filter_states(outputs):
-    for z, inputs in outputs.items():
-        outputs[z] = max(inputs)
-    return outputs
-
-
-class RecursiveRunner(object):
-    def __init__(self, proc, progs):
-        self.proc = proc
-        self.progs = progs
-        self.end_idx = None
-        self.outputs = {}
-        self.reverse = False
-
-    def run(self, prog_idx, init_state, inputs):
-        values = range(1, 10)
-        if self.reverse:
-            values = reversed(values)
-        for i in values:
-            inputs.append(i)
-            self.proc.run(self.progs[prog_idx], str(i), init_state)
-            if prog_idx != self.end_idx:
-                self.run(prog_idx + 1, self.proc.getstate(), inputs)
-            elif self.proc.state['x'] == 0:
-                # x is the condition that determines whether or not to increase z
-                self.outputs.setdefault(self.proc.state['z'], tuple(inputs))
-            #if inputs == [9, 9, 2, 9]:
-            #    print(inputs, self.proc.state)
-            #    exit()
-
-            inputs.pop()
-    
-    def run_outputs(self, start_idx, end_idx, outputs):
-        self.outputs = {}
-        self.end_idx = end_idx
-        self.proc.reset()
-        init_state = self.proc.getstate()
-        for zval, inputs in outputs.items():
-            init_state['z'] = zval
-            self.run(start_idx, init_state, list(inputs))
-        return self.outputs
-
-
-def is_inflection(prog):
-    op, a, b = Processor().decode(prog[4])
-    assert(op == 'div')
-    assert(a == 'z')
-    return b != '1'
-
-
-def find_solution(largest=True):
-    progs = read_file('input.txt')
+            value = state[b] if b_is_reg else b
+            if op == 'add':
+                state[a] += value
+            elif op == 'mul':
+                state[a] *= value
+            elif op == 'div':
+                state[a] = alu_div(state[a], value)
+            elif op == 'mod':
+                state[a] = alu_mod(state[a], value)
+            elif op == 'eql':
+                state[a] = int(state[a] == value)
+
+
+def compile_block(block):
+    """
+    A block as a Python function of its digit and the registers before it,
+    returning the registers after it.
+    """
+    lines = ['def block(digit, w, x, y, z):']
+    for op, a, b, b_is_reg in block:
+        a = REGS[a]
+        value = REGS[b] if b_is_reg else b
+        if op == 'inp':
+            lines.append(f'    {a} = digit')
+        elif op == 'add':
+            if value != 0:
+                lines.append(f'    {a} += {value}')
+        elif op == 'mul':
+            if value == 0:
+                lines.append(f'    {a} = 0')
+            elif value != 1:
+                lines.append(f'    {a} *= {value}')
+        elif op == 'div':
+            if b_is_reg or value <= 0:
+                lines.append(f'    {a} = alu_div({a}, {value})')
+            elif value != 1:
+                lines.append(f'    {a} = {a} // {value} if {a} >= 0 else -(-{a} // {value})')
+        elif op == 'mod':
+            if b_is_reg or value <= 0:
+                lines.append(f'    {a} = alu_mod({a}, {value})')
+            else:
+                lines.append(f'    if {a} < 0:')
+                lines.append(f'        raise InvalidState()')
+                lines.append(f'    {a} %= {value}')
+        elif op == 'eql':
+            lines.append(f'    {a} = int({a} == {value})')
+    lines.append('    return w, x, y, z')
+    namespace = {'alu_div': alu_div, 'alu_mod': alu_mod, 'InvalidState': InvalidState}
+    exec('\n'.join(lines), namespace)
+    return namespace['block']
+
+
+def live_registers(blocks):
+    """
+    For each block the registers whose values coming in can matter to it or
+    to any block after it.
+    """
+    live = set()
+    result = []
+    for block in reversed(blocks):
+        written = set()
+        used = set()
+        for op, a, b, b_is_reg in block:
+            reads = set()
+            if b_is_reg:
+                reads.add(b)
+            # Everything but inp and mul by 0 depends on a too
+            if op != 'inp' and not (op == 'mul' and not b_is_reg and b == 0):
+                reads.add(a)
+            used |= reads - written
+            written.add(a)
+        live = used | (live - written)
+        result.append(live)
+    result.reverse()
+    return result
+
+
+def interval_div(a, b):
+    lo, hi = b
+    divisors = [d for d in (lo, hi, -1, 1) if lo <= d <= hi and d != 0]
+    if not divisors:
+        return None
+    quotients = [alu_div(n, d) for n in a for d in divisors]
+    return min(quotients), max(quotients)
+
+
+def interval_mod(a, b):
+    # Only the part the ALU can take, a >= 0 and b > 0
+    lo, hi = max(a[0], 0), a[1]
+    blo, bhi = max(b[0], 1), b[1]
+    if hi < lo or bhi < blo:
+        return None
+    if blo == bhi and hi < blo:
+        return lo, hi
+    return 0, min(hi, bhi - 1)
+
+
+def run_intervals(block, state):
+    """
+    The ranges the registers can end up in after a block, given the ranges
+    they start in and any digit.  None if the block cannot get through.
+    """
+    state = list(state)
+    for op, a, b, b_is_reg in block:
+        if op == 'inp':
+            state[a] = (1, 9)
+            continue
+        x = state[a]
+        y = state[b] if b_is_reg else (b, b)
+        if op == 'add':
+            state[a] = (x[0] + y[0], x[1] + y[1])
+        elif op == 'mul':
+            products = [i * j for i in x for j in y]
+            state[a] = (min(products), max(products))
+        elif op == 'div':
+            state[a] = interval_div(x, y)
+        elif op == 'mod':
+            state[a] = interval_mod(x, y)
+        elif op == 'eql':
+            if x[0] == x[1] == y[0] == y[1]:
+                state[a] = (1, 1)
+            elif x[1] < y[0] or y[1] < x[0]:
+                state[a] = (0, 0)
+            else:
+                state[a] = (0, 1)
+        if state[a] is None:
+            return None
+    return state
+
+
+def z_bounds(blocks, live):
+    """
+    For each block the range z has to start in for z to be able to end up
+    0, found backwards by bisecting on the interval analysis: z above the
+    upper bound, or below the lower, can only come out of the block past
+    the bounds of the next one.
+    """
+    z = REGS.index('z')
+    bounds = [None] * (len(blocks) + 1)
+    bounds[-1] = (0, 0)
+    for i in reversed(range(len(blocks))):
+        lo_next, hi_next = bounds[i + 1]
+
+        def outside(z_range):
+            state = [UNBOUNDED if r in live[i] else (0, 0) for r in range(len(REGS))]
+            state[z] = z_range
+            out = run_intervals(blocks[i], state)
+            return out is None or out[z][0] > hi_next or out[z][1] < lo_next
+
+        # The smallest hi with everything above it ruled out
+        lo, hi = 0, UNBOUNDED[1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if outside((mid + 1, UNBOUNDED[1])):
+                hi = mid
+            else:
+                lo = mid + 1
+        upper = lo
+        # And the largest lo with everything below it ruled out
+        lo, hi = UNBOUNDED[0], 0
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if outside((UNBOUNDED[0], mid - 1)):
+                lo = mid
+            else:
+                hi = mid - 1
+        bounds[i] = (lo, upper)
+    return bounds
+
+
+class Monad(object):
+    """
+    The program compiled one block per digit, searched for model numbers by
+    what each block leaves behind: the best digits for the rest of the
+    number only depend on the block reached and the registers still live,
+    which for MONAD is z alone, so they are remembered by that.
+    """
+    def __init__(self, prog):
+        self.blocks = split_blocks(prog)
+        self.functions = [compile_block(block) for block in self.blocks]
+        self.live = live_registers(self.blocks) + [set(range(len(REGS)))]
+        self.bounds = z_bounds(self.blocks, self.live)
+
+    def find(self, largest=True):
+        digits = range(9, 0, -1) if largest else range(1, 10)
+        functions = self.functions
+        bounds = self.bounds
+        live = self.live
+        z = REGS.index('z')
+        last = len(functions)
+        memo = {}
+
+        def best(i, state):
+            if i == last:
+                return '' if state[z] == 0 else None
+            lo, hi = bounds[i]
+            if not lo <= state[z] <= hi:
+                return None
+            key = (i,) + tuple(v for r, v in enumerate(state) if r in live[i])
+            if key in memo:
+                return memo[key]
+            result = None
+            for digit in digits:
+                try:
+                    after = functions[i](digit, *state)
+                except InvalidState:
+                    continue
+                suffix = best(i + 1, after)
+                if suffix is not None:
+                    result = str(digit) + suffix
+                    break
+            memo[key] = result
+            return result
+
+        return best(0, (0, 0, 0, 0))
+
+
+def find_solution(fname, largest=True):
+    prog = decode(read_file(fname))
+    number = Monad(prog).find(largest)
+    if number is None:
+        print('No valid model number')
+        return
+    # Check it on the ALU itself
     p = Processor()
-    rr = RecursiveRunner(p, progs)
-    rr.reverse = largest
-    inflection_pairs = []
-    start = 0
-    for i, prog in enumerate(progs):
-        if is_inflection(prog):
-            inflection_pairs.append((start, i))
-            start = i + 1
-    #print(inflection_pairs)
-    outputs = {0: []}
-    for start, end in inflection_pairs:
-        outputs = rr.run_outputs(start, end, outputs)
-    #filter_states(rr.outputs)
-    print(''.join(str(d) for d in outputs[0]))
+    p.run(prog, number)
+    assert p['z'] == 0
+    print(number)
 
 
 if __name__ == "__main__":
-    #find_solution()
-    find_solution(False)
+    find_solution(sys.argv[1])
+    find_solution(sys.argv[1], False)
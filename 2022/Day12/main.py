@@ -1,7 +1,16 @@
 #!/usr/bin/env python3
 import argparse
+from pathlib import Path
 import re
-import heapq
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common import search
 
 parser = argparse.ArgumentParser()
 parser.add_argument("input")
@@ -127,33 +136,22 @@ class Point(object):
         return abs(self.x - x) + abs(self.y - y)
 
 
-def dijkstra(g, start, end):
-    inf = float('inf')
-    dist = 1  #  all costs are 1 in this problem
-    visited = set()
-    costs = { start: 0 }
-    path = { start: None }
-    to_visit = [(0, start)]
-    heapq.heapify(to_visit)
-
-    while True:
-        path_cost, source = heapq.heappop(to_visit)
-        visited.add(source)
-        if source == end:
-            break
-        for neighbor in g.adjacent(source):
-            if neighbor in visited:
-                continue
-            new_cost = costs[source] + dist
-            old_cost = costs.get(neighbor, inf)
-            if new_cost < old_cost:
-                heapq.heappush(to_visit, (new_cost, neighbor))
-                costs[neighbor] = new_cost
-                path[neighbor] = source
-
-    # return the path cost of the best path to the destination
-    # if we wanted the actual path, we would walk path nodes from the dest to the source
-    return costs[end]
+def dijkstra(g, starts, end):
+    # Cells are numbered row by row, every step costs 1
+    width = g.width
+    heights = [v for row in g.values for v in row]
+    size = len(heights)
+
+    def neighbors(i):
+        limit = heights[i] + 1
+        x = i % width
+        for n, ok in ((i + 1, x + 1 < width), (i + width, i + width < size), (i - 1, x > 0), (i - width, i >= width)):
+            if ok and heights[n] <= limit:
+                yield n, 1
+
+    target = end.y * width + end.x
+    result = search.zero_one_bfs([p.y * width + p.x for p in starts], neighbors, size, goal=lambda i: i == target)
+    return result.cost
 
 
 def build_grid(data):
@@ -176,7 +174,7 @@ def build_grid(data):
 
 def part1(data):
     g, start, end = build_grid(data)
-    cost = dijkstra(g, start, end)
+    cost = dijkstra(g, [start], end)
     print(cost)
 
 
@@ -192,13 +190,8 @@ def part2(fname):
             if g[adj] == a:
                 starts.add(adj)
     
-    best = 0xFFFFFFFF
-    for start in starts:
-        solution = dijkstra(g, start, end)
-        if solution < best:
-            best = solution
-
-    print(best)
+    # Searching from every start at once finds the nearest one
+    print(dijkstra(g, starts, end))
 
 
 data = load(args)
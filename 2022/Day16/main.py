@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 import argparse
-import re
-import heapq
 from itertools import combinations, permutations
+from pathlib import Path
+import re
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common import search
 
 parser = argparse.ArgumentParser()
 parser.add_argument("input")
@@ -24,30 +33,8 @@ def load(path):
         
 
 def dijkstra(g, start):
-    inf = float('inf')
-    dist = 1  #  all costs are 1 in this problem
-    visited = set()
-    costs = { start: 0 }
-    path = { start: None }
-    to_visit = [(0, start)]
-    heapq.heapify(to_visit)
-
-    while len(to_visit) > 0:
-        path_cost, source = heapq.heappop(to_visit)
-        visited.add(source)
-        for neighbor in g[source]:
-            if neighbor in visited:
-                continue
-            new_cost = costs[source] + dist
-            old_cost = costs.get(neighbor, inf)
-            if new_cost < old_cost:
-                heapq.heappush(to_visit, (new_cost, neighbor))
-                costs[neighbor] = new_cost
-                path[neighbor] = source
-
-    # return the path cost of the best path to the destination
-    # if we wanted the actual path, we would walk path nodes from the dest to the source
-    return costs
+    """The cost of reaching every valve from start, every tunnel costs 1"""
+    return search.zero_one_bfs([start], lambda valve: ((n, 1) for n in g[valve])).dist
 
 
 class part1(object):
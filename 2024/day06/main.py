@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common.pool import Pool
 
 
 def load(path):
@@ -171,57 +181,118 @@ def part1(path):
     print(len(positions))
 
 
+# N, E, S, W as (dx, dy), in the order the guard turns through them
+STEPS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+
 class WallGrid(object):
     """
-    Incomplete, but the idea would be to maintain an array of the walls in every row
-    and an array of the walls in every column. This way instead of moving one cell at
-    a time, we could just move to the next wall immediately (or, off the grid if no 
-    wall exists further in the same direction)
+    The walls of every row and of every column as sorted lists, so instead
+    of moving one cell at a time the guard can be moved straight to the cell
+    before the next wall with a bisect, or off the grid if no wall exists
+    further in the same direction.  One extra obstacle can be laid over the
+    walls for a jump without copying the lists.
     """
     def __init__(self, grid: Grid):
-        self.rows = []
-        self.cols = []
-        for x in range(grid.width):
-            pass
+        self.width = grid.width
+        self.height = grid.height
+        self.rows = [[] for _ in range(grid.height)]
+        self.cols = [[] for _ in range(grid.width)]
+        # Going through x then y fills every list in order
+        for p, c in grid.items():
+            if c == '#':
+                self.rows[p.y].append(p.x)
+                self.cols[p.x].append(p.y)
+
+    def jump(self, x, y, direction, obstacle=None):
+        """
+        Where the guard at (x, y) facing direction (an index into STEPS) stops,
+        None if it walks off the grid.
+        """
+        dx, dy = STEPS[direction]
+        if dx == 0:
+            line, pos = self.cols[x], y
+            extra = obstacle[1] if obstacle is not None and obstacle[0] == x else None
+        else:
+            line, pos = self.rows[y], x
+            extra = obstacle[0] if obstacle is not None and obstacle[1] == y else None
+        step = dx + dy
+        if step > 0:
+            i = bisect_right(line, pos)
+            wall = line[i] if i < len(line) else None
+            if extra is not None and pos < extra and (wall is None or extra < wall):
+                wall = extra
+        else:
+            i = bisect_left(line, pos)
+            wall = line[i - 1] if i else None
+            if extra is not None and extra < pos and (wall is None or wall < extra):
+                wall = extra
+        if wall is None:
+            return None
+        if dx == 0:
+            return x, wall - step
+        return wall - step, y
+
+
+def find_loop(walls, x, y, direction, obstacle=None):
+    """True if the guard at (x, y) facing direction walks in a loop"""
+    turns = set()
+    while True:
+        stop = walls.jump(x, y, direction, obstacle)
+        if stop is None:
+            return False
+        x, y = stop
+        # Every turn the guard makes in a loop comes round again
+        turn = (x, y, direction)
+        if turn in turns:
+            return True
+        turns.add(turn)
+        direction = (direction + 1) % 4
 
 
-def find_loop(guard):
-    history = defaultdict(set)
-    while guard.location in guard.grid:
-        if guard.direction in history[guard.location]:
-            return True
-        history[guard.location].add(guard.direction)
-        guard.move()
-    return False
+def loops_with(walls, candidate):
+    """find_loop() for an (obstacle, x, y, direction) candidate"""
+    obstacle, x, y, direction = candidate
+    return find_loop(walls, x, y, direction, obstacle)
 
 
-def part2(path):
+def part2(path, workers=None):
     grid = Grid(load(path))
     guard = Guard(grid)
+    walls = WallGrid(grid)
+    x, y = guard.location.x, guard.location.y
+    direction = STEPS.index((guard.direction.x, guard.direction.y))
+    blocked = {(p.x, p.y) for p in guard.walls}
+    # Walk the guard's route, an obstacle can go on every cell it is about
+    # to step onto that it has not crossed already
     positions = set()
     candidates = []
-    while guard.location in guard.grid:
-        wall_pos = guard.location + guard.direction
-        if wall_pos not in positions and wall_pos in grid and wall_pos not in guard.walls:
-            loc, dir_ = guard.location, guard.direction
-            guard.walls.add(wall_pos)
-            if find_loop(guard):
-                candidates.append(wall_pos)
-            guard.walls.remove(wall_pos)
-            guard.location, guard.direction = loc, dir_
-        positions.add(guard.location)
-        guard.move()
-    
-    print(len(set(candidates)))
-    print(candidates)
+    while 0 <= x < walls.width and 0 <= y < walls.height:
+        dx, dy = STEPS[direction]
+        wall_pos = x + dx, y + dy
+        if wall_pos in blocked:
+            direction = (direction + 1) % 4
+            continue
+        if wall_pos not in positions and 0 <= wall_pos[0] < walls.width and 0 <= wall_pos[1] < walls.height:
+            candidates.append((wall_pos, x, y, direction))
+        positions.add((x, y))
+        x, y = wall_pos
+
+    with Pool(walls, workers) as pool:
+        loops = pool.map(loops_with, candidates, chunksize=64)
+    found = [Point(*obstacle) for (obstacle, _, _, _), loop in zip(candidates, loops) if loop]
+
+    print(len(set(found)))
+    print(found)
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('path')
+    parser.add_argument('--workers', type=int, help='processes for part 2, one per CPU by default')
     args = parser.parse_args()
     part1(args.path)
-    part2(args.path)
+    part2(args.path, args.workers)
 
 
 if __name__ == '__main__':
@@ -1,7 +1,19 @@
 #!/usr/bin/env python3
 
 import argparse
-from collections import defaultdict
+from collections import Counter, defaultdict
+import json
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+import common.debug
+from common.debug import dprint
 
 
 def load(path):
@@ -12,58 +24,89 @@ def load(path):
 
 def blink(value):
     if value == 0:
-        return [1]
-    rep = str(value)
-    if len(rep) & 1 == 0:
-        half = len(rep) // 2
-        v1 = int(rep[:half])
-        v2 = int(rep[half:])
-        return [v1, v2]
-    value *= 2024
-    return [value]
-
-
-def part1(path):
+        return (1,)
+    # Count the digits, keeping 10 ** (digits // 2) for the split
+    digits = 1
+    power = 10
+    half = 1
+    while value >= power:
+        power *= 10
+        digits += 1
+        if digits & 1 == 0:
+            half *= 10
+    if digits & 1 == 0:
+        return divmod(value, half)
+    return (value * 2024,)
+
+
+class Transitions(dict):
+    """
+    What each value turns into on a blink, filled in as values turn up.  The
+    stones only ever take a few thousand distinct values, so the table stays
+    small, and it can be saved and loaded to carry it between runs.
+    """
+    def __missing__(self, value):
+        stones = self[value] = blink(value)
+        return stones
+
+    @staticmethod
+    def load(path):
+        transitions = Transitions()
+        with open(path, "r") as f:
+            for value, stones in json.load(f).items():
+                transitions[int(value)] = tuple(stones)
+        return transitions
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({str(value): stones for value, stones in self.items()}, f)
+
+
+def evolve(stones, blinks, transitions):
+    """
+    How many stones of each value there are after blinks blinks.  Stones of
+    the same value all change the same way, so each blink only has to go
+    through the distinct values, however many stones there are.
+    """
+    counts = Counter(stones)
+    for step in range(blinks):
+        new = defaultdict(int)
+        for value, count in counts.items():
+            for stone in transitions[value]:
+                new[stone] += count
+        counts = new
+        dprint(f'blink {step + 1}: {len(counts)} distinct values, {len(transitions)} known')
+    return counts
+
+
+def part1(path, transitions):
     data = load(path)
-    for _ in range(25):
-        newlist = []
-        for v in data:
-            newlist.extend(blink(v))
-        data = newlist
-    print(len(data))
-
-
-cache = {}
-
-
-def solve(val, count):
-    if count == 0:
-        return 1
-    key = (val, count)
-    res = cache.get(key)
-    if res is not None:
-        return res
-    res = 0
-    for newval in blink(val):
-        res += solve(newval, count - 1)
-    cache[key] = res
-    return res
+    print(sum(evolve(data, 25, transitions).values()))
 
 
-def part2(path):
+def part2(path, transitions):
     data = load(path)
-    res = 0
-    for val in data:
-        res += solve(val, 75)
-    print(res)
+    print(sum(evolve(data, 75, transitions).values()))
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('path')
+    parser.add_argument('--blinks', type=int, help='also count the stones after this many blinks')
+    parser.add_argument('--table', help='file to load the transition table from and save it to')
+    parser.add_argument('--debug', '-d', action='store_true')
     args = parser.parse_args()
-    part1(args.path)
-    part2(args.path)
+    if args.debug:
+        common.debug.DEBUG = True
+    transitions = Transitions()
+    if args.table and Path(args.table).exists():
+        transitions = Transitions.load(args.table)
+    part1(args.path, transitions)
+    part2(args.path, transitions)
+    if args.blinks is not None:
+        print(sum(evolve(load(args.path), args.blinks, transitions).values()))
+    if args.table:
+        transitions.save(args.table)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
-from functools import cached_property, cmp_to_key
 from collections import defaultdict
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common.unionfind import UnionFind
 
 
 def load(path):
@@ -11,227 +20,69 @@ def load(path):
     return data
 
 
-class Grid(dict):
-    def __init__(self, values):
-        super().__init__()
-        for y, row in enumerate(values):
-            for x, v in enumerate(row):
-                self[Point(x, y)] = v
-
-    @property
-    def width(self):
-        return len(self.values[0])
-
-    @property
-    def height(self):
-        return len(self.values)
-
-
-class Point(object):
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
-    def __hash__(self):
-        return hash(self.tuple)
-
-    def __add__(self, other):
-        return Point(self.x + other.x, self.y + other.y)
-
-    def __sub__(self, other):
-        return Point(self.x - other.x, self.y - other.y)
-
-    def __mul__(self, other):
-        if isinstance(other, int):
-            return Point(self.x * other, self.y * other)
-        raise ValueError('Wrong type')
-
-    def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
-
-    def __cmp__(self, other):
-        v = self.y - other.y
-        if v == 0:
-            return self.x - other.x
-        return v
-
-    def __str__(self):
-        return "({},{})".format(self.x, self.y)
-
-    def __repr__(self):
-        return "P({},{})".format(self.x, self.y)
-
-    @staticmethod
-    def limits(a, b):
-        miny, maxy = min(a.y, b.y), max(a.y, b.y) + 1
-        minx, maxx = min(a.x, b.x), max(a.x, b.x) + 1
-        return (minx, maxx), (miny, maxy)
-
-    @staticmethod
-    def range(a, b):
-        (minx, maxx), (miny, maxy) = Point.limits(a, b)
-        for y in range(miny, maxy):
-            changed_row = True
-            for x in range(minx, maxx):
-                yield Point(x, y), changed_row
-                changed_row = False
-
-    @staticmethod
-    def yrange(a, b):
-        (minx, maxx), (miny, maxy) = Point.limits(a, b)
-        for x in range(minx, maxx):
-            changed_col = True
-            for y in range(miny, maxy):
-                yield Point(x, y), changed_col
-                changed_col = False
-    @property
-    def tuple(self):
-        return self.x, self.y
-
-    def north(self, n=1):
-        return Point(self.x, self.y - n)
-    
-    def east(self, n=1):
-        return Point(self.x + n, self.y)
-
-    def south(self, n=1):
-        return Point(self.x, self.y + n)
-
-    def west(self, n=1):
-        return Point(self.x - n, self.y)
-
-    def dist(self, x, y=1):
-        return abs(self.x - x) + abs(self.y - y)
-
-
-def minmax(it, key=lambda x: x):
-    min_ = max_ = None
-    for item in it:
-        val = key(item)
-        if min_ is None or val < min_:
-            min_ = val
-        if max_ is None or val > max_:
-            max_ = val
-    return min_, max_
-
-
-N = Point(0, -1)
-E = Point(1, 0)
-S = Point(0, 1)
-W = Point(-1, 0)
-CARDINAL = [N, E, S, W]
-
-
-class Field(object):
-    def __init__(self, grid):
-        self.grid = grid
-        self.point, self.plant = grid.popitem()
-        self.region = { self.point }
-    
-    def build(self):
-        for dir_ in CARDINAL:
-            self.try_add(self.point + dir_)
-
-    def try_add(self, p):
-        if p not in self.grid:
-            return
-        if self.grid[p] != self.plant:
-            return
-        del self.grid[p]
-        self.region.add(p)
-        for dir_ in CARDINAL:
-            self.try_add(p + dir_)
-    
-    @cached_property
-    def perimeter(self):
-        perim = 0
-        for p in self.region:
-            for dir_ in CARDINAL:
-                if (p + dir_) not in self.region:
-                    perim += 1
-        return perim
-    
-    @cached_property
-    def area(self):
-        return len(self.region)
-    
-    @cached_property
-    def cost(self):
-        return self.area * self.perimeter
-
-    @cached_property
-    def new_cost(self):
-        return self.area * self.sides
-
-    @cached_property
-    def sides(self):
-        #sorted_points = sorted(self.region, key=cmp_to_key(Point.__cmp__))
-        minx, maxx = minmax(self.region, lambda p: p.x)
-        miny, maxy = minmax(self.region, lambda p: p.y)
-        c1 = Point(minx, miny)
-        c2 = Point(maxx, maxy)
-        #print(f"{self.plant}")
-        sides = 0
-        #print(f"{self.plant}: {c1}-{c2}")
-        for dir_, ext, rg in [(N, E, Point.range), (S, E, Point.range), (E, S, Point.yrange), (W, S, Point.yrange)]:
-            continuing = False
-            #prev_p = None
-            #start = None
-            for p, new_line in rg(c1, c2):
-                if new_line and continuing:
-                    continuing = False
-                    #print(f"Ending Side: {start}-{prev_p} (newline)")
-                if continuing and (p not in self.region or (p + dir_) in self.region):
-                    # previous edge is on a side with nothing towards dir_
-                    # but now we have something, so we are no longer continuing
-                    continuing = False
-                    #print(f"Ending Side: {start}-{p} ({p + dir_})")
-                elif not continuing and (p in self.region and (p + dir_) not in self.region):
-                    # previous edge is not on a side, this one starts a new side
-                    continuing = True
-                    sides += 1
-                    #start = p
-                    #print(f"Starting Side: {p}")
-                else:
-                    #print(f"Nothing changes: {p}")
-                    pass
-                #prev_p = p
-            if continuing:
-                #print(f"Ending Side: {start}-{prev_p} (oef)")
-                pass
-        #print(f"{self.plant}: {sides}")
-        return sides
-                    
-
-    def __repr__(self):
-        return f"F({self.plant})={repr(self.region)},p={self.perimeter},a={self.area},c={self.cost}"
-
-    def __str__(self):
-        return str(self.region)
+# The four diagonals, each with the two orthogonal steps either side of it
+CORNERS = [((dx, dy), (dx, 0), (0, dy)) for dx in (-1, 1) for dy in (-1, 1)]
+
+
+class Garden(object):
+    def __init__(self, rows):
+        self.rows = rows
+        self.width = len(rows[0])
+        self.height = len(rows)
+        self.regions = UnionFind(self.width * self.height)
+        for y, row in enumerate(rows):
+            for x, plant in enumerate(row):
+                i = y * self.width + x
+                if x + 1 < self.width and row[x + 1] == plant:
+                    self.regions.union(i, i + 1)
+                if y + 1 < self.height and rows[y + 1][x] == plant:
+                    self.regions.union(i, i + self.width)
+
+    def plant(self, x, y):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.rows[y][x]
+        return None
+
+    def plots(self):
+        for y, row in enumerate(self.rows):
+            for x, plant in enumerate(row):
+                yield x, y, plant
+
+    def total(self, per_plot):
+        """Sum of area * (sum of per_plot over the region) across the regions"""
+        counts = defaultdict(int)
+        roots = self.regions.roots()
+        for x, y, plant in self.plots():
+            counts[roots[y * self.width + x]] += per_plot(x, y, plant)
+        return sum(self.regions.sizes[root] * count for root, count in counts.items())
+
+    def fences(self, x, y, plant):
+        """Sides of the plot that face another region"""
+        return sum(self.plant(x + dx, y + dy) != plant for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)))
+
+    def corners(self, x, y, plant):
+        """Corners of the region at the plot, a region has as many sides as corners"""
+        count = 0
+        for (dx, dy), (ax, ay), (bx, by) in CORNERS:
+            a = self.plant(x + ax, y + ay) == plant
+            b = self.plant(x + bx, y + by) == plant
+            if not a and not b:
+                # Outside corner
+                count += 1
+            elif a and b and self.plant(x + dx, y + dy) != plant:
+                # Inside corner
+                count += 1
+        return count
 
 
 def part1(path):
-    grid = Grid(load(path))
-    groups = []
-    while len(grid) > 0:
-        f = Field(grid)
-        f.build()
-        groups.append(f)
-    #print(groups)
-    total = sum(f.cost for f in groups)
-    print(total)
+    garden = Garden(load(path))
+    print(garden.total(garden.fences))
 
 
 def part2(path):
-    grid = Grid(load(path))
-    groups = []
-    while len(grid) > 0:
-        f = Field(grid)
-        f.build()
-        groups.append(f)
-        #print(f'{repr(f)}: {f.sides}')
-    total = sum(f.new_cost for f in groups)
-    print(total)
+    garden = Garden(load(path))
+    print(garden.total(garden.corners))
 
 
 def main():
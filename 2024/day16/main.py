@@ -1,10 +1,8 @@
 #!/usr/bin/env python3
 
 import argparse
+from collections import deque
 import math
-import heapq
-from functools import total_ordering
-from collections import defaultdict
 
 
 def load(path):
@@ -161,273 +159,147 @@ class Grid(object):
         return '\n'.join(''.join(str(v) for v in row) for row in self.values)
 
 
-@total_ordering
-class DirPoint(object):
-    DIRS = {
-        '^': Point(0, -1),
-        '>': Point(1, 0),
-        'v': Point(0, 1),
-        '<': Point(-1, 0),
-    }
-    OPPOSITE = {
-        '^': 'v',
-        '>': '<',
-        'v': '^',
-        '<': '>',
-    }
-    TURN_COSTS = {
-        '^': {'^': 0, '>': 1000, 'v': 2000, '<': 1000},
-        '>': {'^': 1000, '>': 0, 'v': 1000, '<': 2000},
-        'v': {'^': 2000, '>': 1000, 'v': 0, '<': 1000},
-        '<': {'^': 1000, '>': 2000, 'v': 1000, '<': 0},
-    }
-    def __init__(self, point, direction, cost=0):
-        self.point = point
-        self.direction = direction
-        self.cost = cost
-    
-    @property
-    def tuple(self) -> tuple:
-        return self.point.x, self.point.y, self.direction
-    
-    def __hash__(self):
-        return hash(self.tuple)
-    
-    def __lt__(self, other):
-        return self.tuple < other.tuple
-
-    def __eq__(self, other):
-        return self.tuple == other.tuple
-
-    def __str__(self):
-        return f'{self.point} {self.direction} {self.cost}'
-    
-    def __repr__(self):
-        return f'DirPoint({self.point}, {self.direction}, {self.cost})'
+DIRS = {
+    '^': Point(0, -1),
+    '>': Point(1, 0),
+    'v': Point(0, 1),
+    '<': Point(-1, 0),
+}
 
-    def next(self) -> 'DirPoint':
-        """
-        Move one step in the current direction.
-
-        Returns:
-            DirPoint: The point after moving one step.
-        """
-        return DirPoint(self.point + self.DIRS[self.direction], self.direction, self.cost + 1)
-    
-    def turn(self, direction) -> 'DirPoint':
-        """
-        Turn in the given direction.
-
-        Args:
-            direction: The direction to turn in (^, >, v, <).
-
-        Returns:
-            DirPoint: The point after turning in the given direction.
-        """
-        if direction == self.direction:
-            return DirPoint(self.point + self.DIRS[self.direction], self.direction, self.cost + 1)
-        if direction == self.OPPOSITE[self.direction]:
-            return None
-        return DirPoint(self.point, direction, self.cost + 1000)
 
+STEP_COST = 1
+TURN_COST = 1000
 
-class Path(object):
-    def __init__(self, point):
-        self.point = point
-        self.cost = point.cost
-    
-    def add(self, point):
-        self.points.append(point)
-        self.cost += point.cost
-
-
-class DfsState(object):
-    def __init__(self, parent: 'DfsState', dirpoint):
-        self.parent = parent
-        self.dirpoint = dirpoint
-        # We know we can from the opposite direction
-        self.visited = '' # DirPoint.OPPOSITE[dirpoint.direction]
-        self.paths = []
-    
-    def next_child(self):
-        if not self.visited:
-            self.visited += self.dirpoint.direction
-            return self.dirpoint.next()
-        for dir_ in '^>v<':
-            if dir_ not in self.visited:
-                self.visited += dir_
-                return self.dirpoint.turn(dir_)
-        return None
-    
-    def __repr__(self):
-        return f'DfsState({self.dirpoint}, {self.visited})'
+# Bits of Maze.via, how a state was reached on a best path
+VIA_STEP = 1        # a step forward from the cell behind
+VIA_RIGHT = 2       # a right turn from the direction before this one
+VIA_LEFT = 4        # a left turn from the direction after this one
 
 
 class Maze(object):
+    """
+    The reindeer's position and facing as one state, cell * 4 + direction
+    with the cells numbered row by row and the directions in DIRS order.
+
+    Steps cost 1 and turns 1000, so navigate() keeps a FIFO queue for each.
+    States come off the search in order of cost, which means each queue is
+    filled in order of cost too, and the cheaper of the two heads is always
+    the next state to settle: Dijkstra without a heap.  Every way a state
+    was reached at its best cost is kept as VIA bits, so the tiles on all
+    best paths come from one walk back over them.
+    """
     def __init__(self, grid, start, end):
         self.grid = grid
         self.start = start
         self.end = end
-        self.best_paths = defaultdict(list)
-        self.visited = set()
+        self.width = grid.width
+        self.walls = bytearray(v == '#' for row in grid.values for v in row)
+        self.offsets = [d.y * self.width + d.x for d in DIRS.values()]
+        self.dist = None
+        self.via = None
+        self.goals = []
+
+    def state(self, point, direction):
+        return (point.y * self.width + point.x) * 4 + '^>v<'.index(direction)
+
+    def point(self, state):
+        y, x = divmod(state // 4, self.width)
+        return Point(x, y)
 
     def navigate(self, start):
-        moves = [(0, start)]
-        self.best_paths[start].append((0, None))
-        while moves:
-            _cost, cur = heapq.heappop(moves)
-            for dir_ in '^>v<':
-                child = cur.turn(dir_)
-                if child is None:
-                    continue
-                if self.grid[child.point] == '#':
-                    # No path can go from here to the end
-                    continue
-                cost, parent = self.best_paths.get(child, [(math.inf, None)])[0]
-                if cost < child.cost or (cost == child.cost and parent == cur):
-                    # We've already found a better path
-                    continue
-                if cost == child.cost:
-                    self.best_paths[child].append((child.cost, cur))
-                else:
-                    self.best_paths[child] = [(child.cost, cur)]
-                #print(f'{cur}->{child} (beats {parent}->{child})')
-                if child.point == self.end:
-                    # Found the end
-                    # print(f'{cur}->{child} (beats {parent}->{child})')
-                    continue
-                heapq.heappush(moves, (child.cost, child))
-
-    def navigate_dfs(self, start):
-        root = DfsState(None, start)
-        moves = [DfsState(root, start)]
-        self.visited.add(start.point)
-        while moves:
-            state = moves[-1]
-            cur = state.next_child()
-            if cur is None:
-                # Need to evaluate child paths to determine best path from this point, and inform the parent
-                if len(state.paths) == 0:
-                    # No path can go from here to the end
-                    self.best_paths[state.dirpoint] = None
-                else:
-                    # From all possible paths, choose the one with the lowest cost
-                    best = min(state.paths, key=lambda p: p.cost)
-                    # Save the location of the best path
-                    self.best_paths[state.dirpoint] = best
-                    # Add the best path to the parent
-                    state.parent.paths.append(DirPoint(state.dirpoint.point, state.dirpoint.direction, best.cost + state.dirpoint.cost))
-                moves.pop()
-                self.visited.remove(state.dirpoint.point)
+        size = len(self.walls) * 4
+        end = self.end.y * self.width + self.end.x
+        walls = self.walls
+        offsets = self.offsets
+        dist = [math.inf] * size
+        via = bytearray(size)
+        steps = deque()
+        turns = deque()
+        dist[start] = 0
+        steps.append((0, start))
+        goals = []
+        best = math.inf
+
+        def reach(state, cost, how, queue):
+            if cost < dist[state]:
+                dist[state] = cost
+                via[state] = how
+                queue.append((cost, state))
+            elif cost == dist[state]:
+                via[state] |= how
+
+        while steps or turns:
+            if turns and (not steps or turns[0][0] < steps[0][0]):
+                cost, state = turns.popleft()
+            else:
+                cost, state = steps.popleft()
+            if cost > dist[state]:
                 continue
-            if cur.point in self.visited:
-                # We've already visited this point
-                continue
-            if cur in self.best_paths:
-                # We already know the best path
-                path = self.best_paths[cur]
-                if path is not None:
-                    state.paths.append(DirPoint(cur.point, cur.direction, path.cost + cur.cost))
-                continue
-            if cur.point == self.end:
-                # Found the end
-                state.paths.append(DirPoint(cur.point, cur.direction, cur.cost))
-                continue
-            if self.grid[cur.point] == '#':
-                # No path can go from here to the end
+            if cost > best:
+                break
+            cell, dir_ = divmod(state, 4)
+            if cell == end:
+                best = cost
+                goals.append(state)
                 continue
-
-            # done with all the easy cases, need to evaluate this node's children
-            moves.append(DfsState(state, cur))
-            self.visited.add(cur.point)
-        return root.paths[0]
-    
-    def navigate_codium(self, start):
-        stack = [start]
+            ahead = cell + offsets[dir_]
+            if not walls[ahead]:
+                reach(ahead * 4 + dir_, cost + STEP_COST, VIA_STEP, steps)
+            reach(cell * 4 + (dir_ + 1) % 4, cost + TURN_COST, VIA_RIGHT, turns)
+            reach(cell * 4 + (dir_ + 3) % 4, cost + TURN_COST, VIA_LEFT, turns)
+
+        self.dist = dist
+        self.via = via
+        self.goals = goals
+        return best if goals else None
+
+    def previous(self, state):
+        """The states state was reached from on a best path"""
+        cell, dir_ = divmod(state, 4)
+        how = self.via[state]
+        if how & VIA_STEP:
+            yield (cell - self.offsets[dir_]) * 4 + dir_
+        if how & VIA_RIGHT:
+            yield cell * 4 + (dir_ + 3) % 4
+        if how & VIA_LEFT:
+            yield cell * 4 + (dir_ + 1) % 4
+
+    def path(self):
+        """One best path, from the start to the end"""
+        state = self.goals[0]
+        path = [state]
+        while self.via[state]:
+            state = next(self.previous(state))
+            path.append(state)
+        path.reverse()
+        return path
+
+    def on_best_paths(self):
+        """Every state on one of the best paths, each visited once"""
+        seen = bytearray(len(self.via))
+        stack = list(self.goals)
+        states = []
         while stack:
-            cur = stack.pop()
-            if cur.point in self.visited:
-                continue
-            if cur in self.best_paths:
-                path = self.best_paths[cur]
-                if path is not None:
-                    stack.append(DirPoint(cur.point, cur.direction, path.cost + cur.cost))
-                continue
-            if cur.point == self.end:
-                self.best_paths[cur] = DirPoint(cur.point, cur.direction, cur.cost)
-                continue
-            if self.grid[cur.point] == '#':
-                self.best_paths[cur] = None
+            state = stack.pop()
+            if seen[state]:
                 continue
-
-            self.visited.add(cur.point)
-            stack.append(cur.next())
-            for dir_ in 'v^<>':
-                if dir_ == cur.direction:
-                    continue
-                stack.append(cur.turn(dir_))
-            self.visited.remove(cur.point)
-
-        best = self.best_paths.get(start)
-        if best is None:
-            return None
-        return DirPoint(start.point, start.direction, best.cost + start.cost)
-    
-    def navigate_recursive(self, cur):
-        if cur.point in self.visited:
-            # We've already visited this point
-            return None
-        if cur in self.best_paths:
-            # We already know the best path
-            path = self.best_paths[cur]
-            if path is None:
-                return None
-            return DirPoint(cur.point, cur.direction, path.cost + cur.cost)
-        if cur.point == self.end:
-            # Found the end
-            return DirPoint(cur.point, cur.direction, cur.cost)
-        if self.grid[cur.point] == '#':
-            # No path can go from here to the end
-            return None
-
-        self.visited.add(cur.point)
-        #print(f'Visiting {cur}')
-        best = self.navigate(cur.next())
-        for dir_ in '^>v<':
-            if dir_ == cur.direction:
-                continue
-            path = self.navigate(cur.turn(dir_))
-            if path is None:
-                continue
-            if best is None or path.cost < best.cost:
-                best = path
-        self.visited.remove(cur.point)
-        self.best_paths[cur] = best
-        if best is None:
-            return None
-
-        return DirPoint(cur.point, cur.direction, best.cost + cur.cost)
+            seen[state] = 1
+            states.append(state)
+            stack.extend(self.previous(state))
+        return states
 
 
 def print_chosen_path(maze):
     grid = maze.grid.copy()
-    cur_dp = maze.best_paths[DirPoint(maze.start, '>')]
-    while cur_dp.point != maze.end:
-        #print(cur_dp)
-        grid[cur_dp.point] = cur_dp.direction
-        cur_dp = maze.best_paths[cur_dp]
+    for state in maze.path():
+        grid[maze.point(state)] = '^>v<'[state % 4]
     print(grid)
 
 
 def print_all_paths(maze):
     grid = maze.grid.copy()
-    for p, v in grid.items():
-        if v == '#':
-            continue
-        for dir_ in 'v^<>':
-            dp = DirPoint(p, dir_)
-            if maze.best_paths.get(dp) is not None:
-                grid[p] = maze.best_paths[dp].direction
+    for state in maze.on_best_paths():
+        grid[maze.point(state)] = 'O'
     print(grid)
 
 
@@ -439,73 +311,25 @@ def part1(path):
     print(start)
     print(end)
     maze = Maze(grid, start, end)
-    start_dp = DirPoint(start, '>')
-    maze.navigate(start_dp)
-    best = []
-    for dir_ in '^>v<':
-        dp = DirPoint(end, dir_)
-        cost, p = maze.best_paths.get(dp, [(math.inf, None)])[0]
-        if p is None:
-            continue
-        dp.cost = cost
-        if len(best) == 0:
-            best.append(dp)
-        elif cost < best[0].cost:
-            best = [dp]
-        elif cost == best[0].cost:
-            best.append(dp)
-    print(best[0].cost)
+    print(maze.navigate(maze.state(start, '>')))
 
     #print('Chosen path:')
     #print_chosen_path(maze)
     #print('All paths:')
     #print_all_paths(maze)
 
-    #print(maze.best_paths[start_dp])
-    #print(path.points)
-    #print(cost)
-
-
-def follow(maze, paths):
-    on_path = set()
-    visited = set()
-    while paths:
-        cur = paths.pop()
-        if cur in visited:
-            continue
-        visited.add(cur)
-        on_path.add(cur.point)
-        if cur.point == maze.start:
-            continue
-        parents = maze.best_paths[cur]
-        for cost, p in parents:
-            paths.append(p)
-    return on_path
-
 
 def part2(path):
     grid = Grid(load(path))
     start = grid.index('S')
     end = grid.index('E')
     maze = Maze(grid, start, end)
-    start_dp = DirPoint(start, '>')
-    maze.navigate(start_dp)
-    best = []
-    for dir_ in '^>v<':
-        dp = DirPoint(end, dir_)
-        cost, p = maze.best_paths.get(dp, [(math.inf, None)])[0]
-        if p is None:
-            continue
-        dp.cost = cost
-        if len(best) == 0:
-            best.append(dp)
-        elif cost < best[0].cost:
-            best = [dp]
-        elif cost == best[0].cost:
-            best.append(dp)
-    #print(best)
-    on_path = follow(maze, best)
-    print(len(on_path))
+    maze.navigate(maze.state(start, '>'))
+    # Every tile on one of the best paths, whichever way it was crossed
+    on_path = bytearray(len(maze.walls))
+    for state in maze.on_best_paths():
+        on_path[state // 4] = 1
+    print(sum(on_path))
 
 
 def main():
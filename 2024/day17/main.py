@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 
-from collections import deque
-from itertools import permutations
 import argparse
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+import common.debug
+from common.debug import dprint
+from common.pool import Pool
 
 
 OP_ADV = 0  # rA = rA // math.pow(2, combo(opd))
@@ -75,6 +85,7 @@ class Machine(object):
             OP_BDV: Instruction("BDV", self.rB, [self.rA, self.combo], self.div2pow),
             OP_CDV: Instruction("CDV", self.rC, [self.rA, self.combo], self.div2pow),
         }
+        self.decoded = [self.decode(ip) for ip in range(len(program) - 1)]
 
     def reset(self, regA, regB=0, regC=0):
         self.ip = 0
@@ -92,21 +103,41 @@ class Machine(object):
             return self.registers[value - 4]
         raise Exception("Invalid combo value")
 
+    def fetcher(self, input_, operand):
+        """A function that reads one input of an instruction"""
+        if isinstance(input_, Register):
+            index = input_.index
+            return lambda: self.registers[index]
+        if input_ == self.combo and operand >= 4:
+            if operand >= 7:
+                # Only an error if the instruction is ever run
+                return lambda: self.combo(operand)
+            index = operand - 4
+            return lambda: self.registers[index]
+        value = input_(operand)
+        return lambda: value
+
+    def decode(self, ip):
+        """
+        The instruction at ip and a function that carries it out, so the
+        operands are worked out once rather than every time it runs.
+        """
+        instruction = self.opmap[self.program[ip]]
+        operand = self.program[ip + 1]
+        fetchers = [self.fetcher(input_, operand) for input_ in instruction.inputs]
+        method = instruction.method
+        if len(fetchers) == 1:
+            f0, = fetchers
+            return instruction, lambda: method(f0())
+        f0, f1 = fetchers
+        return instruction, lambda: method(f0(), f1())
+
     def execute(self):
         if self.ip + 1 >= len(self.program):
             raise HaltException()
-        op = self.program[self.ip]
-        operand = self.program[self.ip + 1]
         self.next_ip = self.ip + 2
-        instruction = self.opmap[op]
-        inputs = []
-        for input_ in instruction.inputs:
-            if isinstance(input_, Register):
-                inputs.append(input_.get(self))
-            else:
-                inputs.append(input_(operand))
-        # print(op, instruction.method.__name__, inputs)
-        result = instruction.method(*inputs)
+        instruction, step = self.decoded[self.ip]
+        result = step()
         if result is not None:
             instruction.output.set(self, result)
 
@@ -192,65 +223,169 @@ def part1(path):
     print(",".join(str(o) for o in machine.outputs))
 
 
-"""
-Solve so the the outputs == the program
-[2, 4, 1, 1, 7, 5, 1, 5, 0, 3, 4, 4, 5, 5, 3, 0]
-
-BST 4 | rB = rA mod8 
-BXL 1 | rB = rB xor 1 
-CDV 5 | rC = rA div rB 
-BXL 5 | rB = rB xor 5 
-ADV 3 | rA = rA div 3 
-BXC 4 | rB = rB xor rC 
-OUT 5 | ?? = rB output 
-JNZ 0 | ?? = rA jnz 0 
-
-while rA != 0:
-    rB = (rA % 8) ^ 1
-    rC = rA // 2**rB
-    rB = rB ^ 5
-    rA = rA // 2**3
-    rB = rB ^ rC
-    print(rB % 8)
-"""
-
-def solve_one(machine, goal, end_a):
-    solutions = []
-    for rA in range(end_a * (2**3), end_a * (2**3) + 2**3):
-        machine.reset(rA)
-        machine.run_one()
-        if machine.outputs[0] == goal:
-            solutions.append(rA)
-    return solutions
-
-
-def part2(path):
+REGISTERS = 'abc'
+
+
+def combo_source(operand):
+    if 0 <= operand <= 3:
+        return str(operand)
+    if 4 <= operand < 7:
+        return REGISTERS[operand - 4]
+    raise Exception("Invalid combo value")
+
+
+class Loop(object):
+    """
+    A program that goes round a single loop, JNZ 0 as its last instruction,
+    compiled to a Python function of the registers at the top of the loop
+    that returns the digit it outputs and the registers at the bottom.  For
+
+        2,4,1,1,7,5,1,5,0,3,4,4,5,5,3,0
+
+    the source is
+
+        def body(a, b, c):
+            b = a & 7
+            b ^= 1
+            c = a >> b
+            b ^= 5
+            a >>= 3
+            b ^= c
+            out = b & 7
+            return out, a, b, c
+
+    shift is the number of bits the loop's ADV drops from A, None unless
+    there is exactly one with a literal operand, and carried the registers
+    other than A that the loop reads before writing.
+    """
+    def __init__(self, program):
+        if len(program) < 2 or program[-2:] != [OP_JNZ, 0]:
+            raise Exception("Program does not end in JNZ 0")
+        lines = ['def body(a, b, c):']
+        written = set()
+        self.carried = set()
+        shifts = []
+        outputs = 0
+
+        def read(*registers):
+            for register in registers:
+                if register in 'bc' and register not in written:
+                    self.carried.add(register)
+
+        for ip in range(0, len(program) - 2, 2):
+            op, operand = program[ip], program[ip + 1]
+            if op == OP_JNZ:
+                raise Exception("Jump inside the loop")
+            if op == OP_BXL:
+                read('b')
+                line = f'b ^= {operand}'
+            elif op == OP_BXC:
+                read('b', 'c')
+                line = 'b ^= c'
+            else:
+                value = combo_source(operand)
+                read(value)
+                if op == OP_ADV:
+                    shifts.append(operand if operand <= 3 else None)
+                    line = f'a >>= {value}'
+                elif op == OP_BST:
+                    line = f'b = {value} & 7'
+                elif op == OP_OUT:
+                    outputs += 1
+                    line = f'out = {value} & 7'
+                elif op == OP_BDV:
+                    line = f'b = a >> {value}'
+                else:
+                    line = f'c = a >> {value}'
+            written.add(line[0])
+            lines.append('    ' + line)
+        if outputs != 1:
+            raise Exception("Loop does not output exactly one digit")
+        lines.append('    return out, a, b, c')
+        self.shift = shifts[0] if len(shifts) == 1 and shifts[0] else None
+        self.source = '\n'.join(lines)
+        namespace = {}
+        exec(self.source, namespace)
+        self.body = namespace['body']
+
+    def run(self, a, b=0, c=0):
+        """The digits the whole program outputs"""
+        body = self.body
+        outputs = []
+        while True:
+            out, a, b, c = body(a, b, c)
+            outputs.append(out)
+            if a == 0:
+                return outputs
+
+
+def loop_body(program):
+    """The compiled loop, built again in each worker as it cannot be pickled"""
+    return Loop(program).body
+
+
+def first_output(body, a):
+    """The digit the loop outputs for A"""
+    return body(a, 0, 0)[0]
+
+
+def solve(program, workers=1, chunksize=4096):
+    """
+    Every value of A, smallest first, that makes the program output itself.
+
+    Each time round the loop A loses its bottom shift bits, so working back
+    from the last digit the A that outputs it is the A that outputs the rest
+    shifted up with shift new bits below it.  Only the values that output
+    the right digit are kept at each step, and with more than one worker
+    the values to try are handed out chunksize at a time.
+    """
+    loop = Loop(program)
+    if loop.shift is None:
+        raise Exception("Loop does not shift A by a constant")
+    if loop.carried:
+        raise Exception(f"Loop depends on {','.join(sorted(loop.carried))} from the previous time round")
+    with Pool(program, workers, setup=loop_body) as pool:
+        candidates = [0]
+        for digit in reversed(program):
+            # A is never 0 at the top of the loop except when the program
+            # starts, and then the loop would stop after one digit
+            values = [(a << loop.shift) | low for a in candidates for low in range(1 << loop.shift)]
+            values = [a for a in values if a]
+            outputs = pool.map(first_output, values, chunksize)
+            candidates = [a for a, out in zip(values, outputs) if out == digit]
+            dprint(f'{digit}: {len(candidates)} candidates')
+            if not candidates:
+                break
+    return sorted(candidates)
+
+
+def part2(path, workers=1):
     regs, prog = load(path)
     machine = Machine(regs, prog)
     machine.print()
+    dprint(Loop(prog).source)
 
-    prev_a = [0]
-    for i in range(len(prog), 0, -1):
-        next_a = []
-        goal = prog[i-1]
-        for ra in prev_a:
-            next_a.extend(solve_one(machine, goal, ra))
-        prev_a = set(next_a)
-        #print(f'{i}: {goal}: {next_a}')
-    new_a = min(prev_a)
+    solutions = solve(prog, workers)
+    if not solutions:
+        print('No value of A outputs the program')
+        return
+    new_a = solutions[0]
     machine.reset(new_a)
     machine.run()
     print(machine.outputs)
     print(new_a)
-    #print(machine.program)
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('path')
+    parser.add_argument('--workers', type=int, default=1, help='processes for the part 2 search')
+    parser.add_argument('--debug', '-d', action='store_true')
     args = parser.parse_args()
+    if args.debug:
+        common.debug.DEBUG = True
     part1(args.path)
-    part2(args.path)
+    part2(args.path, args.workers)
 
 
 if __name__ == '__main__':
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
-import math
-import heapq
 from functools import total_ordering
-from collections import defaultdict
+from pathlib import Path
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+from common import search
 
 
 def load(path):
@@ -138,49 +145,40 @@ class Maze(object):
         self.grid = grid
         self.start = Point(0, 0)
         self.end = Point(grid.width - 1, grid.height - 1)
-        self.best_paths = {}
+        self.result = None
+
+    def index(self, point):
+        return point.y * self.grid.width + point.x
+
+    def point(self, index):
+        y, x = divmod(index, self.grid.width)
+        return Point(x, y)
 
     def navigate(self):
-        moves = [(0, self.start)]
-        self.best_paths[self.start] = (0, None)
-        while moves:
-            cur_cost, cur = heapq.heappop(moves)
-            for dir_ in '^>v<':
-                child = cur + DIRS[dir_]
-                if child not in self.grid:
-                    # Out of bounds
-                    continue
-                if self.grid[child] == '#':
-                    # No path can go from here to the end
-                    continue
-                child_cost = cur_cost + 1
-                #cost, parent = self.best_paths.get(child, [(math.inf, None)])[0]
-                best_cost, parent = self.best_paths.get(child, (math.inf, None))
-                #if cost < child_cost or (cost == child_cost and parent == cur):
-                if best_cost <= child_cost:
-                    # We've already found a better path
-                    continue
-                #if cost == child_cost:
-                #    self.best_paths[child].append((child_cost, cur))
-                #else:
-                #    self.best_paths[child] = [(child_cost, cur)]
-                self.best_paths[child] = (child_cost, cur)
-                #print(f'{cur}->{child} (beats {parent}->{child})')
-                if child == self.end:
-                    # Found the end
-                    # print(f'{cur}->{child} (beats {parent}->{child})')
-                    continue
-                heapq.heappush(moves, (child_cost, child))
-        best_cost, _ = self.best_paths.get(self.end, (None, None))
-        return best_cost
+        # Cells are numbered row by row, in the order of DIRS
+        width = self.grid.width
+        size = width * self.grid.height
+        blocked = bytearray(size)
+        for p, v in dict.items(self.grid):
+            if v == '#':
+                blocked[self.index(p)] = 1
+
+        def neighbors(i):
+            x = i % width
+            for n, ok in ((i - width, i >= width), (i + 1, x + 1 < width), (i + width, i + width < size), (i - 1, x > 0)):
+                if ok and not blocked[n]:
+                    yield n, 1
+
+        end = self.index(self.end)
+        self.result = search.dijkstra([self.index(self.start)], neighbors, size,
+                                      goal=lambda i: i == end, predecessors=True)
+        return self.result.cost
 
 
 def print_chosen_path(maze):
     grid = maze.grid.copy()
-    cur = maze.end
-    while cur is not None:
-        grid[cur] = 'O'
-        _, cur = maze.best_paths[cur]
+    for i in maze.result.path() or []:
+        grid[maze.point(i)] = 'O'
     print(grid)
 
 
@@ -200,8 +198,7 @@ def part1(path):
     maze = Maze(grid)
     maze.navigate()
     print_chosen_path(maze)
-    best_cost, parent = maze.best_paths[maze.end]
-    print(best_cost)
+    print(maze.result.cost)
 
 
 def part2(path):
@@ -2,6 +2,8 @@
 
 import argparse
 
+import numpy as np
+
 
 def load(path):
     with open(path, "r") as f:
@@ -9,70 +11,73 @@ def load(path):
     return data
 
 
-def mix(secret, other):
-    return secret ^ other
-
-
-def prune(secret):
-    return secret % 16777216
-
-
-def mix_prune(secret, other):
-    return (secret ^ other) % 16777216
-
-
-def generate(secret):
-    secret = mix_prune(secret, secret * 64)
-    secret = mix_prune(secret, secret // 32)
-    secret = mix_prune(secret, secret * 2048)
-    return secret
-
-
-def generate_n(secret, n):
-    for _ in range(n):
-        secret = generate(secret)
-    return secret
-
-
-def generate_prices(secret):
-    sequences = {}
+MASK = 16777216 - 1
+STEPS = 2000
+
+# A price change is -9..9, a window of four of them is a base 19 number
+BASE = 19
+WINDOWS = BASE ** 4
+
+
+def generate_all(secrets, n):
+    """
+    Every buyer's secret through n steps at once, as a (n + 1, buyers) uint32
+    array holding the starting secrets in its first row.  The multiplies and
+    the divide by 32 are powers of two and the prune keeps the low 24 bits,
+    so each step is shifts, xors and masks over the whole column of buyers.
+    """
+    out = np.empty((n + 1, len(secrets)), dtype=np.uint32)
+    secret = np.array(secrets, dtype=np.uint32) & MASK
+    out[0] = secret
+    for i in range(1, n + 1):
+        secret ^= (secret << 6) & MASK
+        secret ^= secret >> 5
+        secret ^= (secret << 11) & MASK
+        out[i] = secret
+    return out
+
+
+def window_sums(secrets):
+    """
+    The bananas each window of four changes would buy, summed over buyers, as
+    a dense array indexed by window number, and the windows themselves as a
+    (buyers, steps - 3) array.  Each buyer sells at the first time a window
+    turns up for them, so only the first occurrence of a window per buyer
+    counts.
+    """
+    prices = (generate_all(secrets, STEPS) % 10).astype(np.int64).T
+    changes = np.diff(prices, axis=1) + 9
+    windows = ((changes[:, :-3] * BASE + changes[:, 1:-2]) * BASE + changes[:, 2:-1]) * BASE + changes[:, 3:]
+    sold = prices[:, 4:]
+    # Buyer and window as one key, unique finds the first place each occurs
+    keys = np.arange(len(secrets))[:, None] * WINDOWS + windows
+    _, first = np.unique(keys.ravel(), return_index=True)
+    sums = np.bincount(windows.ravel()[first], weights=sold.ravel()[first], minlength=WINDOWS)
+    return sums.astype(np.int64), windows
+
+
+def decode(window):
     changes = []
-    price = secret % 10
-    for _ in range(2000):
-        secret = generate(secret)
-        new_price = secret % 10
-        changes.append(new_price - price)
-        price = new_price
-        if len(changes) < 4:
-            continue
-        key = tuple(changes[-4:])
-        if key not in sequences:
-            sequences[key] = new_price
-    return sequences
-
-
-def update_sums(sums, new):
-    for k, v in new.items():
-        sums[k] = sums.get(k, 0) + v
+    for _ in range(4):
+        window, change = divmod(window, BASE)
+        changes.append(change - 9)
+    return tuple(reversed(changes))
 
 
 def part1(path):
     data = load(path)
-    total = 0
-    for secret in data:
-        new = generate_n(secret, 2000)
-        #print(f'{secret}: {new}')
-        total += new
+    total = int(generate_all(data, STEPS)[-1].sum(dtype=np.int64))
     print(total)
 
 
 def part2(path):
     data = load(path)
-    sums = {}
-    for secret in data:
-        update_sums(sums, generate_prices(secret))
-    best = max(sums, key=sums.get)
-    print(f'{best}: {sums[best]}')
+    sums, windows = window_sums(data)
+    # Of the windows tied for best, the one that turned up first, buyer by buyer
+    tied = np.flatnonzero(sums == sums.max())
+    order = windows.ravel()
+    best = min(tied, key=lambda w: np.argmax(order == w))
+    print(f'{decode(int(best))}: {sums[best]}')
 
 
 def main():
@@ -1,8 +1,28 @@
 #!/usr/bin/env python3
 
 import argparse
+from collections import defaultdict
+from itertools import combinations
+from pathlib import Path
+import random
 import re
-from itertools import combinations, permutations
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent.parent))
+
+
+import common.debug
+from common.debug import dprint
+
+
+AND, OR, XOR = 0, 1, 2
+OPS = {'AND': AND, 'OR': OR, 'XOR': XOR}
+
+# Test vectors simulated at once, one bit of every wire's int each
+LANES = 64
 
 
 def load(path):
@@ -21,20 +41,6 @@ def load(path):
     return values, gates
 
 
-def solve(values, gates, wire):
-    if wire in values:
-        return values[wire]
-    op, a, b = gates[wire]
-    if op == 'AND':
-        result = solve(values, gates, a) & solve(values, gates, b)
-    elif op == 'OR':
-        result = solve(values, gates, a) | solve(values, gates, b)
-    elif op == 'XOR':
-        result = solve(values, gates, a) ^ solve(values, gates, b)
-    values[wire] = result
-    return result
-
-
 def make_num(values, wires):
     num = 0
     for wire in sorted(wires, reverse=True):
@@ -43,159 +49,246 @@ def make_num(values, wires):
     return num
 
 
-def perform(values, gates):
-    values = values.copy()
-    for wire in gates:
-        if not wire.startswith('z'):
+class LoopException(Exception):
+    """The gates feed back into themselves, so they have no order"""
+    pass
+
+
+def topological_order(gates):
+    """The gate outputs in an order that has every gate after its inputs"""
+    consumers = defaultdict(list)
+    pending = {}
+    for out, (op, a, b) in gates.items():
+        pending[out] = 0
+        for wire in (a, b):
+            if wire in gates:
+                pending[out] += 1
+                consumers[wire].append(out)
+    ready = [out for out, count in pending.items() if count == 0]
+    order = []
+    while ready:
+        wire = ready.pop()
+        order.append(wire)
+        for out in consumers[wire]:
+            pending[out] -= 1
+            if pending[out] == 0:
+                ready.append(out)
+    if len(order) != len(gates):
+        raise LoopException("Gates form a loop")
+    return order
+
+
+class Netlist(object):
+    """
+    The gates sorted once and compiled to a list of (op, a, b) instructions.
+    Every wire is numbered, inputs first and then the gate outputs in the
+    order the instructions produce them, so running the program only has to
+    append each result to the list of values.
+
+    Wire values are ints holding a bit per test vector, so a single run
+    simulates as many vectors as there are bits, LANES of them at a time.
+    """
+    def __init__(self, inputs, gates):
+        self.inputs = sorted(inputs)
+        self.wires = self.inputs + topological_order(gates)
+        self.index = {wire: i for i, wire in enumerate(self.wires)}
+        self.program = []
+        for out in self.wires[len(self.inputs):]:
+            op, a, b = gates[out]
+            self.program.append((OPS[op], self.index[a], self.index[b]))
+        self.outputs = sorted(wire for wire in gates if wire.startswith('z'))
+
+    def run(self, inputs):
+        """Values of every wire by number, given values of the input wires by name"""
+        values = [inputs.get(wire, 0) for wire in self.inputs]
+        append = values.append
+        for op, a, b in self.program:
+            if op == AND:
+                append(values[a] & values[b])
+            elif op == OR:
+                append(values[a] | values[b])
+            else:
+                append(values[a] ^ values[b])
+        return values
+
+    def evaluate(self, inputs):
+        return dict(zip(self.wires, self.run(inputs)))
+
+    def add(self, slices):
+        """The z output slices given the slices of every x and y input wire"""
+        values = self.run(slices)
+        return [values[self.index[wire]] for wire in self.outputs]
+
+
+def pack(numbers, bits):
+    """Bit slices of numbers, slice i holding bit i of every number"""
+    slices = [0] * bits
+    for lane, number in enumerate(numbers):
+        for bit in range(bits):
+            if number >> bit & 1:
+                slices[bit] |= 1 << lane
+    return slices
+
+
+def test_vectors(bits, lanes=LANES, seed=0):
+    """
+    x and y addends for an adder of bits bits, the carry chain run end to end
+    first and random numbers after.
+    """
+    top = (1 << bits) - 1
+    xs = [0, top, top, 1]
+    ys = [0, 1, top, top]
+    rng = random.Random(seed)
+    while len(xs) < lanes:
+        xs.append(rng.getrandbits(bits))
+        ys.append(rng.getrandbits(bits))
+    return xs, ys
+
+
+class AdderTest(object):
+    """Bit sliced inputs and expected outputs for checking an adder"""
+    def __init__(self, bits, xs, ys):
+        self.slices = {}
+        for prefix, numbers in (('x', xs), ('y', ys)):
+            for bit, slice_ in enumerate(pack(numbers, bits)):
+                self.slices[f'{prefix}{bit:02d}'] = slice_
+        self.expected = pack([x + y for x, y in zip(xs, ys)], bits + 1)
+
+    def errors(self, netlist):
+        """How many output bits come out wrong over all the test vectors"""
+        return sum((actual ^ expected).bit_count() for actual, expected in zip(netlist.add(self.slices), self.expected))
+
+
+def check_adder(gates, bits):
+    """
+    Wires breaking the rules that hold for every gate of a ripple carry
+    adder, by wire with the rule broken.  Bit 0 is a half adder, z00 =
+    x00 XOR y00 with x00 AND y00 the carry, and every other bit i is
+
+        s = xi XOR yi       zi = s XOR carry
+        g = xi AND yi       p = s AND carry       carry' = g OR p
+
+    with the last carry the top output.
+    """
+    consumers = defaultdict(set)
+    for out, (op, a, b) in gates.items():
+        consumers[a].add(op)
+        consumers[b].add(op)
+    last = f'z{bits:02d}'
+    suspects = {}
+    for out, (op, a, b) in gates.items():
+        from_inputs = a[0] in 'xy' and b[0] in 'xy'
+        first = from_inputs and int(a[1:]) == 0
+        if out == last:
+            if op != 'OR':
+                suspects[out] = 'top output not from OR'
+        elif out.startswith('z') and op != 'XOR':
+            suspects[out] = 'output not from XOR'
+        elif op == 'XOR' and not from_inputs and not out.startswith('z'):
+            suspects[out] = 'sum XOR not to an output'
+        elif op == 'XOR' and from_inputs and not first and 'XOR' not in consumers[out]:
+            suspects[out] = 'input XOR not into a sum XOR'
+        elif op == 'AND' and not first and consumers[out] != {'OR'}:
+            suspects[out] = 'AND not into a carry OR'
+        elif op == 'OR' and consumers[out] != {'AND', 'XOR'}:
+            suspects[out] = 'carry OR not into the next bit'
+    return suspects
+
+
+def swapped(gates, swaps):
+    gates = gates.copy()
+    for a, b in swaps:
+        gates[a], gates[b] = gates[b], gates[a]
+    return gates
+
+
+def score(values, gates, swaps, test):
+    """Errors with the outputs swapped, None if that makes a loop"""
+    try:
+        netlist = Netlist(values, swapped(gates, swaps))
+    except LoopException:
+        return None
+    return test.errors(netlist)
+
+
+def rank_swaps(values, gates, suspects, test):
+    """The swaps between suspect wires that cut the errors, best first"""
+    baseline = score(values, gates, [], test)
+    ranked = []
+    for swap in combinations(sorted(suspects), 2):
+        errors = score(values, gates, [swap], test)
+        if errors is not None and errors < baseline:
+            ranked.append((errors, swap))
+    ranked.sort()
+    return [swap for errors, swap in ranked]
+
+
+def find_swaps(values, gates, bits, pairs=4, batches=8):
+    """
+    The pairs of swapped outputs that make the gates an adder, None if there
+    are none among the wires the structural check picks out.  Sets of pairs
+    are tried in order of how well their swaps do alone, and the first one
+    with no errors on one batch of test vectors has to pass the rest too.
+    """
+    suspects = check_adder(gates, bits)
+    for wire, rule in sorted(suspects.items()):
+        dprint(f'{wire}: {rule}')
+    tests = [AdderTest(bits, *test_vectors(bits, seed=seed)) for seed in range(batches)]
+    ranked = rank_swaps(values, gates, suspects, tests[0])
+    dprint(f'{len(ranked)} candidate swaps: {ranked}')
+    for swaps in combinations(ranked, pairs):
+        wires = [wire for swap in swaps for wire in swap]
+        if len(set(wires)) != len(wires):
             continue
-        solve(values, gates, wire)
-    return make_num(values, (wire for wire in gates if wire.startswith('z')))
+        if all(score(values, gates, swaps, test) == 0 for test in tests):
+            return list(swaps)
+    return None
 
 
 def part1(path):
     values, gates = load(path)
     print(len(values))
     print(len(gates))
-    value = perform(values, gates)
+    netlist = Netlist(values, gates)
+    value = make_num(netlist.evaluate(values), netlist.outputs)
     print(f'{value}')
 
 
-def count(iterable):
-    return sum(1 for _ in iterable)
-
-
-def find_root_dependencies(gates, wire, deps):
-    if wire not in gates:
-        deps.add(wire)
-        return
-    op, i0, i1 = gates[wire]
-    
-    for input_ in (i0, i1):
-        find_root_dependencies(gates, input_, deps)
-
-
-def define_in_root_terms(gates, wire):
-    if wire not in gates:
-        return wire
-    op, i0, i1 = gates[wire]
-    operands = sorted(define_in_root_terms(gates, input_) for input_ in (i0, i1))
-
-    return f'({operands[0]} {op} {operands[1]})'
-
-
-def check_dependencies(gates):
-    for wire in sorted(gates, reverse=True):
-        if not wire.startswith('z'):
-            continue
-        num = int(wire[1:])
-        expected = [f'x{n:02d}' for n in range(num + 1)]
-        expected.extend([f'y{n:02d}' for n in range(num + 1)])
-        deps = set()
-        find_root_dependencies(gates, wire, deps)
-        diff = deps.difference(expected)
-        if diff:
-            print(f'{wire}: {", ".join(sorted(diff))}')
-
-
-def find_dependencies(gates, wire, deps):
-    if wire not in gates:
-        return
-    op, i0, i1 = gates[wire]
-    deps.add(wire)
-    for input_ in (i0, i1):
-        find_dependencies(gates, input_, deps)
-    return deps
-
-
-def swap_vals(d, k1, k2):
-    d[k1], d[k2] = d[k2], d[k1]
-
-
-def print_wires(gates):
-    with open('wires.txt', 'w') as f:
-        defined = {}
-        for wire in gates:
-            defined[wire] = define_in_root_terms(gates, wire)
-        for wire in sorted(defined, key=defined.get):
-            f.write(f'{wire} = {define_in_root_terms(gates, wire)}\n')
-
-
 def part2(path):
     values, gates = load(path)
     x = make_num(values, (wire for wire in values if wire.startswith('x')))
     y = make_num(values, (wire for wire in values if wire.startswith('y')))
     expected_value = x + y
-    value = perform(values, gates)
+    netlist = Netlist(values, gates)
+    value = make_num(netlist.evaluate(values), netlist.outputs)
     print(f'{x:046b}')
     print(f'{y:046b}')
     print(f'{expected_value:046b}')
     print(f'{value:046b}')
     print(f'{(x + y) ^ (value):046b}')
-    prev_deps = set()
-    # bit 9:
-    # x09 AND y09 -> kfp
-    # y09 XOR x09 -> hbs
-    # bit 18:
-    # x18 AND y18 -> z18
-    # y18 XOR x18 -> fwt
-    # pvk XOR fwt -> dhq
-    # pvk AND fwt -> qdb
-    # bit 22:
-    # bqp OR gkg -> z22
-    # x22 AND y22 -> bqp
-    # dcm AND dbp -> gkg
-    # x22 XOR y22 -> dbp
-    # want z22 = dbp XOR dcm
-    # dcm XOR dbp -> pdg
-    # bit 27:
-    # ckj AND bch -> z27
-    # y27 XOR x27 -> ckj
-    swaps = [('kfp', 'hbs'), ('z18', 'dhq'), ('pdg', 'z22'), ('jcp', 'z27')]
-    for swap in swaps:
-        swap_vals(gates, *swap)
-    if perform(values, gates) == expected_value:
+
+    bits = sum(1 for wire in values if wire.startswith('x'))
+    if len(netlist.outputs) != bits + 1:
+        print('Not an adder')
+        return
+    swaps = find_swaps(values, gates, bits)
+    if swaps is None:
+        print('No swaps found')
+        return
+    fixed = Netlist(values, swapped(gates, swaps))
+    if make_num(fixed.evaluate(values), fixed.outputs) == expected_value:
         print('Swaps worked')
         swap_wires = [w for swap in swaps for w in swap]
         print(','.join(sorted(swap_wires)))
-        return
-
-    print_wires(gates)
-    # We know there are 46 bits
-    for bit in range(46):
-        wire = f'z{bit:02d}'
-        expected = (expected_value >> bit) & 1
-        bit_val = solve(values.copy(), gates, wire)
-        deps = find_dependencies(gates, wire, set())
-        print(f'{wire} = {define_in_root_terms(gates, wire)}')
-        if bit_val != expected:
-            print(f'{bit}: {bit_val} != {(expected_value >> bit) & 1}')
-            candidate_gates = deps - prev_deps
-            print(f'new_deps: {candidate_gates}')
-            bit_val = solve(values.copy(), gates, wire)
-
-            #for g1, g2 in combinations(candidate_gates, 2):
-            #    gates[g1], gates[g2] = gates[g2], gates[g1]
-            #    bit_val = solve(values, gates, wire)
-            #    if bit_val == expected:
-            #        print(f'Possible swap: {g1} <-> {g2}')
-            #    gates[g1], gates[g2] = gates[g2], gates[g1]
-            break
-        prev_deps = deps
-
-    #check_dependencies(gates)
-    #value = perform(values, gates)
-    #while value != expected_value:
-    #    diff = f'{(x + y) ^ (value):b}'
-    #    print(f'{diff}')
-    #    bad_bit = list(reversed(diff)).index('1')
-    #    print(f'{bad_bit}')
-    #    break
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('path')
+    parser.add_argument('--debug', '-d', action='store_true')
     args = parser.parse_args()
+    if args.debug:
+        common.debug.DEBUG = True
     part1(args.path)
     part2(args.path)
 
@@ -34,9 +34,7 @@ def load(path):
 
 def square_size(p1, p2):
     diff = p2 - p1
-    diff.x = abs(diff.x)
-    diff.y = abs(diff.y)
-    return (diff.x + 1) * (diff.y + 1)
+    return (abs(diff.x) + 1) * (abs(diff.y) + 1)
 
 
 def part1(path):
@@ -0,0 +1,155 @@
+"""
+Set and dict heavy workloads over common.point, against the mutable Point
+and Point3D classes it used to hold.
+
+    python bench_point.py [--size 300] [--repeat 3]
+"""
+import argparse
+from collections import deque
+from functools import total_ordering
+from pathlib import Path
+import sys
+import time
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent))
+
+
+from common.point import Point, Point3D, intern
+
+
+@total_ordering
+class LegacyPoint(object):
+    """common.point.Point as it was before it became a tuple, kept as the baseline"""
+    def __init__(self, x, y):
+        self.x = int(x)
+        self.y = int(y)
+
+    def __hash__(self):
+        return hash(self.tuple)
+
+    def __add__(self, other):
+        return LegacyPoint(self.x + other.x, self.y + other.y)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+    def __lt__(self, other):
+        return self.y < other.y or (self.y == other.y and self.x < other.x)
+
+    @property
+    def tuple(self):
+        return self.x, self.y
+
+
+@total_ordering
+class LegacyPoint3D(object):
+    """common.point.Point3D as it was before it became a tuple, kept as the baseline"""
+    def __init__(self, *dims):
+        self.dims = list(dims)
+        self._tuple = None
+
+    @property
+    def tuple(self):
+        if not self._tuple:
+            self._tuple = tuple(reversed(self.dims))
+        return self._tuple
+
+    def __hash__(self):
+        return hash(self.tuple)
+
+    def __add__(self, other):
+        return LegacyPoint3D(*(s + o for s, o in zip(self.dims, other.dims)))
+
+    def __eq__(self, other):
+        return self.tuple == other.tuple
+
+    def __lt__(self, other):
+        return self.tuple < other.tuple
+
+
+def bfs(P, size):
+    """Distances from the corner of an open size x size grid, dict keyed by point"""
+    start = P(0, 0)
+    steps = [P(0, -1), P(1, 0), P(0, 1), P(-1, 0)]
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        p = queue.popleft()
+        d = dist[p] + 1
+        for step in steps:
+            n = p + step
+            if 0 <= n.x < size and 0 <= n.y < size and n not in dist:
+                dist[n] = d
+                queue.append(n)
+    return sum(dist.values())
+
+
+def bfs_interned(P, size):
+    """bfs with every point interned, so the dict finds its keys by identity"""
+    start = intern(P(0, 0))
+    steps = [P(0, -1), P(1, 0), P(0, 1), P(-1, 0)]
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        p = queue.popleft()
+        d = dist[p] + 1
+        for step in steps:
+            n = p + step
+            if 0 <= n.x < size and 0 <= n.y < size and n not in dist:
+                n = intern(n)
+                dist[n] = d
+                queue.append(n)
+    return sum(dist.values())
+
+
+def surface(P, size):
+    """Exposed faces of a cube of cubes with every other one missing, set of points"""
+    cubes = {P(x, y, z) for x in range(size) for y in range(size) for z in range(size) if (x + y + z) % 2}
+    steps = [P(1, 0, 0), P(-1, 0, 0), P(0, 1, 0), P(0, -1, 0), P(0, 0, 1), P(0, 0, -1)]
+    return sum(1 for c in cubes for step in steps if c + step not in cubes)
+
+
+def sorting(P, size):
+    """Sort the points of a size x size grid given in column order"""
+    points = [P(x, y) for x in range(size) for y in range(size)]
+    return sorted(points)[size + 1] == P(1, 1)
+
+
+def timed(f, P, size, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f(P, size)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=300, help='grid side, the cube side is a tenth of it')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cube = max(2, args.size // 10)
+    workloads = [
+        ('bfs', bfs, args.size, LegacyPoint, [('Point', bfs, Point), ('interned', bfs_interned, Point)]),
+        ('surface', surface, cube, LegacyPoint3D, [('Point3D', surface, Point3D)]),
+        ('sort', sorting, args.size, LegacyPoint, [('Point', sorting, Point)]),
+    ]
+    for workload, legacy, size, legacy_class, runners in workloads:
+        expected, legacy_time = timed(legacy, legacy_class, size, args.repeat)
+        print("{:>8} {:>9}: {:8.3f}s".format(workload, 'legacy', legacy_time))
+        for name, f, P in runners:
+            result, elapsed = timed(f, P, size, args.repeat)
+            if result != expected:
+                raise Exception("{} {} produced {}, expected {}".format(workload, name, result, expected))
+            print("{:>8} {:>9}: {:8.3f}s {:6.1f}x".format(workload, name, elapsed, legacy_time / elapsed))
+
+
+if __name__ == "__main__":
+    main()
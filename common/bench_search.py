@@ -0,0 +1,249 @@
+"""
+Every applicable common.search algorithm on the graph of each day that has
+a shortest path search, built from that day's input.  The answers have to
+agree, the times are the best of --repeat runs.
+
+    python bench_search.py [--repeat 3]
+"""
+import argparse
+from pathlib import Path
+import re
+import sys
+import time
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent))
+
+
+from common import search
+
+
+ROOT = SCRIPT_DIR.parent
+
+
+def grid_neighbors(width, size, cost, reverse=False):
+    """
+    Neighbors over cells numbered row by row.  cost(i, n) is the cost of the
+    step from i to n, None if it cannot be taken.  With reverse the steps
+    are taken backwards, from n into i.
+    """
+    def neighbors(i):
+        x = i % width
+        for n, ok in ((i + 1, x + 1 < width), (i + width, i + width < size), (i - 1, x > 0), (i - width, i >= width)):
+            if ok:
+                w = cost(n, i) if reverse else cost(i, n)
+                if w is not None:
+                    yield n, w
+    return neighbors
+
+
+def manhattan(width, target):
+    tx, ty = target % width, target // width
+    return lambda i: abs(i % width - tx) + abs(i // width - ty)
+
+
+def chitons():
+    """2021 day 15 part 2, the risk map tiled five times each way"""
+    with open(ROOT / '2021' / 'Day15' / 'input.txt') as f:
+        tile = [[int(c) for c in line.strip()] for line in f if line.strip()]
+    rows = [[(v + i - 1) % 9 + 1 for i in range(5) for v in row] for row in tile]
+    rows = [[(v + i - 1) % 9 + 1 for v in row] for i in range(5) for row in rows]
+    width = len(rows[0])
+    risk = [v for row in rows for v in row]
+    size = len(risk)
+    cost = lambda i, n: risk[n]
+    target = size - 1
+    forward = grid_neighbors(width, size, cost)
+    reverse = grid_neighbors(width, size, cost, reverse=True)
+    goal = lambda i: i == target
+    return [
+        ('dijkstra', lambda: search.dijkstra([0], forward, size, goal).cost),
+        ('astar', lambda: search.astar([0], forward, manhattan(width, target), size, goal).cost),
+        ('dial', lambda: search.dial([0], forward, 9, size, goal).cost),
+        ('bidirectional', lambda: search.bidirectional(0, target, forward, reverse, size)),
+    ]
+
+
+def hill():
+    """2022 day 12 part 2, from every 'a' to 'E'"""
+    with open(ROOT / '2022' / 'Day12' / 'input.txt') as f:
+        rows = [line.strip() for line in f if line.strip()]
+    width = len(rows[0])
+    cells = ''.join(rows)
+    size = len(cells)
+    target = cells.index('E')
+    heights = [ord({'S': 'a', 'E': 'z'}.get(c, c)) for c in cells]
+    cost = lambda i, n: 1 if heights[n] <= heights[i] + 1 else None
+    forward = grid_neighbors(width, size, cost)
+    reverse = grid_neighbors(width, size, cost, reverse=True)
+    starts = [i for i, h in enumerate(heights) if h == ord('a')]
+    goal = lambda i: i == target
+    return [
+        ('dijkstra', lambda: search.dijkstra(starts, forward, size, goal).cost),
+        ('astar', lambda: search.astar(starts, forward, manhattan(width, target), size, goal).cost),
+        ('zero_one_bfs', lambda: search.zero_one_bfs(starts, forward, size, goal).cost),
+        ('dial', lambda: search.dial(starts, forward, 1, size, goal).cost),
+        # From the end back to the nearest 'a'
+        ('backwards', lambda: search.zero_one_bfs([target], reverse, size, lambda i: heights[i] == ord('a')).cost),
+    ]
+
+
+def valves():
+    """2022 day 16, the distance between every pair of valves, states are names"""
+    graph = {}
+    with open(ROOT / '2022' / 'Day16' / 'input.txt') as f:
+        for line in f:
+            name, _, edges = re.match(r'Valve (\w+) .+ rate=(\d+); .+valves? (.+)', line).groups()
+            graph[name] = edges.split(', ')
+    neighbors = lambda valve: ((n, 1) for n in graph[valve])
+
+    def all_pairs(f):
+        return sum(sum(f([valve], neighbors).dist.values()) for valve in graph)
+
+    return [
+        ('dijkstra', lambda: all_pairs(search.dijkstra)),
+        ('zero_one_bfs', lambda: all_pairs(search.zero_one_bfs)),
+        ('dial', lambda: all_pairs(lambda starts, neighbors: search.dial(starts, neighbors, 1))),
+    ]
+
+
+def reindeer():
+    """2024 day 16, best score and the tiles on every best path"""
+    with open(ROOT / '2024' / 'day16' / 'input.txt') as f:
+        rows = [line.strip() for line in f if line.strip()]
+    width = len(rows[0])
+    cells = ''.join(rows)
+    size = len(cells) * 4
+    start = cells.index('S') * 4 + 1
+    end = cells.index('E')
+    walls = [c == '#' for c in cells]
+    offsets = (-width, 1, width, -1)
+
+    def neighbors(state):
+        cell, dir_ = divmod(state, 4)
+        ahead = cell + offsets[dir_]
+        if not walls[ahead]:
+            yield ahead * 4 + dir_, 1
+        yield cell * 4 + (dir_ + 1) % 4, 1000
+        yield cell * 4 + (dir_ + 3) % 4, 1000
+
+    goal = lambda state: state // 4 == end
+    h = manhattan(width, end)
+
+    def answer(result):
+        return result.cost, len({state // 4 for state in result.on_best_paths()})
+
+    return [
+        ('dijkstra', lambda: answer(search.dijkstra([start], neighbors, size, goal, predecessors=True))),
+        ('astar', lambda: answer(search.astar([start], neighbors, lambda state: h(state // 4), size, goal, predecessors=True))),
+        ('dial', lambda: answer(search.dial([start], neighbors, 1000, size, goal, predecessors=True))),
+    ]
+
+
+def ram():
+    """2024 day 18 part 1, across the memory space after the first 1024 bytes"""
+    with open(ROOT / '2024' / 'day18' / 'input.txt') as f:
+        fallen = [tuple(int(v) for v in line.split(',')) for line in f if line.strip()]
+    width = 71
+    size = width * width
+    blocked = bytearray(size)
+    for x, y in fallen[:1024]:
+        blocked[y * width + x] = 1
+    neighbors = grid_neighbors(width, size, lambda i, n: None if blocked[n] else 1)
+    target = size - 1
+    goal = lambda i: i == target
+    return [
+        ('dijkstra', lambda: search.dijkstra([0], neighbors, size, goal).cost),
+        ('astar', lambda: search.astar([0], neighbors, manhattan(width, target), size, goal).cost),
+        ('zero_one_bfs', lambda: search.zero_one_bfs([0], neighbors, size, goal).cost),
+        ('dial', lambda: search.dial([0], neighbors, 1, size, goal).cost),
+        ('bidirectional', lambda: search.bidirectional(0, target, neighbors, size=size)),
+    ]
+
+
+def cave():
+    """2018 day 22 part 2, states are cell * 3 + tool"""
+    with open(ROOT / '2018' / 'Day22' / 'input.txt') as f:
+        depth, tx, ty = (int(v) for v in re.findall(r'\d+', f.read()))
+    # As 2018 day 22, a margin round the target to search in
+    width, height = 107, 871
+    erosion = [0] * (width * height)
+    for y in range(height):
+        for x in range(width):
+            if (x, y) in ((0, 0), (tx, ty)):
+                index = 0
+            elif y == 0:
+                index = x * 16807
+            elif x == 0:
+                index = y * 48271
+            else:
+                index = erosion[y * width + x - 1] * erosion[(y - 1) * width + x]
+            erosion[y * width + x] = (index + depth) % 20183
+    types = [e % 3 for e in erosion]
+    size = len(types)
+    # Tool i cannot be used in rooms of type i: 0 rocky/neither, 1 wet/torch,
+    # 2 narrow/gear.  Changing tools is a step of its own, unlike the day's
+    # search which only changes them on the way into a room.
+
+    def neighbors(state):
+        cell, tool = divmod(state, 3)
+        other = 3 - types[cell] - tool
+        yield cell * 3 + other, 7
+        x = cell % width
+        for n, ok in ((cell + 1, x + 1 < width), (cell + width, cell + width < size), (cell - 1, x > 0), (cell - width, cell >= width)):
+            if ok and types[n] != tool:
+                yield n * 3 + tool, 1
+
+    start = 1
+    target = (ty * width + tx) * 3 + 1
+    goal = lambda state: state == target
+    h = manhattan(width, ty * width + tx)
+    return [
+        ('dijkstra', lambda: search.dijkstra([start], neighbors, size * 3, goal).cost),
+        ('astar', lambda: search.astar([start], neighbors, lambda state: h(state // 3), size * 3, goal).cost),
+        ('dial', lambda: search.dial([start], neighbors, 7, size * 3, goal).cost),
+        ('bidirectional', lambda: search.bidirectional(start, target, neighbors, size=size * 3)),
+    ]
+
+
+DAYS = [
+    ('2021/15', chitons),
+    ('2022/12', hill),
+    ('2022/16', valves),
+    ('2024/16', reindeer),
+    ('2024/18', ram),
+    ('2018/22', cave),
+]
+
+
+def timed(f, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for day, build in DAYS:
+        expected = None
+        for name, f in build():
+            result, elapsed = timed(f, args.repeat)
+            if expected is None:
+                expected = result
+            elif result != expected:
+                raise Exception("{} {} produced {}, expected {}".format(day, name, result, expected))
+            print("{:>8} {:>14}: {:8.3f}s  {}".format(day, name, elapsed, result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+The compiled elfcode executor, with and without loop summaries, against the
+stepping one on the same programs: a few written to jump with every kind of
+opcode, 2018 day 19 part 1, and random programs that halt.  Any program the
+executors disagree on is printed with both results.  A compiled executor
+that takes a jump wrong can also go round for ever where the stepping one
+halts, which shows as the check never finishing.
+
+    python check_elfcode.py [--programs 2000] [--seed 0]
+"""
+import argparse
+from pathlib import Path
+import random
+import sys
+
+
+# Add the common directory to the path
+SCRIPT_DIR = Path(__file__).absolute().parent
+sys.path.append(str(SCRIPT_DIR.parent))
+
+
+from common.elfcode import OPCODE_NAMES, Machine, load_program, parse_instruction
+
+
+ROOT = SCRIPT_DIR.parent
+
+# The steps a random program gets to halt in on the stepping executor
+MAX_STEPS = 1000
+# And day 19 part 1, which takes a few million
+DAY19_STEPS = 100000000
+
+# Programs that write the ip with the result of a comparison or a bit
+# operation, which has to be taken whole before the ip moves past it
+JUMPS = [
+    '#ip 1\nseti 5 0 2\ngtri 2 1 1\nseti 9 0 0\nseti 7 0 3',
+    '#ip 1\nseti 5 0 2\ngtir 9 2 1\nseti 9 0 0\nseti 7 0 3',
+    '#ip 1\nseti 5 0 2\ngtrr 2 0 1\nseti 9 0 0\nseti 7 0 3',
+    '#ip 1\nseti 5 0 2\neqri 2 5 1\nseti 9 0 0\nseti 7 0 3',
+    '#ip 1\nseti 5 0 2\neqir 5 2 1\nseti 9 0 0\nseti 7 0 3',
+    '#ip 1\nseti 1 0 2\neqrr 2 1 1\nseti 9 0 0\nseti 7 0 3',
+    '#ip 1\nseti 6 0 2\nbani 2 3 1\nseti 9 0 0\nseti 8 0 0\nseti 7 0 3',
+    '#ip 1\nseti 6 0 2\nbanr 2 2 1\nseti 9 0 0\nseti 8 0 0\nseti 7 0 3\naddi 0 1 0',
+    '#ip 1\nseti 2 0 2\nbori 2 1 1\nseti 9 0 0\nseti 8 0 0\nseti 7 0 3',
+    '#ip 1\nseti 2 0 2\nborr 2 1 1\nseti 9 0 0\nseti 8 0 0\nseti 7 0 3',
+    # A counted loop whose exit test jumps over the jump back
+    '#ip 4\nseti 0 0 1\naddi 1 1 1\ngtri 1 9 2\naddr 2 4 4\nseti 0 0 4\naddi 0 1 0',
+]
+
+
+def parse_program(text):
+    ip_reg = None
+    program = []
+    for line in text.splitlines():
+        if line.startswith('#ip'):
+            ip_reg = int(line.split()[1])
+        elif line.strip():
+            program.append(parse_instruction(line))
+    return ip_reg, program
+
+
+def random_program(rng, nregs=6):
+    ip_reg = rng.randrange(nregs)
+    program = []
+    for _ in range(rng.randrange(2, 12)):
+        name = rng.choice(OPCODE_NAMES)
+        program.append((name, (rng.randrange(nregs), rng.randrange(nregs), rng.randrange(nregs))))
+    return ip_reg, program
+
+
+def stepped(ip_reg, program, regs, steps):
+    """The registers and ip the stepping executor halts with, None if it runs out of steps"""
+    m = Machine(ip_reg, program)
+    m.load_registers(regs)
+    if m.run_program(steps=steps):
+        return None
+    return m.regs, m.ip
+
+
+def compiled(ip_reg, program, regs, accelerate):
+    m = Machine(ip_reg, program)
+    m.accelerate = accelerate
+    m.load_registers(regs)
+    m.run_program()
+    return m.regs, m.ip
+
+
+def check(label, ip_reg, program, regs, steps=MAX_STEPS):
+    """Whether the executors agree, None when the program does not halt in steps"""
+    expected = stepped(ip_reg, program, regs, steps)
+    if expected is None:
+        return None
+    ok = True
+    for accelerate in (False, True):
+        actual = compiled(ip_reg, program, regs, accelerate)
+        if actual != expected:
+            ok = False
+            print('{} accelerate={}: stepping {} compiled {}'.format(label, accelerate, expected, actual))
+            print('#ip {}'.format(ip_reg))
+            for name, args in program:
+                print(name, *args)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--programs', type=int, default=2000, help='how many random programs to try')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    failures = 0
+    for i, text in enumerate(JUMPS):
+        ip_reg, program = parse_program(text)
+        if not check('jump {}'.format(i), ip_reg, program, [0] * 6):
+            failures += 1
+    print('{} jump programs'.format(len(JUMPS)))
+
+    day19 = ROOT / '2018' / 'Day19' / 'input.txt'
+    if day19.exists():
+        ip_reg, program = load_program(day19)
+        if not check('2018 day 19', ip_reg, program, [0] * 6, steps=DAY19_STEPS):
+            failures += 1
+        print('2018 day 19 part 1')
+
+    rng = random.Random(args.seed)
+    halted = 0
+    for i in range(args.programs):
+        ip_reg, program = random_program(rng)
+        regs = [rng.randrange(8) for _ in range(6)]
+        ok = check('random {}'.format(i), ip_reg, program, regs)
+        if ok is not None:
+            halted += 1
+            failures += not ok
+    print('{} random programs, {} halted'.format(args.programs, halted))
+
+    print('{} disagreements'.format(failures))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
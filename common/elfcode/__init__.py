@@ -0,0 +1,3 @@
+from .opcodes import OPCODES, OPCODE_NAMES, OPERATIONS, expression, make_operation
+from .machine import Machine, load_program, parse_instruction
+from .loops import Loop, summarize_loops
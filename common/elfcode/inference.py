@@ -0,0 +1,95 @@
+"""
+Batch opcode inference from (before, instruction, after) samples, 2018 day 16.
+
+The samples are held as (n, 4) NumPy arrays and every opcode is evaluated
+over all of them at once.  This module needs NumPy, which is why the package
+does not import it.
+"""
+import re
+
+import numpy as np
+
+from .opcodes import OPCODES, OPCODE_NAMES, symbol
+
+
+SAMPLE_RE = re.compile(
+    r'Before:\s*\[(\d+), (\d+), (\d+), (\d+)\]\s+'
+    r'(\d+) (\d+) (\d+) (\d+)\s+'
+    r'After:\s*\[(\d+), (\d+), (\d+), (\d+)\]')
+
+UFUNCS = {
+    '+': np.add,
+    '*': np.multiply,
+    '&': np.bitwise_and,
+    '|': np.bitwise_or,
+    '>': np.greater,
+    '==': np.equal,
+}
+
+
+def load_samples(input):
+    """The before registers, instructions and after registers as three (n, 4) arrays"""
+    with open(input, 'r') as f:
+        samples = np.array(SAMPLE_RE.findall(f.read()), dtype=np.int64).reshape(-1, 12)
+    return samples[:, 0:4], samples[:, 4:8], samples[:, 8:12]
+
+
+def sample_matches(before, instructions, after):
+    """
+    A (16, n) boolean array, true where the opcode in OPCODE_NAMES order
+    turns the sample's before registers into its after registers.
+    """
+    nregs = before.shape[1]
+    rows = np.arange(len(before))
+    a, b, c = instructions[:, 1], instructions[:, 2], instructions[:, 3]
+    # Out of range register operands are masked off below, read register 0 meanwhile
+    reg_a = before[rows, np.where(a < nregs, a, 0)]
+    reg_b = before[rows, np.where(b < nregs, b, 0)]
+    valid_c = c < nregs
+    target = after[rows, np.where(valid_c, c, 0)]
+    # Every register but c has to come through unchanged
+    untouched = ((before == after) | (np.arange(nregs) == c[:, None])).all(axis=1) & valid_c
+
+    matches = np.empty((len(OPCODE_NAMES), len(before)), dtype=bool)
+    for i, name in enumerate(OPCODE_NAMES):
+        kind_a, kind_b, _ = OPCODES[name]
+        x = reg_a if kind_a == 'r' else a
+        y = reg_b if kind_b == 'r' else b
+        op = symbol(name)
+        value = x if op is None else UFUNCS[op](x, y)
+        match = (value == target) & untouched
+        if kind_a == 'r':
+            match &= a < nregs
+        if kind_b == 'r':
+            match &= b < nregs
+        matches[i] = match
+    return matches
+
+
+def solve_opcodes(opcodes, matches):
+    """
+    Assign every opcode number to the opcode that matched all of its samples,
+    by constraint propagation: a number with one candidate left takes it,
+    which removes that opcode from every other number.  Returns a dict from
+    number to opcode name, in the order they were decided.
+    """
+    numbers = np.unique(opcodes)
+    # failures[i, j]: samples of numbers[i] that opcode j does not explain
+    seen = (opcodes == numbers[:, None]).astype(np.int64)
+    failures = seen @ (~matches).T.astype(np.int64)
+    possible = failures == 0
+
+    assigned = {}
+    while len(assigned) < len(numbers):
+        decided = np.flatnonzero(possible.sum(axis=1) == 1)
+        decided = [i for i in decided if numbers[i] not in assigned]
+        if not decided:
+            raise Exception("Opcode assignment is ambiguous")
+        for i in decided:
+            if possible[i].sum() != 1:
+                raise Exception("No opcode left for {}".format(numbers[i]))
+            j = np.flatnonzero(possible[i])[0]
+            assigned[int(numbers[i])] = OPCODE_NAMES[j]
+            possible[:, j] = False
+            possible[i, j] = True
+    return assigned
@@ -0,0 +1,527 @@
+"""
+Loop recognition for elfcode programs.
+
+Every backward jump to a constant address marks a loop.  Its body is run
+once symbolically, forking at each conditional jump, which gives the
+register values and branch conditions of every path through one iteration
+as expressions of the registers at the loop head.  A loop is summarized
+when it has the shape of a counted loop:
+
+- one counter register that every iteration increments by one,
+- one exit test, monotone in the counter, that decides between looping and
+  leaving,
+- accumulator registers that every iteration adds a (possibly conditional)
+  amount to, which depends only on the counter and the invariants,
+- temporaries, which are written before they are read,
+- and invariants, which the loop does not change.
+
+The summary skips straight to the last iteration: the counter is set to the
+first value that passes the exit test, the accumulators get the sum of what
+the skipped iterations would have added, and the exit path is applied on
+top.  The sums are solved in closed form where the amount is linear in the
+counter, or only non-zero where a linear equation in the counter holds, and
+by walking the divisors where it is only non-zero when the counter divides
+something.  Inner loops are summarized first and become a single step in the
+loops around them, which is how the divisor sum of a double loop is found.
+
+Every summary is checked against the plain interpreter on a set of small
+register states before it is used, and summaries fall back to running the
+loop when the runtime values fall outside what they handle (a zero divisor,
+a divisor range including zero).
+"""
+from itertools import count
+import operator
+import random
+
+from .opcodes import OPCODES, OPERATIONS, symbol
+
+
+# Symbolic expressions are ints, the leaves ('reg', n) and ('var', n), or
+# (op, *operands) tuples
+LEAVES = ('reg', 'var')
+BOOLEAN = {'>', '==', '<', '<=', 'and'}
+COMMUTATIVE = {'+', '*', '&', '|', '==', 'max', 'and'}
+FOLD = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '&': operator.and_,
+    '|': operator.or_,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    'max': max,
+    '>': lambda a, b: 1 if a > b else 0,
+    '==': lambda a, b: 1 if a == b else 0,
+    '<': lambda a, b: 1 if a < b else 0,
+    '<=': lambda a, b: 1 if a <= b else 0,
+    'and': lambda a, b: 1 if a and b else 0,
+}
+
+# Limits on the symbolic run of one iteration
+MAX_PATH_STEPS = 256
+MAX_PATHS = 64
+
+# Register states each summary is checked on, and the steps the
+# interpreter gets to finish the loop for each
+VERIFY_SAMPLES = 64
+VERIFY_STEPS = 20000
+
+_variables = count()
+
+
+class NotSummarizable(Exception):
+    pass
+
+
+def reg(n):
+    return ('reg', n)
+
+
+def make(op, *args):
+    """Build an expression node, folding constants and trivial identities"""
+    if op == 'if':
+        cond, then, other = args
+        if isinstance(cond, int):
+            return then if cond else other
+        return other if then == other else ('if', cond, then, other)
+    if op not in FOLD:
+        return (op,) + args
+    a, b = args
+    if isinstance(a, int) and isinstance(b, int):
+        try:
+            return FOLD[op](a, b)
+        except ZeroDivisionError:
+            return (op, a, b)
+    if op in COMMUTATIVE and isinstance(a, int):
+        a, b = b, a
+    if b == 0 and op in ('+', '-', '|') or b == 1 and op in ('*', '//'):
+        return a
+    if (op in ('+', '-') and isinstance(b, int) and
+            isinstance(a, tuple) and a[0] in ('+', '-') and isinstance(a[2], int)):
+        # (x + c) + d == x + (c + d)
+        c = a[2] if a[0] == '+' else -a[2]
+        return make('+', a[1], c + (b if op == '+' else -b))
+    if b == 0 and op in ('*', '&'):
+        return 0
+    if op == 'and' and isinstance(b, int):
+        return a if b else 0
+    if op == '-' and a == b:
+        return 0
+    return (op, a, b)
+
+
+def mentions(expr, leaf):
+    if isinstance(expr, int):
+        return False
+    if expr[0] in LEAVES:
+        return expr == leaf
+    return any(mentions(arg, leaf) for arg in expr[1:])
+
+
+def substitute(expr, env):
+    """Replace the leaves in env with their expressions"""
+    if isinstance(expr, int):
+        return expr
+    if expr[0] in LEAVES:
+        return env.get(expr, expr)
+    return make(expr[0], *(substitute(arg, env) for arg in expr[1:]))
+
+
+def terms(expr):
+    if isinstance(expr, tuple) and expr[0] == '+':
+        return terms(expr[1]) + terms(expr[2])
+    return [expr]
+
+
+def total(items):
+    result = 0
+    for item in items:
+        result = make('+', result, item)
+    return result
+
+
+def difference(a, b):
+    remaining = terms(a)
+    for term in terms(b):
+        if term not in remaining:
+            return make('-', a, b)
+        remaining.remove(term)
+    return total(remaining)
+
+
+def conjuncts(cond):
+    if isinstance(cond, tuple) and cond[0] == 'and':
+        return conjuncts(cond[1]) + conjuncts(cond[2])
+    return [cond]
+
+
+def linear(expr, var):
+    """(a, b) with expr == a * var + b and neither mentioning var, or None"""
+    if not mentions(expr, var):
+        return 0, expr
+    if expr == var:
+        return 1, 0
+    op = expr[0]
+    if op in ('+', '-'):
+        left, right = linear(expr[1], var), linear(expr[2], var)
+        if left and right:
+            return make(op, left[0], right[0]), make(op, left[1], right[1])
+    elif op == '*':
+        for x, y in (expr[1], expr[2]), (expr[2], expr[1]):
+            inner = linear(x, var)
+            if inner and not mentions(y, var):
+                return make('*', inner[0], y), make('*', inner[1], y)
+    return None
+
+
+def increment(expr, r):
+    """What expr adds to the register leaf r, or None if it is not r plus something"""
+    if isinstance(expr, tuple) and expr[0] == 'if' and not mentions(expr[1], r):
+        then, other = increment(expr[2], r), increment(expr[3], r)
+        if then is None or other is None:
+            return None
+        return make('if', expr[1], then, other)
+    items = terms(expr)
+    if items.count(r) != 1:
+        return None
+    items.remove(r)
+    rest = total(items)
+    return None if mentions(rest, r) else rest
+
+
+def divides(a, b):
+    return make('==', make('%', b, a), 0)
+
+
+def summation(body, var, lo, hi):
+    """The sum of body for var in range(lo, hi), as an expression without var"""
+    if not mentions(body, var):
+        return make('*', body, make('-', hi, lo))
+    if body[0] == '+':
+        return make('+', summation(body[1], var, lo, hi), summation(body[2], var, lo, hi))
+    if body[0] == 'if':
+        cond, then, other = body[1:]
+        if other != 0:
+            return make('+', summation(other, var, lo, hi),
+                        summation(make('if', cond, difference(then, other), 0), var, lo, hi))
+        return conditional_sum(cond, then, var, lo, hi)
+    line = linear(body, var)
+    if line:
+        # Arithmetic series
+        a, b = line
+        n = make('-', hi, lo)
+        return make('+', make('*', a, make('//', make('*', make('-', make('+', lo, hi), 1), n), 2)),
+                    make('*', b, n))
+    raise NotSummarizable("Can't sum {}".format(body))
+
+
+def conditional_sum(cond, then, var, lo, hi):
+    """The sum of then for the var in range(lo, hi) where cond holds"""
+    if not mentions(cond, var):
+        return make('if', cond, summation(then, var, lo, hi), 0)
+    literals = conjuncts(cond)
+    for literal in literals:
+        if not isinstance(literal, tuple) or literal[0] != '==':
+            continue
+        for side, other in (literal[1], literal[2]), (literal[2], literal[1]):
+            line = linear(side, var)
+            if mentions(other, var) or not line or line[0] == 0:
+                continue
+            # A linear equation in var holds at one point at most
+            a, b = line
+            rest = make('-', other, b)
+            point = make('//', rest, a)
+            test = make('and', make('and', divides(a, rest), make('<=', lo, point)), make('<', point, hi))
+            for remaining in literals:
+                if remaining is not literal:
+                    test = make('and', test, substitute(remaining, {var: point}))
+            return make('if', test, substitute(then, {var: point}), 0)
+    for literal in literals:
+        # var divides something it does not appear in
+        if (isinstance(literal, tuple) and literal[0] == '==' and literal[2] == 0 and
+                isinstance(literal[1], tuple) and literal[1][0] == '%' and literal[1][2] == var and
+                not mentions(literal[1][1], var)):
+            return make('divsum', var, literal[1][1], lo, hi, cond, then)
+    raise NotSummarizable("Can't sum over {}".format(cond))
+
+
+def divisors(n, lo, hi):
+    """The divisors of n in range(lo, hi)"""
+    if hi <= lo:
+        return []
+    if n < 1 or lo < 1:
+        raise ValueError("Divisors of {} from {}".format(n, lo))
+    small = []
+    large = []
+    d = 1
+    while d * d <= n:
+        if n % d == 0:
+            small.append(d)
+            if d * d != n:
+                large.append(n // d)
+        d += 1
+    return [d for d in small + large[::-1] if lo <= d < hi]
+
+
+def expression_source(expr):
+    if isinstance(expr, int):
+        return str(expr)
+    op = expr[0]
+    if op == 'reg':
+        return 'r{}'.format(expr[1])
+    if op == 'var':
+        return 'v{}'.format(expr[1])
+    if op == 'if':
+        return '({} if {} else {})'.format(*map(expression_source, (expr[2], expr[1], expr[3])))
+    if op == 'divsum':
+        var, n, lo, hi, cond, then = map(expression_source, expr[1:])
+        return 'sum({} for {} in divisors({}, {}, {}) if {})'.format(then, var, n, lo, hi, cond)
+    a, b = map(expression_source, expr[1:])
+    if op == 'max':
+        return 'max({}, {})'.format(a, b)
+    if op in BOOLEAN:
+        return '(1 if {} {} {} else 0)'.format(a, op, b)
+    return '({} {} {})'.format(a, op, b)
+
+
+def symbolic(name, a, b, regs):
+    """The value an instruction stores, in terms of the symbolic registers"""
+    kind_a, kind_b, _ = OPCODES[name]
+    x = regs[a] if kind_a == 'r' else a
+    y = regs[b] if kind_b == 'r' else b
+    op = symbol(name)
+    return x if op is None else make(op, x, y)
+
+
+def find_loops(program, ip_reg):
+    """(head, tail) of every constant jump backwards, innermost first"""
+    loops = []
+    if ip_reg is None:
+        return loops
+    for tail, (name, (a, b, c)) in enumerate(program):
+        if c != ip_reg:
+            continue
+        if name == 'seti':
+            head = a + 1
+        elif name == 'addi' and a == ip_reg:
+            head = tail + b + 1
+        else:
+            continue
+        if 0 <= head <= tail:
+            loops.append((head, tail))
+    return sorted(loops, key=lambda loop: loop[1] - loop[0])
+
+
+def iteration_paths(program, ip_reg, nregs, head, tail, summaries):
+    """
+    Every path through one iteration of the loop, as (conditions, regs, ip)
+    where conditions are the (expression, truth) of the branches taken and
+    ip is head for paths that go round again.
+    """
+    done = []
+    pending = [(head, [reg(r) for r in range(nregs)], (), 0)]
+    while pending:
+        ip, regs, conds, steps = pending.pop()
+        while steps == 0 or (ip != head and head <= ip <= tail):
+            steps += 1
+            if steps > MAX_PATH_STEPS:
+                raise NotSummarizable("Path too long")
+            if ip != head and ip in summaries:
+                inner = summaries[ip]
+                env = {reg(r): regs[r] for r in range(nregs)}
+                regs = [substitute(value, env) for value in inner.regs]
+                ip = inner.exit
+                continue
+            name, (a, b, c) = program[ip]
+            regs[ip_reg] = ip
+            value = symbolic(name, a, b, regs)
+            if c != ip_reg:
+                regs[c] = value
+                ip += 1
+            elif isinstance(value, int):
+                ip = value + 1
+            elif (value[0] == '+' and isinstance(value[2], int) and
+                    isinstance(value[1], tuple) and value[1][0] in BOOLEAN):
+                # Skip the next instruction if the condition holds
+                if len(done) + len(pending) >= MAX_PATHS:
+                    raise NotSummarizable("Too many paths")
+                pending.append((value[2] + 2, list(regs), conds + ((value[1], True),), steps))
+                conds = conds + ((value[1], False),)
+                ip = value[2] + 1
+            else:
+                raise NotSummarizable("Computed jump at {}".format(ip))
+        done.append((conds, regs, ip))
+    return done
+
+
+def merge(items):
+    """Combine the (conditions, value) of a tree of paths into one expression"""
+    first = items[0][1]
+    if all(value == first for _, value in items):
+        return first
+    if not items[0][0]:
+        raise NotSummarizable("Paths disagree")
+    cond = items[0][0][0][0]
+    sides = {True: [], False: []}
+    for conds, value in items:
+        for i, (c, truth) in enumerate(conds):
+            if c == cond:
+                sides[truth].append((conds[:i] + conds[i + 1:], value))
+                break
+        else:
+            raise NotSummarizable("Paths do not branch alike")
+    if not sides[False]:
+        return merge(sides[True])
+    if not sides[True]:
+        return merge(sides[False])
+    return make('if', cond, merge(sides[True]), merge(sides[False]))
+
+
+def first_exit(cond, truth, counter):
+    """The first counter value, from its value at the head, for which cond == truth"""
+    op, x, y = cond
+    if op != '>':
+        raise NotSummarizable("Exit test {}".format(cond))
+    if truth:
+        rising, limit = x, y
+    else:
+        # y > x is false once y >= x, or y > x - 1
+        rising, limit = y, make('-', x, 1)
+    line = linear(rising, counter)
+    if mentions(limit, counter) or not line or not isinstance(line[0], int) or line[0] <= 0:
+        raise NotSummarizable("Exit test {} is not monotone".format(cond))
+    # a * counter + b > limit  <=>  counter >= (limit - b) // a + 1
+    a, b = line
+    return make('max', counter, make('+', make('//', make('-', limit, b), a), 1))
+
+
+class Loop(object):
+    """
+    A summarized loop: regs are the registers on leaving it, as expressions
+    of the registers at the head, and exit the ip it leaves to.
+    """
+    def __init__(self, head, tail, regs, exit):
+        self.head = head
+        self.tail = tail
+        self.regs = regs
+        self.exit = exit
+        self._function = None
+
+    def source(self):
+        names = ', '.join('r{}'.format(r) for r in range(len(self.regs)))
+        return '\n'.join([
+            'def loop_{}({}):'.format(self.head, names),
+            '    try:',
+            '        return {}, {}'.format(', '.join(map(expression_source, self.regs)), self.exit),
+            '    except (ZeroDivisionError, ValueError):',
+            '        return None',
+        ]) + '\n'
+
+    def function(self):
+        """A function of the registers at the head giving the registers and ip on leaving, or None"""
+        if self._function is None:
+            namespace = {'divisors': divisors}
+            exec(compile(self.source(), '<elfcode loop {}>'.format(self.head), 'exec'), namespace)
+            self._function = namespace['loop_{}'.format(self.head)]
+        return self._function
+
+
+def summarize(program, ip_reg, nregs, head, tail, summaries):
+    paths = iteration_paths(program, ip_reg, nregs, head, tail, summaries)
+    again = [path for path in paths if path[2] == head]
+    leave = [path for path in paths if path[2] != head]
+    if not again or not leave or len({path[2] for path in leave}) != 1:
+        raise NotSummarizable("Not a loop with one exit")
+
+    # The branch every exit takes one way and every iteration the other
+    for cond, truth in leave[0][0]:
+        if (all((cond, truth) in path[0] for path in leave) and
+                all((cond, not truth) in path[0] for path in again)):
+            break
+    else:
+        raise NotSummarizable("No exit test")
+
+    def merged(group, r):
+        return merge([([c for c in conds if c[0] != cond], regs[r]) for conds, regs, _ in group])
+
+    nexts = [merged(again, r) for r in range(nregs)]
+    counters = [r for r in range(nregs)
+                if r != ip_reg and nexts[r] == make('+', reg(r), 1) and mentions(cond, reg(r))]
+    if len(counters) != 1:
+        raise NotSummarizable("No counter")
+    counter = counters[0]
+
+    used = [c for conds, _, _ in paths for c, _ in conds]
+    used.extend(value for _, regs, _ in paths for r, value in enumerate(regs) if r != ip_reg)
+    temps = []
+    accumulators = {}
+    for r in range(nregs):
+        if r in (ip_reg, counter):
+            continue
+        if not any(mentions(expr, reg(r)) for expr in used):
+            temps.append(r)
+        elif nexts[r] != reg(r):
+            accumulators[r] = increment(nexts[r], reg(r))
+            if accumulators[r] is None:
+                raise NotSummarizable("r{} is not an accumulator".format(r))
+    variant = [reg(r) for r in temps + list(accumulators)]
+    for expr in [cond] + list(accumulators.values()):
+        if any(mentions(expr, v) for v in variant):
+            raise NotSummarizable("{} depends on the loop state".format(expr))
+
+    last = first_exit(cond, truth, reg(counter))
+    var = ('var', next(_variables))
+    start = {reg(counter): last}
+    for r, amount in accumulators.items():
+        amount = substitute(amount, {reg(counter): var})
+        start[reg(r)] = make('+', reg(r), summation(amount, var, reg(counter), last))
+    regs = [substitute(merged(leave, r), start) for r in range(nregs)]
+    regs[ip_reg] = reg(ip_reg)
+    return Loop(head, tail, regs, leave[0][2])
+
+
+def interpret(program, ip_reg, regs, head, tail, limit):
+    """Run the loop from its head on the plain operations, the (regs, ip) it leaves with or None"""
+    ip = head
+    for _ in range(limit):
+        if not head <= ip <= tail:
+            return regs, ip
+        name, (a, b, c) = program[ip]
+        regs[ip_reg] = ip
+        OPERATIONS[name](regs, a, b, c)
+        ip = regs[ip_reg] + 1
+    return None
+
+
+def verify(loop, program, ip_reg, nregs):
+    """Check the summary against the interpreter on small register states"""
+    rng = random.Random(loop.head)
+    function = loop.function()
+    checked = 0
+    for _ in range(VERIFY_SAMPLES):
+        regs = [rng.randrange(16) for _ in range(nregs)]
+        expected = interpret(program, ip_reg, list(regs), loop.head, loop.tail, VERIFY_STEPS)
+        actual = function(*regs)
+        if expected is None or actual is None:
+            continue
+        expected_regs, expected_ip = expected
+        if actual[-1] != expected_ip or any(
+                actual[r] != expected_regs[r] for r in range(nregs) if r != ip_reg):
+            return False
+        checked += 1
+    return checked > 0
+
+
+def summarize_loops(program, ip_reg, nregs):
+    """Summaries of the loops in the program that can be summarized and verified, by head"""
+    summaries = {}
+    for head, tail in find_loops(program, ip_reg):
+        if head in summaries:
+            continue
+        try:
+            loop = summarize(program, ip_reg, nregs, head, tail, summaries)
+        except NotSummarizable:
+            continue
+        if verify(loop, program, ip_reg, nregs):
+            summaries[head] = loop
+    return summaries
@@ -0,0 +1,198 @@
+"""
+Elfcode (2018 days 16, 19 and 21) virtual machine.
+
+Every opcode is described once, as a pair of operand kinds and a Python
+expression template.  From that the machine builds two executors:
+
+- a compiled one, where the whole program becomes one generated function
+  with the registers held in locals and the value of the bound ip register
+  folded into each instruction as a constant.  Straight-line runs execute
+  without any dispatch; only writes to the ip register go back through a
+  binary if-tree on ip.  Breakpoints are compiled in, so a program without
+  them pays nothing for the feature.
+  Loops that loops.py can summarize are entered through their summary,
+  which skips straight to where the loop leaves.
+- a stepping one, a list of small prebuilt per-instruction functions, used
+  for step-limited runs and tracing.  It never skips loops, so it is the
+  reference the summaries are checked against.
+"""
+from .loops import summarize_loops
+from .opcodes import expression
+
+
+def parse_instruction(data):
+    data = data.split()
+    insn = data[0]
+    args = tuple(map(int, data[1:]))
+    return insn, args
+
+
+def load_program(input):
+    instructions = []
+    ip_reg = None
+    with open(input, 'r') as f:
+        for line in f:
+            if line.startswith("#ip"):
+                ip_reg = int(line.split()[1])
+            elif line.strip():
+                instructions.append(parse_instruction(line))
+    return ip_reg, instructions
+
+
+class Machine(object):
+    def __init__(self, ip_reg, program, nregs=6):
+        self.regs = [0] * nregs
+        self.ip = 0
+        self.ip_reg = ip_reg
+        self.program = program
+        self.reg_format = "{:12}"
+        # Let the compiled executor skip through summarized loops
+        self.accelerate = True
+        self._step_functions = None
+        self._compiled = {}
+        self._loops = None
+
+    def load_registers(self, regs):
+        self.regs = list(regs)
+
+    def reg_str(self):
+        return ', '.join(("{}: " + self.reg_format).format(idx, val) for idx, val in enumerate(self.regs))
+
+    def insn_str(self, ip=None):
+        if ip is None:
+            ip = self.ip
+        return "{} {}".format(self.program[ip][0], " ".join(map(str, self.program[ip][1])))
+
+    def state_str(self, ip=None):
+        if ip is None:
+            ip = self.ip
+        return "{:2} {:20} {}".format(ip, self.insn_str(ip), self.reg_str())
+
+    def step_functions(self):
+        """The stepping executor: one prebuilt function per instruction, taking the registers"""
+        if self._step_functions is None:
+            self._step_functions = []
+            for ip, (name, (a, b, c)) in enumerate(self.program):
+                namespace = {}
+                source = 'def step_{}(regs):\n    regs[{}] = {}\n'.format(
+                    ip, c, expression(name, a, b, lambda r: 'regs[{}]'.format(r)))
+                exec(compile(source, '<elfcode {}>'.format(ip), 'exec'), namespace)
+                self._step_functions.append(namespace['step_{}'.format(ip)])
+        return self._step_functions
+
+    def loops(self):
+        """Summaries of the program's loops by head ip, see loops.py"""
+        if self._loops is None:
+            self._loops = summarize_loops(self.program, self.ip_reg, len(self.regs))
+        return self._loops
+
+    def accelerated(self, breakpoints=()):
+        """The loop summaries the compiled executor uses, those without a breakpoint inside"""
+        if not self.accelerate:
+            return {}
+        return {head: loop for head, loop in self.loops().items()
+                if not any(head <= bp <= loop.tail for bp in breakpoints)}
+
+    def source(self, breakpoints=()):
+        """Generate the compiled executor for the program, stopping after any ip in breakpoints"""
+        program = self.program
+        ip_reg = self.ip_reg
+        size = len(program)
+        names = ['r{}'.format(i) for i in range(len(self.regs))]
+        loops = self.accelerated(breakpoints)
+
+        def entry(start):
+            """Straight-line code from start up to the first jump, breakpoint or the end"""
+            lines = []
+            ip = start
+            while ip < size:
+                if ip in loops:
+                    lines.extend([
+                        'state = loop_{}({})'.format(ip, ', '.join(names)),
+                        'if state is not None:',
+                        '    {}, ip = state'.format(', '.join(names)),
+                        '    continue',
+                    ])
+                name, (a, b, c) = program[ip]
+                value = expression(name, a, b, lambda r: str(ip) if r == ip_reg else names[r])
+                if c == ip_reg:
+                    lines.append('ip = ({}) + 1'.format(value))
+                    if ip in breakpoints:
+                        lines.append('break')
+                    return lines
+                lines.append('{} = {}'.format(names[c], value))
+                ip += 1
+                if ip - 1 in breakpoints:
+                    lines.append('ip = {}'.format(ip))
+                    lines.append('break')
+                    return lines
+            lines.append('ip = {}'.format(size))
+            lines.append('break')
+            return lines
+
+        def tree(lo, hi, indent):
+            pad = '    ' * indent
+            if hi - lo == 1:
+                return [pad + line for line in entry(lo)]
+            mid = (lo + hi) // 2
+            return ([pad + 'if ip < {}:'.format(mid)] + tree(lo, mid, indent + 1) +
+                    [pad + 'else:'] + tree(mid, hi, indent + 1))
+
+        lines = [
+            'def execute(regs, ip):',
+            '    {}, = regs'.format(', '.join(names)),
+            '    while 0 <= ip < {}:'.format(size),
+        ]
+        lines.extend(tree(0, size, 2))
+        lines.extend([
+            '    regs[:] = [{}]'.format(', '.join(names)),
+            '    return ip',
+        ])
+        return '\n'.join(lines) + '\n'
+
+    def compiled(self, breakpoints=()):
+        key = frozenset(breakpoints), self.accelerate
+        if key not in self._compiled:
+            namespace = {'loop_{}'.format(head): loop.function()
+                         for head, loop in self.accelerated(breakpoints).items()}
+            exec(compile(self.source(key[0]), '<elfcode program>', 'exec'), namespace)
+            self._compiled[key] = namespace['execute']
+        return self._compiled[key]
+
+    def run_program(self, steps=-1, quiet=True, bp=()):
+        """
+        Run until the ip leaves the program, until steps instructions have
+        run, or until an instruction at one of the bp addresses has run.
+        quiet=False traces every instruction.  Returns whether the program
+        is still running.
+        """
+        if self.ip_reg is None:
+            # No jumps, every instruction runs once in order
+            for step in self.step_functions()[self.ip:]:
+                step(self.regs)
+            self.ip = len(self.program)
+            return False
+        if steps == -1 and quiet:
+            self.ip = self.compiled(bp)(self.regs, self.ip)
+            self.regs[self.ip_reg] = self.ip - 1
+            return 0 <= self.ip < len(self.program)
+        return self._step_program(steps, quiet, bp)
+
+    def _step_program(self, steps, quiet, bp):
+        program_steps = self.step_functions()
+        regs = self.regs
+        ip_reg = self.ip_reg
+        count = 0
+        if not quiet:
+            print("{:5}: {:2} {:20} {}".format(count, "", "", self.reg_str()))
+        while 0 <= self.ip < len(program_steps) and (steps == -1 or count < steps):
+            count += 1
+            ip = self.ip
+            regs[ip_reg] = ip
+            program_steps[ip](regs)
+            self.ip = regs[ip_reg] + 1
+            if not quiet:
+                print("{:5}: {}".format(count, self.state_str(ip)))
+            if ip in bp:
+                break
+        return 0 <= self.ip < len(program_steps)
@@ -0,0 +1,46 @@
+# Operand kinds: r register, i immediate, - unused
+OPCODES = {
+    'addr': ('r', 'r', '{a} + {b}'),
+    'addi': ('r', 'i', '{a} + {b}'),
+    'mulr': ('r', 'r', '{a} * {b}'),
+    'muli': ('r', 'i', '{a} * {b}'),
+    'banr': ('r', 'r', '{a} & {b}'),
+    'bani': ('r', 'i', '{a} & {b}'),
+    'borr': ('r', 'r', '{a} | {b}'),
+    'bori': ('r', 'i', '{a} | {b}'),
+    'setr': ('r', '-', '{a}'),
+    'seti': ('i', '-', '{a}'),
+    'gtir': ('i', 'r', '1 if {a} > {b} else 0'),
+    'gtri': ('r', 'i', '1 if {a} > {b} else 0'),
+    'gtrr': ('r', 'r', '1 if {a} > {b} else 0'),
+    'eqir': ('i', 'r', '1 if {a} == {b} else 0'),
+    'eqri': ('r', 'i', '1 if {a} == {b} else 0'),
+    'eqrr': ('r', 'r', '1 if {a} == {b} else 0'),
+}
+OPCODE_NAMES = list(OPCODES)
+
+# The operator each opcode family applies, set just copies its operand
+SYMBOLS = {'add': '+', 'mul': '*', 'ban': '&', 'bor': '|', 'gt': '>', 'eq': '=='}
+
+
+def symbol(name):
+    """The operator of an opcode, or None for the set opcodes"""
+    return SYMBOLS.get(name[:3], SYMBOLS.get(name[:2]))
+
+
+def expression(name, a, b, reg):
+    """Source for the value an instruction stores, reg(n) gives the source for register n"""
+    kind_a, kind_b, template = OPCODES[name]
+    return template.format(a=reg(a) if kind_a == 'r' else a, b=reg(b) if kind_b == 'r' else b)
+
+
+def make_operation(name):
+    """A function(regs, a, b, c) applying one opcode to a register list"""
+    namespace = {}
+    source = 'def {}(regs, a, b, c):\n    regs[c] = {}\n'.format(
+        name, expression(name, 'a', 'b', lambda r: 'regs[{}]'.format(r)))
+    exec(compile(source, '<elfcode {}>'.format(name), 'exec'), namespace)
+    return namespace[name]
+
+
+OPERATIONS = {name: make_operation(name) for name in OPCODE_NAMES}
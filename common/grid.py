@@ -1,37 +1,118 @@
+from functools import cached_property
+
 from .point import Point
 
 
+# Value of the cells round the outside of every grid
+BORDER = '\0'
+
+
 class Grid(object):
+    """
+    Rectangular grid of single characters, stored flat.
+
+    The cells live in one bytearray, row after row, inside a one cell border
+    of BORDER.  A cell is addressed by its index, (y + 1) * stride + x + 1
+    with stride = width + 2, and its neighbors are the fixed offsets in
+    orthogonal, diagonal and adjacent.  Stepping off the edge of the grid
+    lands on the border, so a walk that stops at anything it does not expect
+    never needs a bounds check.
+
+    The Point based methods (get, [], in, iteration, items) work as before,
+    on top of the index ones.  values is a read-only snapshot of the rows,
+    cells are changed through [] or set_cell.
+    """
     def __init__(self, values):
-        self.values = []
-        for row in values:
-            self.values.append(list(row))
+        rows = [row if isinstance(row, str) else ''.join(row) for row in values]
+        self.width = len(rows[0]) if rows else 0
+        self.height = len(rows)
+        self.stride = stride = self.width + 2
+        self.cells = bytearray(BORDER.encode('latin-1') * (stride * (self.height + 2)))
+        for y, row in enumerate(rows):
+            if len(row) != self.width:
+                raise ValueError(f'Row {y} is {len(row)} wide, expected {self.width}')
+            start = (y + 1) * stride + 1
+            self.cells[start:start + self.width] = row.encode('latin-1')
+        # N, E, S, W
+        self.orthogonal = (-stride, 1, stride, -1)
+        # NE, SE, SW, NW
+        self.diagonal = (1 - stride, 1 + stride, stride - 1, -stride - 1)
+        self.adjacent = self.orthogonal + self.diagonal
 
     def copy(self):
-        return Grid([row.copy() for row in self.values])
+        """
+        A grid with its own cells.  Anything a subclass worked out from the
+        cells with cached_property is left behind for the copy to redo.
+        """
+        grid = Grid.__new__(type(self))
+        cached = {name for klass in type(self).__mro__
+                  for name, attr in vars(klass).items() if isinstance(attr, cached_property)}
+        grid.__dict__.update((k, v) for k, v in self.__dict__.items() if k not in cached)
+        grid.cells = bytearray(self.cells)
+        return grid
 
-    @property
-    def width(self):
-        return len(self.values[0])
+    def to_index(self, point):
+        return (point.y + 1) * self.stride + point.x + 1
+
+    def to_point(self, index):
+        y, x = divmod(index, self.stride)
+        return Point(x - 1, y - 1)
+
+    def indices(self):
+        """The index of every cell inside the border, row by row"""
+        stride = self.stride
+        for y in range(1, self.height + 1):
+            yield from range(y * stride + 1, y * stride + self.width + 1)
+
+    def cell(self, index):
+        return chr(self.cells[index])
+
+    def set_cell(self, index, value):
+        self.cells[index] = ord(value)
+
+    def find(self, value, start=0):
+        """Index of the first cell holding value from index start, or -1"""
+        return self.cells.find(ord(value), start)
+
+    def index(self, value, start=None, stop=None) -> Point:
+        """
+        Find the first occurrence of value in the grid, searching from the
+        Point start up to and including the Point stop.  Raises ValueError
+        if it is not there.
+        """
+        begin = 0 if start is None else self.to_index(start)
+        end = len(self.cells) if stop is None else self.to_index(stop) + 1
+        found = self.cells.find(ord(value), begin, end)
+        if found == -1:
+            raise ValueError(f'{value} is not in grid')
+        return self.to_point(found)
 
     @property
-    def height(self):
-        return len(self.values)
+    def values(self):
+        """
+        The rows as tuples of characters, decoded afresh from the cells on
+        every call.  They are tuples so that writing to them fails rather
+        than going nowhere.
+        """
+        return tuple(tuple(self.cells[start:start + self.width].decode('latin-1'))
+                     for start in range(self.stride + 1, self.stride * (self.height + 1), self.stride))
 
     def get(self, point, default=None):
         if point not in self:
             return default
-        return self.values[point.y][point.x]
+        return chr(self.cells[(point.y + 1) * self.stride + point.x + 1])
 
     def __getitem__(self, point):
         if point not in self:
             raise IndexError(f'Out of bounds: {point}')
-        return self.values[point.y][point.x]
+        return chr(self.cells[(point.y + 1) * self.stride + point.x + 1])
 
     def __setitem__(self, point, value):
         if point not in self:
             raise IndexError(f'Out of bounds: {point}')
-        self.values[point.y][point.x] = value
+        if not isinstance(value, str) or len(value) != 1 or ord(value) > 0xff:
+            raise ValueError(f'Cells hold one latin-1 character, not {value!r}')
+        self.cells[(point.y + 1) * self.stride + point.x + 1] = ord(value)
 
     def __contains__(self, point):
         return 0 <= point.x < self.width and 0 <= point.y < self.height
@@ -40,10 +121,11 @@ class Grid(object):
         for y in range(0, self.height):
             for x in range(0, self.width):
                 yield Point(x, y)
-    
+
     def items(self):
+        cells = self.cells
         for p in self:
-            yield p, self[p]
+            yield p, chr(cells[(p.y + 1) * self.stride + p.x + 1])
 
     def __str__(self):
-        return '\n'.join(''.join(str(v) for v in row) for row in self.values)
+        return '\n'.join(''.join(row) for row in self.values)
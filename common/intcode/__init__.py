@@ -0,0 +1,4 @@
+from .machine import Machine, Snapshot, read_file
+from .compiler import CompilingMachine
+from .network import Network
+from .search import search
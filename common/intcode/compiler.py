@@ -0,0 +1,238 @@
+from .machine import (
+    Machine, MAX_OP_SIZE, PAGE_SHIFT,
+    OP_ADD, OP_MULT, OP_INPUT, OP_OUTPUT, OP_JUMP_IF_TRUE,
+    OP_LESS_THAN, OP_EQUALS, OP_REL_BASE_OFFSET, OP_HALT,
+    MODE_POSITION, MODE_IMMEDIATE, MODE_RELATIVE,
+)
+
+
+# Longest straight-line run turned into a single function
+MAX_BLOCK_LEN = 64
+
+BINARY_OPS = {
+    OP_ADD: '{a} + {b}',
+    OP_MULT: '{a} * {b}',
+    OP_LESS_THAN: '1 if {a} < {b} else 0',
+    OP_EQUALS: '1 if {a} == {b} else 0',
+}
+
+
+def operand(mode, param):
+    if mode == MODE_IMMEDIATE:
+        return param
+    if mode == MODE_POSITION:
+        return 'mem[{}]'.format(param)
+    return 'mem[rbo + {}]'.format(param)
+
+
+def target(mode, param):
+    if mode == MODE_POSITION:
+        return param
+    return 'rbo + {}'.format(param)
+
+
+class CompilingMachine(Machine):
+    """
+    Tier-2 Intcode machine.
+
+    Straight-line runs of arithmetic, compare and relative-base instructions,
+    up to and including the jump that ends them, are compiled to a Python
+    function the first time they are reached.  A block takes rbo and returns
+    the next (ip, rbo); a block that jumps back to its own start becomes a
+    while loop.  I/O and halt are left to the tier-1 code.
+
+    Every store a block makes is checked against the covered map.  If it
+    lands on code a block was compiled from, those blocks are dropped and the
+    running block returns to the dispatcher right after that store (deopt),
+    which picks up the new code on the next dispatch.  Parameter cells that
+    get written this way (Intcode indexes arrays by patching operands) are
+    remembered as volatile and read from memory at run time by later
+    compiles, so they stop causing deopts.  An access past the end of memory
+    hands the instruction back to the dispatcher, which grows memory before
+    re-entering.
+    """
+    def __init__(self, memory, f_input=None, f_output=None):
+        super().__init__(memory, f_input, f_output)
+        self._blocks = [None] * len(self._memory)
+        # address -> starts of the blocks whose code baked it in
+        self._block_owners = {}
+        self._volatile = set()
+        self.compiled = 0
+        self.deopts = 0
+
+    def expand_mem(self, new_size):
+        grow = new_size - len(self._memory) + 1
+        super().expand_mem(new_size)
+        if grow > 0:
+            self._blocks.extend(None for _ in range(grow))
+
+    def reset_caches(self):
+        super().reset_caches()
+        self._blocks[:] = [None] * len(self._memory)
+        self._block_owners.clear()
+
+    def load_state(self, state):
+        super().load_state(state)
+        del self._blocks[len(self._memory):]
+
+    def restore(self, snapshot):
+        super().restore(snapshot)
+        del self._blocks[len(self._memory):]
+
+    def invalidate(self, address):
+        super().invalidate(address)
+        owners = self._block_owners.pop(address, ())
+        for start in owners:
+            if self._blocks[start] is not None:
+                self._blocks[start] = None
+                self.deopts += 1
+        if owners:
+            self._volatile.add(address)
+
+    def _deopt(self, address):
+        """Called by blocks on a store to covered memory, True if blocks were dropped"""
+        deopts = self.deopts
+        self.invalidate(address)
+        return self.deopts != deopts
+
+    def block_source(self, ip):
+        """
+        Generate the source for the block starting at ip.  Returns the source,
+        the address just past the block and the volatile cells it reads live,
+        or None if ip is not the start of a compilable block.
+        """
+        start = ip
+        volatile = self._volatile
+        body = []
+        live = []
+        static_top = 0
+        loops = False
+        ends_in_jump = False
+        count = 0
+        while count < MAX_BLOCK_LEN:
+            try:
+                ins = self._decoded[ip] or self.decode(ip)
+            except Exception:
+                # Not code, leave it to the interpreter to complain if it gets here
+                break
+            op, size, m1, p1, m2, p2, m3, p3 = ins
+            if op in (OP_INPUT, OP_OUTPUT, OP_HALT):
+                break
+            modes = [m1, m2, m3][:size - 1]
+            params = [p1, p2, p3][:size - 1]
+            dynamic = False
+            for i, mode in enumerate(modes):
+                if ip + 1 + i in volatile:
+                    live.append(ip + 1 + i)
+                    params[i] = 'mem[{}]'.format(ip + 1 + i)
+                    dynamic = dynamic or mode != MODE_IMMEDIATE
+                elif mode == MODE_POSITION:
+                    static_top = max(static_top, params[i])
+                else:
+                    dynamic = dynamic or mode == MODE_RELATIVE
+            if dynamic:
+                # Only relative or patched accesses can run off the end of memory
+                body.append('ip = {}'.format(ip))
+            params.extend((0, 0))
+            a = operand(m1, params[0])
+            b = operand(m2, params[1])
+            next_ip = ip + size
+            count += 1
+            if op == OP_REL_BASE_OFFSET:
+                body.append('rbo += {}'.format(a))
+            elif op in BINARY_OPS:
+                c = target(m3, params[2])
+                body.append('c = {}'.format(c))
+                body.append('mem[c] = {}'.format(BINARY_OPS[op].format(a=a, b=b)))
+                body.append('dirty[c >> {}] = 1'.format(PAGE_SHIFT))
+                body.append('if covered[c] and deopt(c):')
+                body.append('    return {}, rbo'.format(next_ip))
+            else:
+                test = '{} != 0' if op == OP_JUMP_IF_TRUE else '{} == 0'
+                if b == start:
+                    loops = True
+                    body.append('if not ({}):'.format(test.format(a)))
+                    body.append('    return {}, rbo'.format(next_ip))
+                else:
+                    body.append('if {}:'.format(test.format(a)))
+                    body.append('    return {}, rbo'.format(b))
+                    body.append('return {}, rbo'.format(next_ip))
+                ip = next_ip
+                ends_in_jump = True
+                break
+            ip = next_ip
+        if count == 0:
+            return None
+        if not ends_in_jump:
+            body.append('return {}, rbo'.format(ip))
+        # Position-mode addresses are fixed, make sure they exist up front
+        self.expand_mem(static_top)
+
+        indent = '            '
+        lines = [
+            'def make(mem, covered, dirty, deopt, expand):',
+            '    def block_{}(rbo):'.format(start),
+            '        ip = {}'.format(start),
+            '        try:',
+        ]
+        if loops:
+            lines.append('            while True:')
+            indent += '    '
+        lines.extend(indent + line for line in body)
+        lines.extend([
+            '        except IndexError:',
+            '            expand(ip, rbo)',
+            '            return ip, rbo',
+            '    return block_{}'.format(start),
+        ])
+        return '\n'.join(lines) + '\n', ip, live
+
+    def compile_block(self, ip):
+        result = self.block_source(ip)
+        if result is None:
+            return None
+        source, end, live = result
+        namespace = {}
+        exec(compile(source, '<intcode block {}>'.format(ip), 'exec'), namespace)
+        block = namespace['make'](self._memory, self._covered, self._dirty, self._deopt, self._expand_for)
+        self._blocks[ip] = block
+        live = set(live)
+        for address in range(ip, end):
+            if address not in live:
+                self._block_owners.setdefault(address, []).append(ip)
+        self.compiled += 1
+        return block
+
+    def run(self):
+        blocks = self._blocks
+        decoded = self._decoded
+        ip = self.ip
+        rbo = self.rbo
+        try:
+            while True:
+                try:
+                    block = blocks[ip]
+                except IndexError:
+                    self.expand_mem(ip + MAX_OP_SIZE - 1)
+                    continue
+                if block is not None:
+                    ip, rbo = block(rbo)
+                    continue
+                ins = decoded[ip] or self.decode(ip)
+                op = ins[0]
+                if op == OP_HALT:
+                    break
+                if op != OP_INPUT and op != OP_OUTPUT:
+                    self.compile_block(ip)
+                    continue
+                self.ip = ip
+                self.rbo = rbo
+                paused = self.execute_io(op, ins[2], ins[3])
+                ip = self.ip
+                if paused:
+                    return None if self.waiting else self.output
+            self.halted = True
+            return None
+        finally:
+            self.ip = ip
+            self.rbo = rbo
@@ -0,0 +1,364 @@
+from collections import deque
+from itertools import compress, count
+from operator import ne
+
+
+OP_ADD = 1
+OP_MULT = 2
+OP_INPUT = 3
+OP_OUTPUT = 4
+OP_JUMP_IF_TRUE = 5
+OP_JUMP_IF_FALSE = 6
+OP_LESS_THAN = 7
+OP_EQUALS = 8
+OP_REL_BASE_OFFSET = 9
+OP_HALT = 99
+
+MODE_POSITION = 0
+MODE_IMMEDIATE = 1
+MODE_RELATIVE = 2
+
+# Total length of each instruction, opcode included
+OP_SIZES = {
+    OP_ADD: 4,
+    OP_MULT: 4,
+    OP_INPUT: 2,
+    OP_OUTPUT: 2,
+    OP_JUMP_IF_TRUE: 3,
+    OP_JUMP_IF_FALSE: 3,
+    OP_LESS_THAN: 4,
+    OP_EQUALS: 4,
+    OP_REL_BASE_OFFSET: 2,
+    OP_HALT: 1,
+}
+# Operand slots that are written rather than read
+OP_WRITES = {
+    OP_ADD: 3,
+    OP_MULT: 3,
+    OP_INPUT: 1,
+    OP_LESS_THAN: 3,
+    OP_EQUALS: 3,
+}
+MAX_OP_SIZE = max(OP_SIZES.values())
+
+# Snapshots share memory between each other in pages of this many cells
+PAGE_SHIFT = 6
+PAGE_SIZE = 1 << PAGE_SHIFT
+
+
+def page_count(size):
+    return (size + PAGE_SIZE - 1) >> PAGE_SHIFT
+
+
+def read_file(path):
+    with open(path, "r") as f:
+        data = list(map(int, f.read().split(',')))
+    return data
+
+
+class Snapshot(object):
+    """
+    Frozen machine state.  Memory is kept as a list of page tuples, and pages
+    that were not written between two snapshots are the same object in both.
+    """
+    def __init__(self, pages, size, ip, rbo, inputs, output, halted, waiting):
+        self.pages = pages
+        self.size = size
+        self.ip = ip
+        self.rbo = rbo
+        self.inputs = inputs
+        self.output = output
+        self.halted = halted
+        self.waiting = waiting
+
+
+class Machine(object):
+    """
+    Intcode interpreter shared by the 2019 days.
+
+    Instructions are decoded once per address into a tuple of
+    (opcode, size, mode1, param1, mode2, param2, mode3, param3) and kept in a
+    table parallel to memory.  A store that lands on a decoded instruction
+    drops the entries it overlaps, so self-modifying programs still see their
+    own writes.
+
+    snapshot() and restore() are copy-on-write at page granularity: stores
+    mark their page dirty, a snapshot copies only the dirty pages and shares
+    the rest with the snapshot the machine was last taken from or restored
+    to, and a restore only rewrites the pages that differ.  Memory itself
+    stays a flat list so the run loops can index it directly.
+
+    I/O goes through f_input/f_output when they are given.  Without f_input,
+    values are popped from self.inputs, and when that is empty run() returns
+    None with self.waiting set, leaving ip on the input instruction.  Without
+    f_output, run() returns each value as it is output (also kept in
+    self.output).  Either way run() can be called again to resume; it returns
+    None with self.halted set once the machine halts.  Nothing is signalled by
+    raising, so a suspended machine costs nothing to resume.
+    """
+    def __init__(self, memory, f_input=None, f_output=None):
+        self.ip = 0
+        self.rbo = 0
+        self.halted = False
+        self.waiting = False
+        self._memory = list(memory)
+        self._decoded = [None] * len(self._memory)
+        # 1 wherever a decoded instruction spans the address
+        self._covered = bytearray(len(self._memory))
+        # 1 for every page written since _base was taken
+        self._dirty = bytearray(b'\x01') * page_count(len(self._memory))
+        self._base = None
+        self.inputs = deque()
+        self.output = None
+        self.f_input = f_input
+        self.f_output = f_output
+
+    @property
+    def memory(self):
+        return self._memory
+
+    def state(self):
+        return list(self._memory)
+
+    def load_state(self, state):
+        # Update in place, a running loop holds references to these.  Only
+        # the cells that differ can invalidate decoded instructions.
+        mem = self._memory
+        if len(state) < len(mem):
+            self.reset_caches()
+        else:
+            self.expand_mem(len(state) - 1)
+        covered = self._covered
+        for address in compress(count(), map(ne, mem, state)):
+            if covered[address]:
+                self.invalidate(address)
+        mem[:] = state
+        del self._decoded[len(mem):]
+        del self._covered[len(mem):]
+        self._dirty[:] = bytearray(b'\x01') * page_count(len(mem))
+
+    def snapshot(self):
+        mem = self._memory
+        base = self._base
+        dirty = self._dirty
+        pages = []
+        for i in range(len(dirty)):
+            if dirty[i] or base is None or i >= len(base):
+                pages.append(tuple(mem[i << PAGE_SHIFT:(i + 1) << PAGE_SHIFT]))
+            else:
+                pages.append(base[i])
+        dirty[:] = bytes(len(dirty))
+        self._base = pages
+        return Snapshot(pages, len(mem), self.ip, self.rbo, tuple(self.inputs), self.output,
+                        self.halted, self.waiting)
+
+    def restore(self, snapshot):
+        mem = self._memory
+        if snapshot.size < len(mem):
+            del mem[snapshot.size:]
+            self.reset_caches()
+            self._dirty[:] = bytearray(b'\x01') * page_count(len(mem))
+        else:
+            self.expand_mem(snapshot.size - 1)
+        base = self._base
+        dirty = self._dirty
+        covered = self._covered
+        for i, page in enumerate(snapshot.pages):
+            if not dirty[i] and base is not None and i < len(base) and base[i] is page:
+                continue
+            start = i << PAGE_SHIFT
+            for address in compress(count(start), map(ne, mem[start:start + len(page)], page)):
+                if covered[address]:
+                    self.invalidate(address)
+            mem[start:start + len(page)] = page
+        dirty[:] = bytes(len(dirty))
+        self._base = snapshot.pages
+        self.ip = snapshot.ip
+        self.rbo = snapshot.rbo
+        self.inputs = deque(snapshot.inputs)
+        self.output = snapshot.output
+        self.halted = snapshot.halted
+        self.waiting = snapshot.waiting
+
+    def fork(self):
+        """A new machine of the same kind that carries on from this one's current state"""
+        machine = self.__class__([], self.f_input, self.f_output)
+        machine.restore(self.snapshot())
+        return machine
+
+    def reset_caches(self):
+        self._decoded[:] = [None] * len(self._memory)
+        self._covered[:] = bytearray(len(self._memory))
+
+    def expand_mem(self, new_size):
+        size = len(self._memory)
+        grow = new_size - size + 1
+        if grow <= 0:
+            return
+        self._memory.extend(0 for _ in range(grow))
+        self._decoded.extend(None for _ in range(grow))
+        self._covered.extend(bytes(grow))
+        # The old last page may have been partial, it changes too
+        dirty = self._dirty
+        del dirty[size >> PAGE_SHIFT:]
+        dirty.extend(b'\x01' * (page_count(size + grow) - len(dirty)))
+
+    def load(self, address):
+        try:
+            return self._memory[address]
+        except IndexError:
+            self.expand_mem(address)
+        return self._memory[address]
+
+    def store(self, address, value):
+        try:
+            self._memory[address] = value
+        except IndexError:
+            self.expand_mem(address)
+            self._memory[address] = value
+        self._dirty[address >> PAGE_SHIFT] = 1
+        if self._covered[address]:
+            self.invalidate(address)
+
+    def invalidate(self, address):
+        """Drop every decoded instruction that spans address"""
+        decoded = self._decoded
+        for start in range(max(0, address - MAX_OP_SIZE + 1), address + 1):
+            ins = decoded[start]
+            if ins is not None and start + ins[1] > address:
+                decoded[start] = None
+        self._covered[address] = 0
+
+    def decode(self, ip):
+        value = self.load(ip)
+        op = value % 100
+        if op not in OP_SIZES:
+            raise Exception("Invalid opcode {} at {}".format(value, ip))
+        size = OP_SIZES[op]
+        modes = [value // 100 % 10, value // 1000 % 10, value // 10000 % 10]
+        params = [0, 0, 0]
+        for i in range(size - 1):
+            params[i] = self.load(ip + 1 + i)
+            if modes[i] > MODE_RELATIVE or (OP_WRITES.get(op) == i + 1 and modes[i] == MODE_IMMEDIATE):
+                raise Exception("Invalid operand mode!")
+        ins = (op, size, modes[0], params[0], modes[1], params[1], modes[2], params[2])
+        self._decoded[ip] = ins
+        for address in range(ip, ip + size):
+            self._covered[address] = 1
+        return ins
+
+    def _expand_for(self, ip, rbo):
+        """Grow memory so that every address touched by the instruction at ip exists"""
+        self.expand_mem(ip + MAX_OP_SIZE - 1)
+        op, size, m1, p1, m2, p2, m3, p3 = self.decode(ip)
+        top = 0
+        for mode, param in ((m1, p1), (m2, p2), (m3, p3))[:size - 1]:
+            if mode == MODE_POSITION:
+                top = max(top, param)
+            elif mode == MODE_RELATIVE:
+                top = max(top, rbo + param)
+        self.expand_mem(top)
+
+    def _operand_address(self, mode, param):
+        return self.rbo + param if mode == MODE_RELATIVE else param
+
+    def execute_io(self, op, m1, p1):
+        """
+        Run the input or output instruction at self.ip through the checked
+        load/store.  Returns True when run() should return to its caller,
+        either with an output or because it is waiting for input.
+        """
+        if op == OP_INPUT:
+            if self.f_input:
+                value = self.f_input()
+            elif self.inputs:
+                value = self.inputs.popleft()
+            else:
+                self.waiting = True
+                return True
+            self.waiting = False
+            self.store(self._operand_address(m1, p1), value)
+            self.ip += 2
+            return False
+        value = p1 if m1 == MODE_IMMEDIATE else self.load(self._operand_address(m1, p1))
+        self.ip += 2
+        if self.f_output:
+            self.f_output(value)
+            return False
+        self.output = value
+        return True
+
+    def run(self):
+        mem = self._memory
+        decoded = self._decoded
+        covered = self._covered
+        dirty = self._dirty
+        ip = self.ip
+        rbo = self.rbo
+        try:
+            while True:
+                try:
+                    ins = decoded[ip]
+                    if ins is None:
+                        ins = self.decode(ip)
+                    op, size, m1, p1, m2, p2, m3, p3 = ins
+                    if op < OP_INPUT or op > OP_OUTPUT:
+                        if op == OP_HALT:
+                            break
+                        if op == OP_REL_BASE_OFFSET:
+                            rbo += p1 if m1 == 1 else mem[p1] if m1 == 0 else mem[rbo + p1]
+                            ip += 2
+                            continue
+                        a = p1 if m1 == 1 else mem[p1] if m1 == 0 else mem[rbo + p1]
+                        b = p2 if m2 == 1 else mem[p2] if m2 == 0 else mem[rbo + p2]
+                        if op == OP_JUMP_IF_TRUE:
+                            ip = b if a != 0 else ip + 3
+                            continue
+                        if op == OP_JUMP_IF_FALSE:
+                            ip = b if a == 0 else ip + 3
+                            continue
+                        if op == OP_ADD:
+                            v = a + b
+                        elif op == OP_MULT:
+                            v = a * b
+                        elif op == OP_LESS_THAN:
+                            v = int(a < b)
+                        else:
+                            v = int(a == b)
+                        c = rbo + p3 if m3 == 2 else p3
+                        mem[c] = v
+                        dirty[c >> PAGE_SHIFT] = 1
+                        if covered[c]:
+                            self.invalidate(c)
+                        ip += 4
+                        continue
+                except IndexError:
+                    self._expand_for(ip, rbo)
+                    continue
+                self.ip = ip
+                self.rbo = rbo
+                paused = self.execute_io(op, m1, p1)
+                ip = self.ip
+                if paused:
+                    return None if self.waiting else self.output
+            self.halted = True
+            return None
+        finally:
+            self.ip = ip
+            self.rbo = rbo
+
+    def coroutine(self):
+        """
+        Drive the machine as a generator.  Each output is yielded as it
+        happens; None is yielded when the machine needs input, which the
+        caller passes in with send().  A value sent while the machine is
+        paused at an output is queued as input just the same, for when it
+        next reads.  The generator finishes when the machine halts.  Only
+        for machines without f_input/f_output.
+        """
+        value = self.run()
+        while not self.halted:
+            sent = yield None if self.waiting else value
+            if sent is not None:
+                self.inputs.append(sent)
+            value = self.run()
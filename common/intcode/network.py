@@ -0,0 +1,67 @@
+from collections import deque
+
+
+class Network(object):
+    """
+    Event-driven scheduler for a set of connected Intcode machines.
+
+    Each machine's output is appended straight to the inputs of the machines
+    it is connected to.  A machine runs until it blocks on an empty input
+    queue or halts, and is only scheduled again once something is delivered
+    to it.  run() returns when every machine is halted or blocked.
+    """
+    def __init__(self):
+        self.machines = []
+        self.links = []
+        # last value each machine output
+        self.outputs = []
+        self._ready = deque()
+        self._queued = []
+
+    def add(self, machine, *inputs):
+        """Add a machine, optionally seeding its input queue, and return its index"""
+        index = len(self.machines)
+        self.machines.append(machine)
+        self.links.append([])
+        self.outputs.append(None)
+        self._queued.append(False)
+        machine.inputs.extend(inputs)
+        machine.f_output = self._router(index)
+        self._schedule(index)
+        return index
+
+    def connect(self, src, dst):
+        self.links[src].append(dst)
+
+    def send(self, dst, value):
+        self.machines[dst].inputs.append(value)
+        self._schedule(dst)
+
+    def _schedule(self, index):
+        if not self._queued[index]:
+            self._queued[index] = True
+            self._ready.append(index)
+
+    def _router(self, src):
+        links = self.links[src]
+        outputs = self.outputs
+
+        def route(value):
+            outputs[src] = value
+            for dst in links:
+                self.send(dst, value)
+        return route
+
+    def run(self):
+        ready = self._ready
+        while ready:
+            index = ready.popleft()
+            self._queued[index] = False
+            machine = self.machines[index]
+            if not machine.halted:
+                machine.run()
+        return self.outputs
+
+    @property
+    def halted(self):
+        return all(m.halted for m in self.machines)
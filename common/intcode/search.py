@@ -0,0 +1,15 @@
+from ..pool import Pool, best_of
+
+
+def search(program, evaluate, candidates, workers=None, key=None, chunksize=16):
+    """
+    Run evaluate(program, candidate) for every candidate and return the
+    (candidate, value) with the highest key(value), see best_of().
+
+    With more than one worker the candidates are spread over a process pool,
+    see common.pool.  evaluate must be a module-level function so it can be
+    pickled.  workers=1 runs everything in this process.
+    """
+    candidates = list(candidates)
+    with Pool(program, workers) as pool:
+        return best_of(zip(candidates, pool.map(evaluate, candidates, chunksize)), key)
@@ -0,0 +1,125 @@
+from heapq import heappush, heappop
+from itertools import product
+
+
+def dist2(a, b):
+    return sum((x - y) * (x - y) for x, y in zip(a, b))
+
+
+def dist2_2d(a, b):
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    return dx * dx + dy * dy
+
+
+def dist2_3d(a, b):
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    dz = a[2] - b[2]
+    return dx * dx + dy * dy + dz * dz
+
+
+DIST2 = {2: dist2_2d, 3: dist2_3d}
+
+
+class NearestPairs(object):
+    """
+    Pairs of points in order of increasing distance, produced lazily.
+
+    The points go into a uniform grid of cubic cells sized for about one
+    point per cell.  Each point has a cursor that walks the grid in rings
+    around its own cell and yields its neighbors nearest first: a neighbor
+    is only handed out once every ring that could hold something nearer has
+    been scanned.  Iterating merges the cursors with a heap holding the next
+    neighbor of every point, so taking k pairs costs about k log n plus the
+    rings scanned, instead of building and sorting all n^2 distances.
+
+    Points can be Point, Point3D or plain tuples, anything iterable over its
+    integer coordinates.  Distances are squared, so they stay exact.
+    """
+    def __init__(self, points, cell=None):
+        self.points = [tuple(p) for p in points]
+        self.dims = len(self.points[0]) if self.points else 0
+        self.dist2 = DIST2.get(self.dims, dist2)
+        if cell is None:
+            cell = self.default_cell()
+        self.cell = cell
+        cells = [tuple(x // cell for x in p) for p in self.points]
+        self.low = [min(c[d] for c in cells) for d in range(self.dims)] if cells else []
+        self.extent = max((max(c[d] for c in cells) - low for d, low in enumerate(self.low)), default=0)
+        # Cells are keyed by one integer, with room for offsets up to the
+        # extent on either side so stepping past an edge never wraps round
+        self.strides = [(2 * self.extent + 3) ** d for d in range(self.dims)]
+        self._shells = {}
+        self.grid = {}
+        for i, c in enumerate(cells):
+            self.grid.setdefault(self.key(c), []).append((i, self.points[i]))
+
+    def default_cell(self):
+        """A cell size giving about one point per cell over the bounding box"""
+        if not self.points:
+            return 1
+        volume = 1
+        for d in range(self.dims):
+            values = [p[d] for p in self.points]
+            volume *= max(values) - min(values) + 1
+        return max(1, int((volume / len(self.points)) ** (1 / self.dims)))
+
+    def key(self, cell):
+        return sum((c - low + self.extent + 1) * stride for c, low, stride in zip(cell, self.low, self.strides))
+
+    def shell(self, radius):
+        """Key offsets of the cells whose largest offset from a cell is exactly radius"""
+        if radius not in self._shells:
+            offsets = []
+            inner = range(-radius + 1, radius)
+            full = range(-radius, radius + 1)
+            # Axis k is the first one at +-radius, the ones before it are inside
+            for k in range(self.dims):
+                ranges = [inner] * k + [(-radius, radius) if radius else (0,)] + [full] * (self.dims - k - 1)
+                offsets.extend(product(*ranges))
+            self._shells[radius] = [sum(o * stride for o, stride in zip(offset, self.strides))
+                                    for offset in offsets]
+        return self._shells[radius]
+
+    def neighbors(self, i):
+        """Yield (dist2, j) for every other point j, nearest first, ties by j"""
+        grid = self.grid
+        dist2 = self.dist2
+        p = self.points[i]
+        cell = self.cell
+        home = self.key(tuple(x // cell for x in p))
+        # How far p is from the nearest side of its own cell
+        margin = min(min(x % cell, cell - x % cell) for x in p)
+        candidates = []
+        radius = 0
+        while candidates or radius <= self.extent:
+            # Everything not seen yet is outside the cube of cells scanned so far
+            reach = (radius - 1) * cell + margin
+            while candidates and (radius > self.extent or candidates[0][0] < reach * reach):
+                yield heappop(candidates)
+            if radius > self.extent:
+                break
+            for offset in self.shell(radius):
+                for j, q in grid.get(home + offset, ()):
+                    if j != i:
+                        heappush(candidates, (dist2(p, q), j))
+            radius += 1
+
+    def __iter__(self):
+        """Yield (dist2, i, j) with i < j for every pair, in increasing (dist2, i, j) order"""
+        cursors = [self.neighbors(i) for i in range(len(self.points))]
+        heap = []
+        for i, cursor in enumerate(cursors):
+            for d, j in cursor:
+                heap.append((d, i, j))
+                break
+        heap.sort()
+        while heap:
+            d, i, j = heappop(heap)
+            # Every pair comes up from both ends, keep the one from the lower index
+            if i < j:
+                yield d, i, j
+            for d, j in cursors[i]:
+                heappush(heap, (d, i, j))
+                break
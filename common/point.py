@@ -1,144 +1,156 @@
-from functools import total_ordering
+from operator import add, itemgetter, sub
 import math
 
 
-@total_ordering
-class Point(object):
-    def __init__(self, x, y):
-        self.x = int(x)
-        self.y = int(y)
+# Coordinates in -INTERN_LIMIT..INTERN_LIMIT-1 are kept by intern()
+INTERN_LIMIT = 256
 
-    def __hash__(self):
-        return hash(self.tuple)
+_new = tuple.__new__
+
+# (type, point) -> the shared instance, see intern()
+_interned = {}
+
+
+class Point(tuple):
+    """
+    Immutable 2D point, a tuple (x, y) underneath.
+
+    Being a tuple keeps hashing and equality in C, which is what matters for
+    the dicts and sets of points every search is built on.  Points order by
+    row, y then x.
+    """
+    __slots__ = ()
+
+    def __new__(cls, x, y):
+        return _new(cls, (int(x), int(y)))
+
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+
+    def __getnewargs__(self):
+        return tuple(self)
 
     def __add__(self, other):
-        return Point(self.x + other.x, self.y + other.y)
+        return _new(Point, (self[0] + other[0], self[1] + other[1]))
 
     def __sub__(self, other):
-        return Point(self.x - other.x, self.y - other.y)
+        return _new(Point, (self[0] - other[0], self[1] - other[1]))
+
+    def __neg__(self):
+        return _new(Point, (-self[0], -self[1]))
 
     def __mul__(self, other):
         if isinstance(other, int):
-            return Point(self.x * other, self.y * other)
+            return _new(Point, (self[0] * other, self[1] * other))
         raise ValueError('Wrong type')
 
-    def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
-    
+    __rmul__ = __mul__
+
     def __lt__(self, other):
-        return self.y < other.y or (self.y == other.y and self.x < other.x)
-    
+        return self[1] < other[1] or (self[1] == other[1] and self[0] < other[0])
+
+    def __le__(self, other):
+        return not other < self
+
+    def __gt__(self, other):
+        return other < self
+
+    def __ge__(self, other):
+        return not self < other
+
     def __str__(self):
-        return "({},{})".format(self.x, self.y)
+        return "({},{})".format(*self)
 
     def __repr__(self):
-        return "P({},{})".format(self.x, self.y)
-    
-    def __iter__(self):
-        return iter(self.tuple) 
+        return "P({},{})".format(*self)
 
     @staticmethod
     def limits(a, b):
         miny, maxy = min(a.y, b.y), max(a.y, b.y) + 1
         minx, maxx = min(a.x, b.x), max(a.x, b.x) + 1
         return Point(minx, maxx), Point(miny, maxy)
-    
+
     @staticmethod
     def range(a, b):
         (minx, maxx), (miny, maxy) = Point.limits(a, b)
         for y in range(miny, maxy):
             for x in range(minx, maxx):
-                yield Point(x, y)
+                yield _new(Point, (x, y))
 
     @property
     def tuple(self):
-        return self.x, self.y
+        return self[0], self[1]
 
     def dist(self, other):
-        return abs(self.x - other.x) + abs(self.y - other.y)
+        return abs(self[0] - other[0]) + abs(self[1] - other[1])
 
 
-@total_ordering
-class Point3D(object):
-    def __init__(self, *dims):
-        self.dims = list(dims)
-        self._tuple = None
+class Point3D(tuple):
+    """
+    Immutable point of any number of dimensions, a tuple of them underneath.
 
-    def copy(self):
-        return Point3D(*self.dims)
-
-    @property
-    def x(self):
-        return self.dims[0]
+    p[0], p.x and so on are the coordinates in the order given.  Points
+    compare as the reversed tuple, z then y then x, the same way .tuple sorts.
+    """
+    __slots__ = ()
 
-    @x.setter
-    def x(self, value):
-        self.dims[0] = value
-        self._tuple = None
+    def __new__(cls, *dims):
+        return _new(cls, dims)
 
-    @property
-    def y(self):
-        return self.dims[1]
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+    z = property(itemgetter(2))
 
-    @y.setter
-    def y(self, value):
-        self.dims[1] = value
-        self._tuple = None
+    def __getnewargs__(self):
+        return tuple(self)
 
     @property
-    def z(self):
-        return self.dims[2]
+    def dims(self):
+        return self
 
-    @z.setter
-    def z(self, value):
-        self.dims[2] = value
-        self._tuple = None
+    def copy(self):
+        return self
 
     @property
     def tuple(self):
         # returning it like this makes it sort naturally as a tuple
-        if not self._tuple:
-            self._tuple = tuple(reversed(self.dims))
-        return self._tuple
-
-    def __getitem__(self, item):
-        return self.dims[item]
-
-    def __setitem__(self, key, value):
-        self.dims[key] = value
-
-    def __hash__(self):
-        return hash(self.tuple)
+        return self[::-1]
 
     def __add__(self, other):
-        return Point3D(*(s + o for s, o in zip(self.dims, other.dims)))
+        return _new(Point3D, map(add, self, other))
 
     def __sub__(self, other):
-        return Point3D(*(s - o for s, o in zip(self.dims, other.dims)))
+        return _new(Point3D, map(sub, self, other))
 
     def __neg__(self):
-        return Point3D(*(-d for d in self.dims))
-    
+        return _new(Point3D, (-d for d in self))
+
     def __mul__(self, other):
-        return Point3D(*(s * o for s, o in zip(self.dims, other.dims)))
-    
+        return _new(Point3D, (s * o for s, o in zip(self, other)))
+
     def __floordiv__(self, other):
-        return Point3D(*(s // o for s, o in zip(self.dims, other.dims)))
-    
-    def __truediv__(self, other):
-        return Point3D(*(s / o for s, o in zip(self.dims, other.dims)))
+        return _new(Point3D, (s // o for s, o in zip(self, other)))
 
-    def __eq__(self, other):
-        return self.tuple == other.tuple
+    def __truediv__(self, other):
+        return _new(Point3D, (s / o for s, o in zip(self, other)))
 
     def __lt__(self, other):
-        return self.tuple < other.tuple
+        return self[::-1] < other[::-1]
+
+    def __le__(self, other):
+        return self[::-1] <= other[::-1]
+
+    def __gt__(self, other):
+        return self[::-1] > other[::-1]
+
+    def __ge__(self, other):
+        return self[::-1] >= other[::-1]
 
     def __str__(self):
-        return "({})".format(",".join(str(d) for d in self.dims))
+        return "({})".format(",".join(str(d) for d in self))
 
     def __repr__(self):
-        return "Point3D({})".format(",".join(str(d) for d in self.dims))
+        return "Point3D({})".format(",".join(str(d) for d in self))
 
     def adjacent(self, include_self=False):
         for x in range(-1, 2):
@@ -164,23 +176,34 @@ class Point3D(object):
                     yield Point3D(x, y, z)
 
     def dist(self, other):
-        return sum(abs(s - o) for s, o in zip(self.dims, other.dims))
+        return sum(abs(s - o) for s, o in zip(self, other))
 
     def euclidean_dist(self, other):
-        return math.sqrt(sum((s - o) ** 2 for s, o in zip(self.dims, other.dims)))
+        return math.sqrt(sum((s - o) ** 2 for s, o in zip(self, other)))
 
     def rotate(self, x, y, z):
-        p = Point(*self.dims)
+        px, py, pz = self
         for _ in range(x % 4):
-            tz = p.y
-            p.y = -p.z
-            p.z = tz
+            py, pz = -pz, py
         for _ in range(y % 4):
-            tx = p.z
-            p.z = -p.x
-            p.x = tx
+            px, pz = pz, -px
         for _ in range(z % 4):
-            ty = p.x
-            p.x = -p.y
-            p.y = ty
-        return p
+            px, py = -py, px
+        return Point3D(px, py, pz)
+
+
+def intern(point):
+    """
+    The shared instance of a point with small coordinates, like sys.intern.
+
+    Interned points are the same object wherever they turn up, so dicts and
+    sets holding them find them by identity and many tables keyed by the
+    same cells share one copy.  Points outside the limit come back as they are.
+    """
+    key = (type(point), point)
+    shared = _interned.get(key)
+    if shared is not None:
+        return shared
+    if -INTERN_LIMIT <= min(point) and max(point) < INTERN_LIMIT:
+        _interned[key] = point
+    return point
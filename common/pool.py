@@ -0,0 +1,69 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+
+# The state each worker process was started with
+_state = None
+
+
+def _init_worker(shared, setup):
+    global _state
+    _state = setup(shared) if setup else shared
+
+
+def _call(function, item):
+    return function(_state, item)
+
+
+class Pool(object):
+    """
+    Runs function(state, item) over many items, spread over worker processes.
+
+    The shared data is sent to each worker once, when it starts, rather than
+    with every item, and setup(shared) builds the state from it there, for
+    state that cannot be pickled itself.  function and setup must be
+    module-level functions so they can be pickled.  workers=1 runs
+    everything in this process, as does a map over no more items than fit
+    in one chunk.  Use it as a context manager so the workers are shut down.
+    """
+    def __init__(self, shared, workers=None, setup=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.state = setup(shared) if setup else shared
+        self.executor = None
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(shared, setup))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def map(self, function, items, chunksize=16):
+        """function(state, item) for every item, in order"""
+        items = list(items)
+        if self.executor is None or len(items) <= chunksize:
+            return [function(self.state, item) for item in items]
+        return list(self.executor.map(_call, [function] * len(items), items, chunksize=chunksize))
+
+
+def best_of(results, key=None):
+    """
+    Reduce (candidate, value) pairs to the one with the highest key(value).
+    Ties go to the earliest candidate, so the answer does not depend on how
+    the work was split up.
+    """
+    best = None
+    best_score = None
+    for candidate, value in results:
+        score = key(value) if key else value
+        if best is None or score > best_score:
+            best = candidate, value
+            best_score = score
+    return best
@@ -0,0 +1,287 @@
+"""
+Shortest path searches over states given by a neighbors function.
+
+neighbors(state) yields (next_state, cost) pairs.  With size given, states
+are the integers 0..size-1 and distances and predecessors live in flat lists;
+with size None they can be anything hashable and orderable, and live in dicts.
+Encoding a state as an integer, (y * width + x) * 4 + direction say, is left
+to the caller.
+
+The searches start from an iterable of states and stop at the first state
+for which goal(state) is true, or run until everything reachable has been
+settled when there is no goal.  With predecessors=True they keep every
+predecessor that lies on a shortest path, not just the first one found, and
+carry on until every goal state at the best distance has been settled.
+"""
+from collections import deque
+from heapq import heapify, heappop, heappush
+
+
+INF = float('inf')
+
+
+class Distances(dict):
+    """Distances by state, INF for states not reached"""
+    def __missing__(self, state):
+        return INF
+
+
+class Predecessors(dict):
+    """Predecessor lists by state, None for states not reached"""
+    def __missing__(self, state):
+        return None
+
+
+def tables(size, predecessors=False):
+    """Empty distance and predecessor tables, lists with a size and dicts without"""
+    if size is None:
+        return Distances(), Predecessors() if predecessors else None
+    return [INF] * size, [None] * size if predecessors else None
+
+
+class Search(object):
+    """
+    The result of a search.
+
+    dist holds the distance of every state reached, preds the predecessors
+    if they were tracked and goals the goal states found at the best
+    distance.
+    """
+    def __init__(self, starts, dist, preds, goals):
+        self.starts = starts
+        self.dist = dist
+        self.preds = preds
+        self.goals = goals
+
+    @property
+    def goal(self):
+        return self.goals[0] if self.goals else None
+
+    @property
+    def cost(self):
+        """Distance to the goal, None if there was no goal or it was not reached"""
+        return self.dist[self.goals[0]] if self.goals else None
+
+    def path(self, state=None):
+        """One shortest path from a start state to state, the goal by default"""
+        if self.preds is None:
+            raise Exception("Search did not keep predecessors")
+        if state is None:
+            state = self.goal
+        if state is None or self.preds[state] is None:
+            return None
+        # The first predecessor of each state is the one that set its
+        # distance, so following those cannot go round a loop of zero costs
+        starts = set(self.starts)
+        path = [state]
+        while state not in starts:
+            state = self.preds[state][0]
+            path.append(state)
+        path.reverse()
+        return path
+
+    def on_best_paths(self, targets=None):
+        """Every state on any shortest path to the targets, the goals by default"""
+        if self.preds is None:
+            raise Exception("Search did not keep predecessors")
+        if targets is None:
+            targets = self.goals
+        preds = self.preds
+        seen = set()
+        stack = [t for t in targets if preds[t] is not None]
+        while stack:
+            state = stack.pop()
+            if state in seen:
+                continue
+            seen.add(state)
+            stack.extend(preds[state])
+        return seen
+
+
+def _start(starts, dist, preds):
+    starts = list(starts)
+    for s in starts:
+        dist[s] = 0
+        if preds is not None:
+            preds[s] = []
+    return starts
+
+
+def dijkstra(starts, neighbors, size=None, goal=None, predecessors=False):
+    """Dijkstra's algorithm with a binary heap and lazy deletion"""
+    dist, preds = tables(size, predecessors)
+    starts = _start(starts, dist, preds)
+    heap = [(0, s) for s in starts]
+    heapify(heap)
+    goals = []
+    best = INF
+    while heap:
+        d, s = heappop(heap)
+        if d > dist[s]:
+            continue
+        if d > best:
+            break
+        if goal is not None and goal(s):
+            goals.append(s)
+            if preds is None:
+                break
+            best = d
+        for n, w in neighbors(s):
+            nd = d + w
+            old = dist[n]
+            if nd < old:
+                dist[n] = nd
+                if preds is not None:
+                    preds[n] = [s]
+                heappush(heap, (nd, n))
+            elif nd == old and preds is not None:
+                preds[n].append(s)
+    return Search(starts, dist, preds, goals)
+
+
+def astar(starts, neighbors, heuristic, size=None, goal=None, predecessors=False):
+    """
+    A* search.  heuristic(state) must never overestimate the distance left to
+    a goal and must be consistent, h(s) <= cost(s, n) + h(n), which holds for
+    the usual Manhattan distance on a grid.
+    """
+    dist, preds = tables(size, predecessors)
+    starts = _start(starts, dist, preds)
+    heap = [(heuristic(s), 0, s) for s in starts]
+    heapify(heap)
+    goals = []
+    best = INF
+    while heap:
+        f, d, s = heappop(heap)
+        if d > dist[s]:
+            continue
+        if f > best:
+            break
+        if goal is not None and goal(s):
+            goals.append(s)
+            if preds is None:
+                break
+            best = d
+        for n, w in neighbors(s):
+            nd = d + w
+            old = dist[n]
+            if nd < old:
+                dist[n] = nd
+                if preds is not None:
+                    preds[n] = [s]
+                heappush(heap, (nd + heuristic(n), nd, n))
+            elif nd == old and preds is not None:
+                preds[n].append(s)
+    return Search(starts, dist, preds, goals)
+
+
+def zero_one_bfs(starts, neighbors, size=None, goal=None, predecessors=False):
+    """Breadth first search for costs of 0 and 1, with a deque instead of a heap"""
+    dist, preds = tables(size, predecessors)
+    starts = _start(starts, dist, preds)
+    queue = deque((0, s) for s in starts)
+    goals = []
+    best = INF
+    while queue:
+        d, s = queue.popleft()
+        if d > dist[s]:
+            continue
+        if d > best:
+            break
+        if goal is not None and goal(s):
+            goals.append(s)
+            if preds is None:
+                break
+            best = d
+        for n, w in neighbors(s):
+            nd = d + w
+            old = dist[n]
+            if nd < old:
+                dist[n] = nd
+                if preds is not None:
+                    preds[n] = [s]
+                if w:
+                    queue.append((nd, n))
+                else:
+                    queue.appendleft((nd, n))
+            elif nd == old and preds is not None:
+                preds[n].append(s)
+    return Search(starts, dist, preds, goals)
+
+
+def dial(starts, neighbors, max_weight, size=None, goal=None, predecessors=False):
+    """
+    Dial's algorithm for integer costs 0..max_weight: a ring of max_weight + 1
+    buckets of states, one per distance, stands in for the heap.
+    """
+    dist, preds = tables(size, predecessors)
+    ring = max_weight + 1
+    buckets = [[] for _ in range(ring)]
+    starts = _start(starts, dist, preds)
+    buckets[0].extend(starts)
+    pending = len(buckets[0])
+    goals = []
+    best = INF
+    d = 0
+    while pending and d <= best:
+        bucket = buckets[d % ring]
+        # Costs of 0 add to the bucket being emptied
+        while bucket:
+            s = bucket.pop()
+            pending -= 1
+            if dist[s] != d:
+                continue
+            if goal is not None and goal(s):
+                goals.append(s)
+                if preds is None:
+                    return Search(starts, dist, preds, goals)
+                best = d
+            for n, w in neighbors(s):
+                nd = d + w
+                old = dist[n]
+                if nd < old:
+                    dist[n] = nd
+                    if preds is not None:
+                        preds[n] = [s]
+                    buckets[nd % ring].append(n)
+                    pending += 1
+                elif nd == old and preds is not None:
+                    preds[n].append(s)
+        d += 1
+    return Search(starts, dist, preds, goals)
+
+
+def bidirectional(start, target, neighbors, reverse=None, size=None):
+    """
+    Distance from start to target by Dijkstra from both ends at once, None
+    if it cannot be reached.  reverse(state) yields the states leading into
+    state with their costs, neighbors itself for an undirected graph.
+    """
+    if reverse is None:
+        reverse = neighbors
+    forward, _ = tables(size)
+    backward, _ = tables(size)
+    forward[start] = 0
+    backward[target] = 0
+    forward_heap = [(0, start)]
+    backward_heap = [(0, target)]
+    best = 0 if start == target else INF
+    while forward_heap and backward_heap:
+        if forward_heap[0][0] + backward_heap[0][0] >= best:
+            break
+        # Grow whichever side has the nearer frontier
+        if forward_heap[0][0] <= backward_heap[0][0]:
+            heap, dist, other, expand = forward_heap, forward, backward, neighbors
+        else:
+            heap, dist, other, expand = backward_heap, backward, forward, reverse
+        d, s = heappop(heap)
+        if d > dist[s]:
+            continue
+        for n, w in expand(s):
+            nd = d + w
+            if nd < dist[n]:
+                dist[n] = nd
+                heappush(heap, (nd, n))
+            if nd + other[n] < best:
+                best = nd + other[n]
+    return None if best == INF else best
@@ -0,0 +1,76 @@
+from array import array
+
+
+class UnionFind(object):
+    """
+    Disjoint sets over the integers 0..size-1.
+
+    Parents and sizes live in array('i') storage, unions go by size and finds
+    halve the path as they walk it.  The number of components and the size
+    of the largest are kept up to date, along with how many components there
+    are of each size, so largest(k) only has to look at the distinct sizes.
+    """
+    def __init__(self, size):
+        self.parent = array('i', range(size))
+        self.sizes = array('i', [1]) * size
+        self.components = size
+        # component size -> number of components that size
+        self.size_counts = {1: size} if size else {}
+        self.largest_size = 1 if size else 0
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = x = parent[parent[x]]
+        return x
+
+    def union(self, a, b):
+        """Join the sets holding a and b, True if they were separate"""
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return False
+        sizes = self.sizes
+        if sizes[a] < sizes[b]:
+            a, b = b, a
+        self.parent[b] = a
+        counts = self.size_counts
+        for old in sizes[a], sizes[b]:
+            counts[old] -= 1
+            if not counts[old]:
+                del counts[old]
+        sizes[a] += sizes[b]
+        counts[sizes[a]] = counts.get(sizes[a], 0) + 1
+        if sizes[a] > self.largest_size:
+            self.largest_size = sizes[a]
+        self.components -= 1
+        return True
+
+    def same(self, a, b):
+        return self.find(a) == self.find(b)
+
+    def size(self, x):
+        return self.sizes[self.find(x)]
+
+    def largest(self, k=1):
+        """The sizes of the k largest components, largest first"""
+        result = []
+        for size in sorted(self.size_counts, reverse=True):
+            result.extend([size] * min(self.size_counts[size], k - len(result)))
+            if len(result) == k:
+                break
+        return result
+
+    def roots(self):
+        """The root of every element"""
+        return [self.find(x) for x in range(len(self.parent))]
+
+    def groups(self):
+        """The sets, ordered by their smallest member"""
+        groups = {}
+        for x, root in enumerate(self.roots()):
+            groups.setdefault(root, set()).add(x)
+        return list(groups.values())